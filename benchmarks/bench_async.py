@@ -0,0 +1,83 @@
+"""
+Compare the sync (WSGI) and native async (ASGI) recipe endpoints under load.
+
+    python -m benchmarks.bench_async --recipes 2000 --requests 2000 --concurrency 64
+
+Requests go through Django's in-process WSGIHandler (a thread pool of
+``--concurrency`` workers, as a threaded WSGI server would run them) and
+ASGIHandler (``--concurrency`` coroutines on one event loop). This isolates
+the views and handlers from any particular server; for end-to-end numbers run
+gunicorn and uvicorn against config.wsgi / config.asgi with a load generator.
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.bench_rendering import seed
+from benchmarks.utils import setup_django, test_database
+
+ENDPOINTS = (
+    ('recipe list', '/api/recipe/', '/api/async/recipe/'),
+    ('tag list', '/api/tags/', '/api/async/tags/'),
+)
+
+
+def run_wsgi(path, headers, total, concurrency):
+    from django.test import Client
+
+    def get(_):
+        response = Client().get(path, headers=headers)
+        assert response.status_code == 200, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(get, range(total)))
+    return time.perf_counter() - start
+
+
+def run_asgi(path, headers, total, concurrency):
+    from django.test import AsyncClient
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def get():
+            async with semaphore:
+                response = await AsyncClient().get(path, headers=headers)
+                assert response.status_code == 200, response.status_code
+
+        await asyncio.gather(*(get() for _ in range(total)))
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--recipes', type=int, default=2000)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework_simplejwt.tokens import AccessToken
+    from core.models import User
+
+    with test_database():
+        seed(args.recipes)
+        token = AccessToken.for_user(User.objects.get(email='bench@example.com'))
+        headers = {'Authorization': 'Bearer %s' % token}
+
+        print('%d requests, concurrency %d' % (args.requests, args.concurrency))
+        for name, sync_path, async_path in ENDPOINTS:
+            wsgi = run_wsgi(sync_path, headers, args.requests, args.concurrency)
+            asgi = run_asgi(async_path, headers, args.requests, args.concurrency)
+            print('%-12s wsgi %7.0f req/s   asgi %7.0f req/s   (%.2fx)' % (
+                name, args.requests / wsgi, args.requests / asgi, wsgi / asgi,
+            ))
+
+
+if __name__ == '__main__':
+    main()
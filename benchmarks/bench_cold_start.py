@@ -0,0 +1,69 @@
+"""
+Worker cold start: the time from a fresh interpreter to a loaded URLconf.
+
+    python -m benchmarks.bench_cold_start --runs 20
+
+Each run is a new Python process that loads the WSGI application and resolves
+a URL (which imports the URLconf and every view), like a worker before its
+first request. Also times the schema endpoint's first (generating) and later
+(cached) requests in one process.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+BOOT = '''
+import time
+start = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+from django.urls import resolve
+resolve('/api/recipe/')
+elapsed = time.perf_counter() - start
+print(elapsed, int('drf_yasg.views' in sys.modules))
+'''
+
+SCHEMA = '''
+import time
+from django.core.wsgi import get_wsgi_application
+from django.test import Client
+from django.test.utils import setup_test_environment
+get_wsgi_application()
+setup_test_environment()
+client = Client()
+for _ in range(3):
+    start = time.perf_counter()
+    assert client.get('/api/schema/').status_code == 200
+    print(time.perf_counter() - start)
+'''
+
+
+def python(code):
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    output = subprocess.run(
+        [sys.executable, '-c', 'import sys\n' + code], env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return [line.split() for line in output.splitlines()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    runs = [python(BOOT)[0] for _ in range(args.runs)]
+    timings = [float(elapsed) for elapsed, _ in runs]
+    print('boot      median %7.1f ms   best %7.1f ms   (drf_yasg.views imported: %s)' % (
+        statistics.median(timings) * 1000, min(timings) * 1000, 'yes' if runs[0][1] == '1' else 'no',
+    ))
+    first, *rest = [float(line[0]) for line in python(SCHEMA)]
+    print('schema    first request %7.1f ms   then %s' % (
+        first * 1000, '  '.join('%.2f ms' % (elapsed * 1000) for elapsed in rest),
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Per-request latency with and without persistent connections / pooling.
+
+    DB_HOST=localhost python -m benchmarks.bench_db_connections --requests 500
+
+Runs a recipe detail request repeatedly through Django's WSGIHandler in three
+modes: a new connection per request (CONN_MAX_AGE=0), persistent connections
+(the default from config/database.py), and the psycopg pool when DB_POOL=1 is
+set. Against a SQLite stand-in (DB_ENGINE=django.db.backends.sqlite3) the test
+database is a file, so connections really are reopened; the handshake cost
+is far smaller than a networked Postgres.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.utils import percentile, setup_django, test_database
+
+
+def run(path, token, count):
+    """Time requests through a real WSGIHandler (the test Client keeps connections open)"""
+    from wsgiref.util import setup_testing_defaults
+    from django.core.handlers.wsgi import WSGIHandler
+
+    handler = WSGIHandler()
+    statuses = []
+
+    def start_response(status, headers):
+        statuses.append(status)
+
+    timings = []
+    for _ in range(count):
+        environ = {'PATH_INFO': path, 'HTTP_HOST': 'testserver', 'HTTP_AUTHORIZATION': 'Bearer %s' % token}
+        setup_testing_defaults(environ)
+        start = time.perf_counter()
+        response = handler(environ, start_response)
+        b''.join(response)
+        response.close()  # sends request_finished, which closes expired connections
+        timings.append(time.perf_counter() - start)
+        assert statuses[-1].startswith('200'), statuses[-1]
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+    from rest_framework_simplejwt.tokens import AccessToken
+    from core.models import User, Recipe
+
+    if connection.vendor == 'sqlite':
+        # An in-memory test database is never closed; use a file instead
+        connection.settings_dict['TEST']['NAME'] = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+
+    configured_max_age = connection.settings_dict['CONN_MAX_AGE']
+    modes = [('new connection', 0)]
+    if 'pool' in connection.settings_dict['OPTIONS']:
+        modes.append(('psycopg pool', 0))
+    else:
+        modes.append(('persistent', configured_max_age or 60))
+
+    with test_database():
+        user = User.objects.create_user(email='bench@example.com', name='Bench', password=None)
+        recipe = Recipe.objects.create(user=user, title='Bench', time_minutes=10, price='1.00')
+        token = AccessToken.for_user(user)
+        path = '/api/recipe/%d/' % recipe.id
+
+        print('%s, %d requests per mode' % (connection.vendor, args.requests))
+        for name, max_age in modes:
+            connection.close()
+            connection.settings_dict['CONN_MAX_AGE'] = max_age
+            run(path, token, 10)  # warm up caches
+            timings = run(path, token, args.requests)
+            print('%-15s median %6.2f ms   p95 %6.2f ms' % (
+                name, statistics.median(timings) * 1000, percentile(timings, 0.95) * 1000,
+            ))
+        connection.settings_dict['CONN_MAX_AGE'] = configured_max_age
+
+
+if __name__ == '__main__':
+    main()
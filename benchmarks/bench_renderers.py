@@ -0,0 +1,55 @@
+"""
+Compare response renderers on large recipe lists.
+
+    python -m benchmarks.bench_renderers --recipes 5000 --repeat 10
+
+Renders the same list of recipes (as the list endpoint builds it) with DRF's
+JSONRenderer, FastJSONRenderer and, when msgpack is installed,
+MessagePackRenderer, and reports encoding time and body size. The data is
+built once, so only encoding is measured.
+"""
+import argparse
+
+from benchmarks.bench_rendering import seed
+from benchmarks.utils import measure, setup_django, summary, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--recipes', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+    from config import renderers
+    from recipe.rendering import recipe_values, render_recipes
+
+    candidates = [('json (stdlib)', JSONRenderer()), ('json (fast)', renderers.FastJSONRenderer())]
+    if renderers.orjson is None:
+        print('orjson is not installed; the fast JSON renderer uses the stdlib encoder')
+    if renderers.msgpack is not None:
+        candidates.append(('msgpack', renderers.MessagePackRenderer()))
+    else:
+        print('msgpack is not installed; skipping MessagePackRenderer')
+
+    with test_database():
+        seed(args.recipes)
+        data = render_recipes(list(recipe_values().order_by('-id')))
+
+    results = {}
+    for name, renderer in candidates:
+        size = len(renderer.render(data))
+        results[name] = summary(measure(lambda: renderer.render(data), args.repeat))
+        print('%-14s best %.3fs  median %.3fs  %6.1f MB/s  %8d bytes' % (
+            name, results[name]['best'], results[name]['median'],
+            size / results[name]['median'] / 1e6, size,
+        ))
+    baseline = results['json (stdlib)']['median']
+    for name in results:
+        if name != 'json (stdlib)':
+            print('%-14s %.1fx faster than stdlib json' % (name, baseline / results[name]['median']))
+
+
+if __name__ == '__main__':
+    main()
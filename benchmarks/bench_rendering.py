@@ -0,0 +1,81 @@
+"""
+Compare RecipeSerializer against the values()-based rendering path, and
+that path with a compact fieldset (``?fields=id,title,price``).
+
+    python -m benchmarks.bench_rendering --recipes 5000 --repeat 5
+"""
+import argparse
+
+from benchmarks.utils import measure, setup_django, summary, test_database
+
+
+def seed(count, tags_per_recipe=4, ingredients_per_recipe=8):
+    from core.models import User, Recipe, Tag, Ingredient
+
+    user = User.objects.create_user(email='bench@example.com', name='Bench', password=None)
+    tags = Tag.objects.bulk_create(Tag(user=user, name='Tag %d' % i) for i in range(40))
+    ingredients = Ingredient.objects.bulk_create(
+        Ingredient(user=user, name='Ingredient %d' % i) for i in range(120)
+    )
+    recipes = Recipe.objects.bulk_create(
+        Recipe(
+            user=user, title='Recipe %d' % i, description='Instructions ' * 20,
+            time_minutes=i % 180, price='%d.%02d' % (i % 100, i % 100),
+        )
+        for i in range(count)
+    )
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe_id=r.pk, tag_id=tags[(i + j) % len(tags)].pk)
+        for i, r in enumerate(recipes) for j in range(tags_per_recipe)
+    )
+    Recipe.ingredients.through.objects.bulk_create(
+        Recipe.ingredients.through(recipe_id=r.pk, ingredient_id=ingredients[(i + j) % len(ingredients)].pk)
+        for i, r in enumerate(recipes) for j in range(ingredients_per_recipe)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--recipes', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+    from core.models import Recipe
+    from recipe.rendering import Fieldset, recipe_values, render_recipes
+    from recipe.serializers import RecipeSerializer
+
+    renderer = JSONRenderer()
+
+    def serializer_path():
+        queryset = Recipe.objects.with_related().order_by('-id')
+        return renderer.render(RecipeSerializer(queryset, many=True).data)
+
+    def fast_path():
+        return renderer.render(render_recipes(list(recipe_values().order_by('-id'))))
+
+    compact = Fieldset(('id', 'title', 'price'))
+
+    def sparse_path():
+        return renderer.render(render_recipes(list(recipe_values(fields=compact).order_by('-id')), compact))
+
+    with test_database():
+        seed(args.recipes)
+        assert serializer_path() == fast_path(), 'outputs differ'
+
+        results = {}
+        for name, func in (('serializer', serializer_path), ('values', fast_path), ('sparse', sparse_path)):
+            results[name] = summary(measure(func, args.repeat))
+            print('%-10s best %.3fs  median %.3fs  (%d recipes/s)' % (
+                name, results[name]['best'], results[name]['median'],
+                args.recipes / results[name]['median'],
+            ))
+        print('speedup    %.1fx, sparse %.1fx' % (
+            results['serializer']['median'] / results['values']['median'],
+            results['serializer']['median'] / results['sparse']['median'],
+        ))
+
+
+if __name__ == '__main__':
+    main()
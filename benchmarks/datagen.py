@@ -0,0 +1,177 @@
+"""
+Synthetic users, recipes, tags and ingredients, inserted with bulk_create.
+
+    python -m benchmarks.datagen --users 100 --recipes 200 --seed 1
+
+Every user gets their own tag and ingredient vocabulary; recipes draw from it
+with a Zipf-like skew, so a few tags ("Vegetarian", "Quick") and ingredients
+("Salt", "Onion") appear on most recipes and the long tail on few, as in real
+collections. The same ``--seed`` always produces the same data.
+
+Run as a script it writes to the configured database (not a test database);
+the load benchmark calls ``generate`` on a throwaway one. Signals do not fire
+for bulk inserts, so nothing is cached for the new rows.
+"""
+import argparse
+import itertools
+import random
+import time
+from dataclasses import dataclass, field
+
+PASSWORD = 'benchmark-password'
+BATCH_SIZE = 2000
+ZIPF_EXPONENT = 1.1
+
+TAG_NAMES = [
+    'Vegetarian', 'Quick', 'Dinner', 'Healthy', 'Vegan', 'Lunch', 'Breakfast', 'Dessert', 'Gluten free',
+    'Comfort food', 'Italian', 'Mexican', 'Indian', 'Baking', 'Soup', 'Salad', 'Spicy', 'Budget', 'Party',
+    'Slow cooker', 'Grill', 'Seafood', 'Kids', 'Meal prep', 'Low carb', 'Japanese', 'French', 'Holiday',
+]
+INGREDIENT_NAMES = [
+    'Salt', 'Onion', 'Garlic', 'Olive oil', 'Pepper', 'Butter', 'Egg', 'Flour', 'Sugar', 'Milk', 'Tomato',
+    'Lemon', 'Chicken', 'Rice', 'Potato', 'Carrot', 'Cheese', 'Parsley', 'Basil', 'Cream', 'Beef', 'Pasta',
+    'Ginger', 'Chili', 'Honey', 'Yogurt', 'Spinach', 'Mushroom', 'Bacon', 'Cumin', 'Coriander', 'Paprika',
+    'Cinnamon', 'Vanilla', 'Soy sauce', 'Lime', 'Avocado', 'Bean', 'Lentil', 'Chickpea', 'Zucchini', 'Pork',
+]
+TITLE_WORDS = [
+    ['Quick', 'Classic', 'Spicy', 'Creamy', 'Roasted', 'Grandma\'s', 'Easy', 'Crispy', 'Smoky', 'Fresh'],
+    ['Tomato', 'Chicken', 'Lentil', 'Mushroom', 'Garlic', 'Lemon', 'Pumpkin', 'Beef', 'Chickpea', 'Salmon'],
+    ['Soup', 'Stew', 'Pasta', 'Curry', 'Salad', 'Risotto', 'Tart', 'Bake', 'Stir fry', 'Pie', 'Tacos'],
+]
+DESCRIPTION_WORDS = (
+    'chop slice simmer stir season bake roast whisk fold serve warm until golden tender the with and '
+    'over a for minutes heat pan oven sauce fresh bowl gently'
+).split()
+
+
+@dataclass
+class Dataset:
+    """Ids of the generated rows, for building requests"""
+    user_ids: list = field(default_factory=list)
+    emails: list = field(default_factory=list)
+    recipe_ids: dict = field(default_factory=dict)  # user id -> recipe ids
+    tag_ids: dict = field(default_factory=dict)
+    ingredient_ids: dict = field(default_factory=dict)
+    password: str = PASSWORD
+
+
+def vocabulary(names, count):
+    """``count`` distinct names, suffixed once the list runs out"""
+    cycle = itertools.cycle(names)
+    return [next(cycle) if i < len(names) else '%s %d' % (next(cycle), i // len(names)) for i in range(count)]
+
+
+def zipf_weights(count):
+    return list(itertools.accumulate(1 / (rank + 1) ** ZIPF_EXPONENT for rank in range(count)))
+
+
+def pick(rng, ids, cum_weights, count):
+    """``count`` distinct ids, popular (low-rank) ids more likely"""
+    count = min(count, len(ids))
+    chosen = set()
+    while len(chosen) < count:
+        chosen.update(rng.choices(ids, cum_weights=cum_weights, k=count - len(chosen)))
+    return chosen
+
+
+def generate(users=10, recipes=200, tags=30, ingredients=150, seed=0):
+    """Insert ``users`` users with ``recipes`` recipes each; returns a Dataset"""
+    from django.contrib.auth.hashers import make_password
+    from core.models import User, Recipe, Tag, Ingredient
+    from recipe.services import reconcile_recipe_counts
+
+    rng = random.Random(seed)
+    dataset = Dataset()
+    password = make_password(PASSWORD)  # hashing is slow; every user shares one hash
+    created = User.objects.bulk_create(
+        (User(email='bench%d@example.com' % i, name='Bench %d' % i, password=password) for i in range(users)),
+        batch_size=BATCH_SIZE,
+    )
+    dataset.emails = [user.email for user in created]
+    dataset.user_ids = [user.pk for user in created]
+
+    tag_names, ingredient_names = vocabulary(TAG_NAMES, tags), vocabulary(INGREDIENT_NAMES, ingredients)
+    all_tags = Tag.objects.bulk_create(
+        (Tag(user_id=user_id, name=name) for user_id in dataset.user_ids for name in tag_names),
+        batch_size=BATCH_SIZE,
+    )
+    all_ingredients = Ingredient.objects.bulk_create(
+        (Ingredient(user_id=user_id, name=name) for user_id in dataset.user_ids for name in ingredient_names),
+        batch_size=BATCH_SIZE,
+    )
+    for user_id, start in zip(dataset.user_ids, itertools.count(0, tags)):
+        dataset.tag_ids[user_id] = [tag.pk for tag in all_tags[start:start + tags]]
+    for user_id, start in zip(dataset.user_ids, itertools.count(0, ingredients)):
+        dataset.ingredient_ids[user_id] = [ingredient.pk for ingredient in all_ingredients[start:start + ingredients]]
+
+    all_recipes = Recipe.objects.bulk_create(
+        (
+            Recipe(
+                user_id=user_id,
+                title=' '.join(rng.choice(words) for words in TITLE_WORDS),
+                description=' '.join(rng.choices(DESCRIPTION_WORDS, k=rng.randint(10, 80))),
+                time_minutes=max(5, min(480, int(rng.lognormvariate(3.4, 0.7)))),
+                price='%.2f' % min(999.99, rng.lognormvariate(2.3, 0.6)),
+            )
+            for user_id in dataset.user_ids for _ in range(recipes)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    for user_id, start in zip(dataset.user_ids, itertools.count(0, recipes)):
+        dataset.recipe_ids[user_id] = [recipe.pk for recipe in all_recipes[start:start + recipes]]
+
+    tag_weights, ingredient_weights = zipf_weights(tags), zipf_weights(ingredients)
+    tag_links, ingredient_links = [], []
+    for recipe in all_recipes:
+        for tag_id in pick(rng, dataset.tag_ids[recipe.user_id], tag_weights, rng.randint(1, 5)):
+            tag_links.append(Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag_id))
+        for ingredient_id in pick(
+            rng, dataset.ingredient_ids[recipe.user_id], ingredient_weights, rng.randint(3, 12),
+        ):
+            ingredient_links.append(Recipe.ingredients.through(recipe_id=recipe.pk, ingredient_id=ingredient_id))
+    Recipe.tags.through.objects.bulk_create(tag_links, batch_size=BATCH_SIZE)
+    Recipe.ingredients.through.objects.bulk_create(ingredient_links, batch_size=BATCH_SIZE)
+    for model in (Tag, Ingredient):
+        reconcile_recipe_counts(model)
+    return dataset
+
+
+def load():
+    """The Dataset of users generated earlier in the configured database"""
+    from core.models import User, Recipe, Tag, Ingredient
+
+    dataset = Dataset()
+    users = User.objects.filter(email__regex=r'^bench[0-9]+@example\.com$').order_by('pk')
+    for user_id, email in users.values_list('pk', 'email'):
+        dataset.user_ids.append(user_id)
+        dataset.emails.append(email)
+        dataset.recipe_ids[user_id], dataset.tag_ids[user_id], dataset.ingredient_ids[user_id] = [], [], []
+    for model, ids in ((Recipe, dataset.recipe_ids), (Tag, dataset.tag_ids), (Ingredient, dataset.ingredient_ids)):
+        for pk, user_id in model.objects.filter(user__in=users).order_by('pk').values_list('pk', 'user_id'):
+            ids[user_id].append(pk)
+    return dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--recipes', type=int, default=200, help='recipes per user')
+    parser.add_argument('--tags', type=int, default=30, help='tags per user')
+    parser.add_argument('--ingredients', type=int, default=150, help='ingredients per user')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    from benchmarks.utils import setup_django
+    setup_django()
+    from django.db import transaction
+
+    start = time.perf_counter()
+    with transaction.atomic():
+        generate(args.users, args.recipes, args.tags, args.ingredients, args.seed)
+    print('%d users, %d recipes in %.1fs; password %r' % (
+        args.users, args.users * args.recipes, time.perf_counter() - start, PASSWORD,
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,327 @@
+"""
+Load test every API endpoint; report latency percentiles and throughput.
+
+    python -m benchmarks.load --users 20 --recipes 200 --requests 500 --concurrency 8 \\
+        --output results/after.json --compare results/before.json
+
+By default the data is generated (benchmarks/datagen.py) in a throwaway test
+database and requests go through Django's test client, in-process, from
+``--concurrency`` threads. Async endpoints use the AsyncClient.
+
+With ``--url http://localhost:8000`` requests go to a running server
+instead, over one keep-alive connection per thread. Seed its database first
+with ``python -m benchmarks.datagen``. The server must share this project's
+SECRET_KEY (tokens are minted locally), serve the async endpoints from ASGI,
+and allow more login attempts than the default LOGIN_THROTTLE_RATES.
+
+Each scenario runs on its own: ``--requests`` requests (fewer for the
+expensive ones) at ``--concurrency``. Results are printed and, with
+``--output``, saved as JSON together with the run's settings and git
+commit; ``--compare`` prints the change against an earlier JSON file.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from benchmarks.utils import percentile, setup_django, test_database
+
+SEARCH_WORDS = ['soup', 'chicken', 'lemon', 'curry', 'roasted', 'pasta']
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: object  # (context) -> path
+    body: object = None  # (context) -> JSON-able body
+    share: float = 1  # fraction of --requests, for the expensive ones
+    auth: bool = True
+
+
+class Context:
+    """One request's random user and the dataset it picks ids from"""
+    counter = itertools.count()
+
+    def __init__(self, dataset, tokens, rng):
+        self.dataset = dataset
+        self.rng = rng
+        self.index = rng.randrange(len(dataset.user_ids))
+        self.user_id = dataset.user_ids[self.index]
+        self.token = tokens[self.user_id]
+
+    @property
+    def email(self):
+        return self.dataset.emails[self.index]
+
+    def recipe_id(self):
+        return self.rng.choice(self.dataset.recipe_ids[self.user_id])
+
+    def popular_tag_ids(self, count):
+        return ','.join(str(pk) for pk in self.dataset.tag_ids[self.user_id][:count])
+
+    def unique(self):
+        return next(self.counter)
+
+
+def recipe_body(context):
+    return {
+        'title': 'Load test %d' % context.unique(),
+        'time_minutes': context.rng.randint(5, 120),
+        'price': '%.2f' % context.rng.uniform(1, 50),
+        'tags': [{'name': 'Quick'}, {'name': 'Load test'}],
+        'ingredients': [{'name': 'Salt'}, {'name': 'Onion'}, {'name': 'Load test'}],
+    }
+
+
+def refresh_body(context):
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from core.models import User
+
+    return {'refresh': str(RefreshToken.for_user(User(pk=context.user_id)))}
+
+
+SCENARIOS = [
+    Scenario('recipe-list', 'GET', lambda c: '/api/recipe/'),
+    Scenario(
+        'recipe-list-filtered', 'GET',
+        lambda c: '/api/recipe/?tags=%s&min_price=5&ordering=price' % c.popular_tag_ids(2),
+    ),
+    Scenario('recipe-search', 'GET', lambda c: '/api/recipe/?q=%s' % c.rng.choice(SEARCH_WORDS)),
+    Scenario('recipe-facets', 'GET', lambda c: '/api/recipe/facets/'),
+    Scenario('recipe-detail', 'GET', lambda c: '/api/recipe/%d/' % c.recipe_id()),
+    Scenario('recipe-export', 'GET', lambda c: '/api/recipe/export/', share=0.1),
+    Scenario('tag-list', 'GET', lambda c: '/api/tags/'),
+    Scenario('ingredient-list', 'GET', lambda c: '/api/ingredients/'),
+    Scenario('recipe-create', 'POST', lambda c: '/api/recipe/create/', recipe_body),
+    Scenario(
+        'recipe-update', 'PATCH', lambda c: '/api/recipes/%d/' % c.recipe_id(),
+        lambda c: {'title': 'Updated %d' % c.unique()},
+    ),
+    Scenario(
+        'recipe-bulk', 'POST', lambda c: '/api/recipe/bulk/',
+        lambda c: {'operations': [{'op': 'create', 'data': recipe_body(c)} for _ in range(5)]},
+        share=0.2,
+    ),
+    Scenario('async-recipe-list', 'GET', lambda c: '/api/async/recipe/'),
+    Scenario('async-recipe-detail', 'GET', lambda c: '/api/async/recipe/%d/' % c.recipe_id()),
+    Scenario('async-tag-list', 'GET', lambda c: '/api/async/tags/'),
+    Scenario('async-ingredient-list', 'GET', lambda c: '/api/async/ingredients/'),
+    Scenario('user-update', 'PATCH', lambda c: '/api/update/', lambda c: {'name': 'Renamed %d' % c.unique()}),
+    Scenario(
+        'user-create', 'POST', lambda c: '/api/create/',
+        lambda c: {'email': 'load%d-%d@example.com' % (os.getpid(), c.unique()), 'name': 'Load', 'password': 'Loadpass123'},
+        share=0.1, auth=False,
+    ),
+    Scenario(
+        'user-login', 'POST', lambda c: '/api/login/',
+        lambda c: {'email': c.email, 'password': c.dataset.password}, share=0.1, auth=False,
+    ),
+    Scenario('user-logout', 'POST', lambda c: '/api/logout/', refresh_body, share=0.2, auth=False),
+    Scenario('schema', 'GET', lambda c: '/api/schema/', auth=False),
+]
+
+
+class ClientTransport:
+    """In-process requests through the test client, one client per thread"""
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def request(self, method, path, body, headers):
+        from asgiref.sync import async_to_sync
+        from django.test import AsyncClient, Client
+
+        if not hasattr(self.local, 'client'):
+            self.local.client = Client(raise_request_exception=False)
+            self.local.async_client = AsyncClient(raise_request_exception=False)
+        kwargs = {'data': json.dumps(body), 'content_type': 'application/json'} if body is not None else {}
+        if path.startswith('/api/async/'):
+            response = async_to_sync(getattr(self.local.async_client, method.lower()))(path, headers=headers, **kwargs)
+        else:
+            response = getattr(self.local.client, method.lower())(path, headers=headers, **kwargs)
+        if response.streaming:
+            b''.join(response.streaming_content)  # the export is generated while it is read
+        return response.status_code
+
+
+class HTTPTransport:
+    """Requests to a running server, over one keep-alive connection per thread"""
+
+    def __init__(self, url):
+        self.url = urlsplit(url)
+        self.local = threading.local()
+
+    def request(self, method, path, body, headers):
+        if not hasattr(self.local, 'connection'):
+            connection_class = http.client.HTTPSConnection if self.url.scheme == 'https' else http.client.HTTPConnection
+            self.local.connection = connection_class(self.url.netloc, timeout=60)
+        headers = dict(headers)
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        try:
+            self.local.connection.request(method, self.url.path.rstrip('/') + path, payload, headers)
+            response = self.local.connection.getresponse()
+            response.read()
+        except (http.client.HTTPException, OSError):
+            del self.local.connection
+            raise
+        return response.status
+
+
+def run_scenario(scenario, transport, dataset, tokens, total, concurrency, seed):
+    """Latencies in seconds, status counts and wall time for ``total`` requests"""
+    statuses = {}
+    lock = threading.Lock()
+
+    def one(index):
+        context = Context(dataset, tokens, random.Random('%s-%d-%d' % (scenario.name, seed, index)))
+        headers = {'Authorization': 'Bearer %s' % context.token} if scenario.auth else {}
+        body = scenario.body(context) if scenario.body else None
+        path = scenario.path(context)
+        start = time.perf_counter()
+        try:
+            status = transport.request(scenario.method, path, body, headers)
+        except Exception as exc:  # reported with the results, not fatal
+            status = type(exc).__name__
+        elapsed = time.perf_counter() - start
+        with lock:
+            statuses[status] = statuses.get(status, 0) + 1
+        return elapsed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        timings = list(pool.map(one, range(total)))
+    return timings, statuses, time.perf_counter() - start
+
+
+def report(timings, statuses, wall):
+    errors = sum(count for status, count in statuses.items() if not (isinstance(status, int) and status < 400))
+    return {
+        'requests': len(timings),
+        'errors': errors,
+        'statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        'throughput_rps': len(timings) / wall,
+        'mean_ms': statistics.mean(timings) * 1000,
+        'p50_ms': percentile(timings, 0.50) * 1000,
+        'p95_ms': percentile(timings, 0.95) * 1000,
+        'p99_ms': percentile(timings, 0.99) * 1000,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    print('%-22s %8s %8s %8s %8s %9s %6s' % ('scenario', 'p50 ms', 'p95 ms', 'p99 ms', 'mean ms', 'req/s', 'errors'))
+    for name, result in results.items():
+        print('%-22s %8.2f %8.2f %8.2f %8.2f %9.1f %6d' % (
+            name, result['p50_ms'], result['p95_ms'], result['p99_ms'], result['mean_ms'],
+            result['throughput_rps'], result['errors'],
+        ))
+        if baseline and name in baseline:
+            before = baseline[name]
+            print('%-22s %7.0f%% %7.0f%% %7.0f%% %7.0f%% %8.0f%%' % ('  vs baseline', *(
+                (result[key] / before[key] - 1) * 100 if before[key] else 0
+                for key in ('p50_ms', 'p95_ms', 'p99_ms', 'mean_ms', 'throughput_rps')
+            )))
+
+
+def run(args, transport, dataset):
+    from rest_framework_simplejwt.tokens import AccessToken
+    from core.models import User
+
+    tokens = {user_id: str(AccessToken.for_user(User(pk=user_id))) for user_id in dataset.user_ids}
+    scenarios = [s for s in SCENARIOS if not args.scenarios or s.name in args.scenarios]
+    results = {}
+    for scenario in scenarios:
+        total = max(1, int(args.requests * scenario.share))
+        run_scenario(scenario, transport, dataset, tokens, min(total, args.warmup), args.concurrency, -1)
+        results[scenario.name] = report(*run_scenario(
+            scenario, transport, dataset, tokens, total, args.concurrency, args.seed,
+        ))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='base URL of a running server (default: in-process test client)')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--recipes', type=int, default=200, help='recipes per user')
+    parser.add_argument('--requests', type=int, default=500, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--warmup', type=int, default=20, help='unmeasured requests per scenario')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scenarios', nargs='+', choices=[s.name for s in SCENARIOS], help='default: all')
+    parser.add_argument('--output', help='save the results to this JSON file')
+    parser.add_argument('--compare', help='JSON file of an earlier run to compare against')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.db import connection
+    from django.test import override_settings
+    from benchmarks.datagen import generate, load
+
+    if connection.vendor == 'sqlite':
+        # A file, unlike the shared in-memory test database, makes concurrent
+        # writers wait for the lock instead of failing. SQLite still runs one
+        # write at a time: use PostgreSQL for numbers that mean anything.
+        connection.settings_dict['TEST']['NAME'] = os.path.join(tempfile.mkdtemp(), 'load.sqlite3')
+
+    started = datetime.now(timezone.utc)
+    if args.url:
+        dataset = load()
+        assert dataset.user_ids, 'no benchmark users; run python -m benchmarks.datagen first'
+        results = run(args, HTTPTransport(args.url), dataset)
+    else:
+        with test_database(), override_settings(LOGIN_THROTTLE_RATES={'ip': '1000000/s', 'email': '1000000/s'}):
+            dataset = generate(args.users, args.recipes, seed=args.seed)
+            results = run(args, ClientTransport(), dataset)
+
+    output = {
+        'meta': {
+            'started': started.isoformat(),
+            'commit': git_commit(),
+            'target': args.url or 'in-process',
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'debug': settings.DEBUG,
+            'args': vars(args),
+        },
+        'results': results,
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    print_results(results, baseline)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2)
+        print('Saved %s' % args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against a throwaway test database created with the configured
+DATABASES settings (like ``manage.py test``) and destroyed afterwards.
+"""
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Create a test database for the duration of the block"""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(func, repeat=5):
+    """Run ``func`` ``repeat`` times and return timings in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def percentile(timings, fraction):
+    """Nearest-rank percentile of ``timings``, e.g. ``fraction=0.95``"""
+    timings = sorted(timings)
+    return timings[min(len(timings) - 1, int(len(timings) * fraction))]
+
+
+def summary(timings):
+    return {
+        'best': min(timings),
+        'median': statistics.median(timings),
+    }
@@ -0,0 +1,88 @@
+"""
+DATABASES entries built from environment variables.
+
+docker-compose passes DB_NAME, DB_USER, DB_PASSWORD, DB_HOST and DB_PORT;
+the defaults match the compose file. Connections are kept open between
+requests (DB_CONN_MAX_AGE seconds) and checked before reuse, so a request
+only pays the TCP + auth handshake when the previous connection has aged out
+or died.
+
+With DB_POOL=1 each worker process gets a psycopg 3 connection pool instead
+(requires ``psycopg[pool]`` and the postgresql engine). Size it per worker:
+DB_POOL_MAX_SIZE should cover the worker's threads, and workers times
+DB_POOL_MAX_SIZE must stay below the server's max_connections.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+def env_int(name, default):
+    value = os.environ.get(name)
+    return default if value in (None, '') else int(value)
+
+
+def env_bool(name, default):
+    value = os.environ.get(name)
+    if value in (None, ''):
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def database_from_env(prefix='DB_', **defaults):
+    """One DATABASES entry from ``<prefix>*`` variables, falling back to ``defaults``"""
+    def env(name, default):
+        return os.environ.get(prefix + name, defaults.get(name, default))
+
+    engine = env('ENGINE', 'django.db.backends.postgresql')
+    config = {
+        'ENGINE': engine,
+        'NAME': env('NAME', 'postgres'),
+        'USER': env('USER', 'postgres'),
+        'PASSWORD': env('PASSWORD', 'postgres'),
+        'HOST': env('HOST', 'postgres_db'),
+        'PORT': env('PORT', '5432'),
+        'CONN_MAX_AGE': env_int(prefix + 'CONN_MAX_AGE', 60),
+        'CONN_HEALTH_CHECKS': env_bool(prefix + 'CONN_HEALTH_CHECKS', True),
+        'OPTIONS': {},
+    }
+    if engine != 'django.db.backends.postgresql':
+        return config
+
+    config['OPTIONS']['connect_timeout'] = env_int(prefix + 'CONNECT_TIMEOUT', 5)
+    if env_bool(prefix + 'POOL', False):
+        try:
+            # Django only supports the pool option with psycopg 3
+            import psycopg  # noqa: F401
+            from psycopg_pool import ConnectionPool
+        except ImportError:
+            raise ImproperlyConfigured(
+                '%sPOOL needs psycopg 3 with its pool: pip install "psycopg[binary,pool]"' % prefix
+            )
+
+        # The pool replaces persistent connections; Django requires CONN_MAX_AGE = 0
+        config['CONN_MAX_AGE'] = 0
+        config['OPTIONS']['pool'] = {
+            'min_size': env_int(prefix + 'POOL_MIN_SIZE', 2),
+            'max_size': env_int(prefix + 'POOL_MAX_SIZE', 4),
+            'timeout': env_int(prefix + 'POOL_TIMEOUT', 10),
+            # Health check on checkout, like CONN_HEALTH_CHECKS
+            'check': ConnectionPool.check_connection,
+        }
+    return config
+
+
+def replica_databases(primary, prefix='DB_'):
+    """
+    Read replica aliases ``replica1``, ``replica2``... from ``<prefix>REPLICAS``.
+
+    The variable lists replica hosts, or database files for SQLite, separated
+    by commas; every other setting is the primary's. Under test the replicas
+    mirror the primary's test database.
+    """
+    entries = [entry.strip() for entry in os.environ.get(prefix + 'REPLICAS', '').split(',') if entry.strip()]
+    key = 'NAME' if primary['ENGINE'] == 'django.db.backends.sqlite3' else 'HOST'
+    return {
+        'replica%d' % index: dict(primary, **{key: entry}, OPTIONS=dict(primary['OPTIONS']), TEST={'MIRROR': 'default'})
+        for index, entry in enumerate(entries, 1)
+    }
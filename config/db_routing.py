@@ -0,0 +1,138 @@
+"""
+Read-replica routing with read-your-writes stickiness.
+
+ReplicaRoutingMiddleware picks the database for each request's reads: a
+random replica for GET/HEAD/OPTIONS, the primary for everything else. A user
+whose write succeeded is marked in the cache, and their reads stay on the
+primary until the mark expires (READ_YOUR_WRITES_WINDOW seconds), so they
+never see replication lag on their own changes.
+
+The user is read from the access token without a query. The token is
+validated again by the view's authentication.
+"""
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from user.authentication import CachedJWTAuthentication
+
+STICKY_KEY = 'db:read-your-writes:%s'
+
+# Alias for reads during the current request; None means the primary
+read_alias = ContextVar('read_alias', default=None)
+
+authentication = CachedJWTAuthentication()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+def keep_read_alias(iterable):
+    """
+    Iterate ``iterable`` with the current request's read alias.
+
+    A StreamingHttpResponse body is consumed after the middleware has
+    returned and reset the alias; wrap it in the view so every chunk reads
+    from the database the request was routed to.
+    """
+    alias = read_alias.get()  # now, while the view runs
+    iterator = iter(iterable)
+
+    def iterate():
+        while True:
+            token = read_alias.set(alias)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                read_alias.reset(token)
+            yield item
+
+    return iterate()
+
+
+def request_user_id(request):
+    """Id of the user in the request's access token, or None"""
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+    try:
+        raw_token = authentication.get_raw_token(header)
+        if raw_token is None:
+            return None
+        return authentication.token_user_id(authentication.get_validated_token(raw_token))
+    except (AuthenticationFailed, InvalidToken):
+        return None
+
+
+def get_cache():
+    return caches[settings.READ_YOUR_WRITES_CACHE_ALIAS]
+
+
+def choose_alias(sticky):
+    return None if sticky else random.choice(settings.DATABASE_REPLICAS)
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        user_id = request_user_id(request)
+        if request.method in SAFE_METHODS:
+            sticky = user_id is not None and get_cache().get(STICKY_KEY % user_id)
+            token = read_alias.set(choose_alias(sticky))
+            try:
+                return self.get_response(request)
+            finally:
+                read_alias.reset(token)
+
+        response = self.get_response(request)
+        if user_id is not None and response.status_code < 400:
+            get_cache().set(STICKY_KEY % user_id, True, settings.READ_YOUR_WRITES_WINDOW)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        user_id = request_user_id(request)
+        if request.method in SAFE_METHODS:
+            sticky = user_id is not None and await get_cache().aget(STICKY_KEY % user_id)
+            token = read_alias.set(choose_alias(sticky))
+            try:
+                return await self.get_response(request)
+            finally:
+                read_alias.reset(token)
+
+        response = await self.get_response(request)
+        if user_id is not None and response.status_code < 400:
+            await get_cache().aset(STICKY_KEY % user_id, True, settings.READ_YOUR_WRITES_WINDOW)
+        return response
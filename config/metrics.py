@@ -0,0 +1,271 @@
+"""
+Per-view request metrics, Server-Timing headers and a Prometheus endpoint.
+
+MetricsMiddleware times every request and records, per URL name and method:
+latency, the number and duration of database queries, time spent rendering
+the response body, response size and status codes. Each response gets a
+``Server-Timing`` header with the same numbers for that request, so they
+show up in the browser's network panel.
+
+Queries are counted by an execute wrapper installed on every database
+connection. It reports to the current request through a context variable,
+which also follows the request into ``sync_to_async`` threads.
+
+Metrics are kept in memory per process and served in the Prometheus text
+format by ``metrics_view``, to clients in METRICS_ALLOWED_NETWORKS only.
+With several workers, each worker reports its own numbers; scrape every
+worker, or sum them in Prometheus.
+"""
+import ipaddress
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+METHODS = {'GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE'}
+
+# Stats of the request being handled, or None outside of a request
+current = ContextVar('request_metrics', default=None)
+
+
+class RequestStats:
+    __slots__ = ('start', 'queries', 'db_time', 'render_time', 'render_start')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.render_start = None
+
+    def server_timing(self, duration):
+        return 'app;dur=%.1f, db;dur=%.1f;desc="%d queries", render;dur=%.1f' % (
+            duration * 1000, self.db_time * 1000, self.queries, self.render_time * 1000,
+        )
+
+
+def record_query(execute, sql, params, many, context):
+    stats = current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_time += time.perf_counter() - start
+        stats.queries += 1
+
+
+def install_query_wrapper(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_wrapper)
+
+
+@contextmanager
+def rendering():
+    """Count the time spent in the block as the current request's render time"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats = current.get()
+        if stats is not None:
+            stats.render_time += time.perf_counter() - start
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self):
+        """(le, cumulative count) pairs, ending with +Inf"""
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            yield bound, total
+
+
+class ViewMetrics:
+    __slots__ = ('latency', 'queries', 'db_seconds', 'render_seconds', 'response_bytes', 'statuses')
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_seconds = 0.0
+        self.render_seconds = 0.0
+        self.response_bytes = 0
+        self.statuses = {}
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def record(self, view, method, status, duration, stats, size):
+        with self.lock:
+            metrics = self.views.get((view, method))
+            if metrics is None:
+                metrics = self.views[view, method] = ViewMetrics()
+            metrics.latency.observe(duration)
+            metrics.queries.observe(stats.queries)
+            metrics.db_seconds += stats.db_time
+            metrics.render_seconds += stats.render_time
+            metrics.response_bytes += size
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+
+    def clear(self):
+        with self.lock:
+            self.views.clear()
+
+    def export(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self.lock:
+            views = sorted(self.views.items())
+            lines = []
+            self.export_histogram(
+                lines, views, 'http_request_duration_seconds', 'latency', 'Request latency in seconds.',
+            )
+            self.export_histogram(lines, views, 'http_request_db_queries', 'queries', 'Database queries per request.')
+            for name, attribute, help_text in (
+                ('http_request_db_seconds_total', 'db_seconds', 'Time spent in database queries.'),
+                ('http_request_render_seconds_total', 'render_seconds', 'Time spent rendering response bodies.'),
+                ('http_response_size_bytes_total', 'response_bytes', 'Response body bytes, except streams.'),
+            ):
+                lines.append('# HELP %s %s' % (name, help_text))
+                lines.append('# TYPE %s counter' % name)
+                for (view, method), metrics in views:
+                    lines.append('%s{%s} %s' % (name, labels(view, method), number(getattr(metrics, attribute))))
+            lines.append('# HELP http_requests_total Requests by response status.')
+            lines.append('# TYPE http_requests_total counter')
+            for (view, method), metrics in views:
+                for status, count in sorted(metrics.statuses.items()):
+                    lines.append('http_requests_total{%s,status="%d"} %d' % (labels(view, method), status, count))
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def export_histogram(lines, views, name, attribute, help_text):
+        lines.append('# HELP %s %s' % (name, help_text))
+        lines.append('# TYPE %s histogram' % name)
+        for (view, method), metrics in views:
+            histogram = getattr(metrics, attribute)
+            view_labels = labels(view, method)
+            for bound, count in histogram.samples():
+                lines.append('%s_bucket{%s,le="%s"} %d' % (name, view_labels, number(bound), count))
+            lines.append('%s_sum{%s} %s' % (name, view_labels, number(histogram.sum)))
+            lines.append('%s_count{%s} %d' % (name, view_labels, sum(histogram.counts)))
+
+
+def number(value):
+    return value if isinstance(value, str) else repr(value)
+
+
+def escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def labels(view, method):
+    return 'view="%s",method="%s"' % (escape(view), escape(method))
+
+
+registry = Registry()
+
+
+def view_name(request):
+    """The URL name the request resolved to; a bounded set, unlike paths"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # Connections opened before this middleware existed missed connection_created
+        for connection in connections.all(initialized_only=True):
+            install_query_wrapper(connection)
+        stats = RequestStats()
+        token = current.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.finish(request, response, stats)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = current.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.finish(request, response, stats)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns
+        stats = current.get()
+        if stats is not None:
+            stats.render_start = time.perf_counter()
+            response.add_post_render_callback(lambda response: self.rendered(stats))
+        return response
+
+    @staticmethod
+    def rendered(stats):
+        stats.render_time += time.perf_counter() - stats.render_start
+        stats.render_start = None
+
+    def finish(self, request, response, stats):
+        duration = time.perf_counter() - stats.start
+        size = 0 if response.streaming else len(response.content)
+        method = request.method if request.method in METHODS else 'other'
+        registry.record(view_name(request), method, response.status_code, duration, stats, size)
+        if settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = stats.server_timing(duration)
+        return response
+
+
+@lru_cache(maxsize=None)
+def allowed_networks(networks):
+    return [ipaddress.ip_network(network.strip(), strict=False) for network in networks if network.strip()]
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; a 404 for clients outside METRICS_ALLOWED_NETWORKS"""
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        raise Http404
+    if not any(address in network for network in allowed_networks(tuple(settings.METRICS_ALLOWED_NETWORKS))):
+        raise Http404
+    return HttpResponse(registry.export(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,64 @@
+"""
+Fast response renderers, chosen per request from the Accept header.
+
+``FastJSONRenderer`` serves ``application/json`` with orjson when it is
+installed. The output is byte for byte what DRF's JSONRenderer produces:
+compact, UTF-8, U+2028/U+2029 escaped, and every value orjson does not
+encode natively (Decimal, datetime, lazy strings, ...) goes through DRF's
+own encoder. Indented output (``Accept: application/json; indent=4``, the
+browsable API) and installs without orjson use JSONRenderer itself.
+
+``MessagePackRenderer`` serves ``application/msgpack`` for internal
+consumers. It needs the ``msgpack`` package; settings only list it when
+that is installed, so clients without it get JSON as before.
+"""
+from decimal import Decimal
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+_encoder = JSONEncoder()
+
+
+def encode_default(obj):
+    """DRF's JSONEncoder.default, with the common Decimal case first"""
+    if type(obj) is Decimal:
+        return float(obj)
+    return _encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    if orjson is not None:
+        # Datetimes go to encode_default so they keep DRF's format ("...Z")
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or data is None or indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        content = orjson.dumps(data, default=encode_default, option=self.options)
+        if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+            content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return content
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
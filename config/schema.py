@@ -0,0 +1,119 @@
+"""
+The OpenAPI schema, built once per process and served from memory.
+
+The schema is read from OPENAPI_SCHEMA_FILE when that file exists (written by
+``manage.py generate_schema``), or generated on the first request otherwise.
+Responses carry a strong ETag, so clients revalidate with a 304.
+
+drf_yasg's generator, codecs and UI views are imported on first use, not when
+the URLconf loads, so workers that never serve the docs never import them.
+The Swagger UI and ReDoc pages fetch the schema from these cached bytes.
+"""
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from rest_framework import permissions
+
+INFO = {
+    'title': "My Project API",
+    'default_version': 'v1',
+    'description': "API documentation for my project",
+}
+CONTENT_TYPES = {
+    'json': 'application/openapi+json',
+    'yaml': 'application/yaml',
+}
+
+
+def schema_info():
+    from drf_yasg import openapi
+    return openapi.Info(**INFO)
+
+
+def generate_schema_json():
+    """Run the drf_yasg generator over every endpoint; returns JSON bytes"""
+    from drf_yasg.codecs import OpenAPICodecJson
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    schema = OpenAPISchemaGenerator(schema_info()).get_schema(request=None, public=True)
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+
+class SchemaDocument:
+    def __init__(self, content):
+        self.content = {'json': content}
+
+    def get(self, format):
+        if format not in self.content:
+            from drf_yasg.codecs import yaml_sane_dump
+            data = json.loads(self.content['json'], object_pairs_hook=OrderedDict)
+            self.content[format] = yaml_sane_dump(data, binary=True)
+        return self.content[format]
+
+    def etag(self, format):
+        return '"schema-%s"' % hashlib.sha256(self.get(format)).hexdigest()[:32]
+
+
+@lru_cache(maxsize=None)
+def schema_document():
+    path = settings.OPENAPI_SCHEMA_FILE
+    if path and os.path.exists(path):
+        with open(path, 'rb') as f:
+            return SchemaDocument(f.read())
+    return SchemaDocument(generate_schema_json())
+
+
+def schema_response(request, format='json'):
+    document = schema_document()
+    etag = document.etag(format)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(document.get(format), content_type=CONTENT_TYPES[format])
+    response['ETag'] = etag
+    # Cacheable, but always revalidated; a 304 costs a dict lookup
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+def schema_view(request):
+    return schema_response(request, 'json')
+
+
+def schema_yaml_view(request):
+    return schema_response(request, 'yaml')
+
+
+@lru_cache(maxsize=None)
+def ui_view(renderer):
+    from drf_yasg import openapi
+    from drf_yasg.generators import OpenAPISchemaGenerator
+    from drf_yasg.views import get_schema_view
+
+    class PageGenerator(OpenAPISchemaGenerator):
+        # The UI pages only show the title and version; the full schema is
+        # fetched separately with ?format=openapi
+        def get_schema(self, request=None, public=False):
+            return openapi.Swagger(info=self.info, _prefix='/', paths=openapi.Paths(paths={}))
+
+    view = get_schema_view(
+        schema_info(),
+        public=True,
+        permission_classes=(permissions.AllowAny,),
+        generator_class=PageGenerator,
+    )
+    return view.with_ui(renderer, cache_timeout=0)
+
+
+def docs_view(renderer):
+    """Swagger UI or ReDoc page, answering the page's own ?format=openapi fetch from the cache"""
+    def view(request, *args, **kwargs):
+        if request.GET.get('format') == 'openapi':
+            return schema_response(request, 'json')
+        return ui_view(renderer)(request, *args, **kwargs)
+    return view
@@ -10,9 +10,13 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import importlib.util
+import os
 from pathlib import Path
 from datetime import timedelta
 
+from config.database import database_from_env, env_bool, replica_databases
+
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -48,9 +52,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'config.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'config.db_routing.ReplicaRoutingMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -80,22 +86,41 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-import os
-
+# Configured from DB_* environment variables, see config/database.py
 DATABASES = {
+    "default": database_from_env(),
+}
+DATABASES.update(replica_databases(DATABASES["default"]))
+
+# GET/HEAD requests read from a random replica, if any. After a user's last
+# successful write their reads stay on the primary for READ_YOUR_WRITES_WINDOW
+# seconds; the marker is kept in READ_YOUR_WRITES_CACHE_ALIAS, which must be a
+# shared cache when running several workers.
+# Tests read from the primary, see config/test_runner.py.
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["config.db_routing.ReplicaRouter"]
+TEST_RUNNER = "config.test_runner.PrimaryReadsTestRunner"
+READ_YOUR_WRITES_WINDOW = 10
+READ_YOUR_WRITES_CACHE_ALIAS = "default"
+
+# Per-view request metrics (config/metrics.py). Every response carries a
+# Server-Timing header unless METRICS_SERVER_TIMING=0; /internal/metrics
+# serves Prometheus text to clients in METRICS_ALLOWED_NETWORKS.
+METRICS_SERVER_TIMING = env_bool("METRICS_SERVER_TIMING", True)
+METRICS_ALLOWED_NETWORKS = os.environ.get("METRICS_ALLOWED_NETWORKS", "127.0.0.0/8,::1/128").split(",")
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": "postgres",
-        "USER": "postgres",
-        "PASSWORD": "postgres",
-        "HOST": "postgres_db",  # SAME as service name
-        "PORT": "5432",
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "recipe-api",
     }
 }
 
 
-
-
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -115,15 +140,79 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Responses are negotiated from the Accept header: orjson-backed JSON by
+# default, MessagePack for "Accept: application/msgpack" when the msgpack
+# package is installed (config/renderers.py)
+RENDERER_CLASSES = ['config.renderers.FastJSONRenderer']
+if importlib.util.find_spec('msgpack'):
+    RENDERER_CLASSES.append('config.renderers.MessagePackRenderer')
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'user.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
-    )
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        *RENDERER_CLASSES,
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
+# Admin changelists show the planner's row estimate instead of COUNT(*)
+# from this many rows on (PostgreSQL only, see core/admin.py)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 100000
+
+# Keyset pagination of the recipe list (clients may override with ?page_size=)
+RECIPE_PAGE_SIZE = 20
+RECIPE_MAX_PAGE_SIZE = 100
+
+# Recipe facets: lower bounds of the histogram buckets (the last bucket is
+# open ended) and the number of tag/ingredient counts returned
+RECIPE_FACET_PRICE_BUCKETS = [0, 5, 10, 20, 50]
+RECIPE_FACET_TIME_BUCKETS = [0, 15, 30, 60, 120]
+RECIPE_FACET_LIMIT = 50
+
+# Recipes fetched per server-side cursor round trip by the streaming export
+RECIPE_EXPORT_CHUNK_SIZE = 2000
+
+# Per-user cache of the tag/ingredient lists. Entries are keyed by a version
+# counter bumped on every vocabulary change, so the timeout only bounds memory.
+RECIPE_CACHE_ALIAS = 'default'
+RECIPE_CACHE_TIMEOUT = 60 * 60
+
+# Upper bound on create/update/delete entries accepted by one bulk request
+RECIPE_BULK_MAX_OPERATIONS = 1000
+
+# Entries returned by the popular tags/ingredients endpoints (?limit=)
+RECIPE_POPULAR_LIMIT = 10
+RECIPE_POPULAR_MAX_LIMIT = 100
+
+# Authenticated users are cached per process for AUTH_USER_CACHE_TTL seconds,
+# which bounds how long other processes may serve a user changed elsewhere.
+# Set AUTH_USER_CACHE_ALIAS to a shared cache to share entries between processes.
+AUTH_USER_CACHE_TTL = 30
+AUTH_USER_CACHE_SIZE = 10000
+AUTH_USER_CACHE_ALIAS = None
+AUTH_USER_SHARED_CACHE_TIMEOUT = 300
+
+# Login attempts per client IP and per email, as token buckets: "N/period"
+# allows bursts of N attempts refilled evenly over the period. Over-limit
+# attempts get a 429 before any password hashing. Use
+# 'user.throttling.CacheBucketBackend' to share the buckets between workers
+# through LOGIN_THROTTLE_CACHE_ALIAS.
+LOGIN_THROTTLE_RATES = {'ip': '30/min', 'email': '5/min'}
+LOGIN_THROTTLE_BACKEND = 'user.throttling.LocalBucketBackend'
+LOGIN_THROTTLE_CACHE_ALIAS = 'default'
+
+# Revoked refresh tokens: seconds between picking up revocations made by other
+# workers, seconds between full rebuilds of the in-memory filter (dropping
+# expired tokens), and the filter's false positive rate (each one costs a query)
+TOKEN_REVOCATION_RELOAD_INTERVAL = 5
+TOKEN_REVOCATION_REBUILD_INTERVAL = 10 * 60
+TOKEN_REVOCATION_FALSE_POSITIVE_RATE = 0.001
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
@@ -147,6 +236,10 @@ SWAGGER_SETTINGS = {
     }
 }
 
+# Prebuilt OpenAPI schema (``manage.py generate_schema``). When unset or
+# missing, the schema is generated on the first docs request and kept in memory.
+OPENAPI_SCHEMA_FILE = os.environ.get('OPENAPI_SCHEMA_FILE') or None
+
 
 
 
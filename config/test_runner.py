@@ -0,0 +1,21 @@
+"""
+Test runner for the project (settings.TEST_RUNNER).
+
+Replica aliases mirror the primary's test database, but a TestCase may only
+query the databases it declares, so reads routed to a replica would be
+refused. Tests therefore read from the primary; core.tests.test_db_routing
+switches routing back on for itself.
+"""
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class PrimaryReadsTestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.primary_reads = override_settings(DATABASE_REPLICAS=[])
+        self.primary_reads.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.primary_reads.disable()
+        super().teardown_test_environment(**kwargs)
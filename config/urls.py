@@ -1,22 +1,10 @@
 from django.contrib import admin
 from django.urls import path
 from django.http import HttpResponse
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
 
 from django.urls import include
 
-# Swagger/OpenAPI schema view
-schema_view = get_schema_view(
-   openapi.Info(
-      title="My Project API",
-      default_version='v1',
-      description="API documentation for my project",
-   ),
-   public=True,
-   permission_classes=(permissions.AllowAny,),
-)
+from config import metrics, schema
 
 # Root view
 def home(request):
@@ -29,19 +17,25 @@ urlpatterns = [
     # Admin
     path('admin/', admin.site.urls),
 
-    # API Docs (Swagger UI)
-    path('api/doc/',schema_view.with_ui('swagger',cache_timeout=0),name='schema-swagger-ui'),
+    # API Docs (Swagger UI); drf_yasg is imported on the first docs request
+    path('api/doc/', schema.docs_view('swagger'), name='schema-swagger-ui'),
 
     # Redoc UI (optional)
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    path('redoc/', schema.docs_view('redoc'), name='schema-redoc'),
 
-    # API Schema (OpenAPI JSON)
-    path('api/schema/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
+    # API Schema (OpenAPI JSON), generated once and served from memory
+    path('api/schema/', schema.schema_view, name='schema-json'),
 
     # Optional: YAML schema
-    path('api/schema.yaml', schema_view.without_ui(cache_timeout=0), name='schema-yaml'),
+    path('api/schema.yaml', schema.schema_yaml_view, name='schema-yaml'),
 
     path('api/', include('user.urls')),
 
-    path('api/', include('recipe.urls'))
+    path('api/', include('recipe.urls')),
+
+    # Prometheus metrics, for internal networks only
+    path('internal/metrics', metrics.metrics_view, name='metrics'),
+
+    # Native async read endpoints, for ASGI deployments
+    path('api/async/', include('recipe.async_urls')),
 ]
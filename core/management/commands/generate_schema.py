@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from config.schema import generate_schema_json
+
+
+class Command(BaseCommand):
+    help = "Write the OpenAPI schema to OPENAPI_SCHEMA_FILE, so workers load it instead of generating it"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help="File to write (default: OPENAPI_SCHEMA_FILE)")
+
+    def handle(self, *args, **options):
+        path = options['output'] or settings.OPENAPI_SCHEMA_FILE
+        if not path:
+            raise CommandError("Set OPENAPI_SCHEMA_FILE or pass --output")
+        content = generate_schema_json()
+        with open(path, 'wb') as f:
+            f.write(content)
+        self.stdout.write("Wrote %d bytes to %s" % (len(content), path))
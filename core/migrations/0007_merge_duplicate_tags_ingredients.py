@@ -0,0 +1,48 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicates(apps, schema_editor):
+    """
+    Collapse Tag/Ingredient rows sharing (user, name) into the oldest one,
+    moving their recipe links over, so the unique constraint can be added.
+    """
+    Recipe = apps.get_model('core', 'Recipe')
+    for model_name, field_name in (('Tag', 'tags'), ('Ingredient', 'ingredients')):
+        model = apps.get_model('core', model_name)
+        field = Recipe._meta.get_field(field_name)
+        through = field.remote_field.through
+        target = field.m2m_reverse_field_name() + '_id'
+
+        groups = (
+            model.objects.values('user_id', 'name')
+            .annotate(keep=Min('id'), copies=Count('id'))
+            .filter(copies__gt=1)
+        )
+        for group in groups:
+            duplicate_ids = list(
+                model.objects.filter(user_id=group['user_id'], name=group['name'])
+                .exclude(id=group['keep'])
+                .values_list('id', flat=True)
+            )
+            linked = set(
+                through.objects.filter(**{target: group['keep']}).values_list('recipe_id', flat=True)
+            )
+            moved = set(
+                through.objects.filter(**{target + '__in': duplicate_ids}).values_list('recipe_id', flat=True)
+            ) - linked
+            through.objects.bulk_create(
+                [through(recipe_id=recipe_id, **{target: group['keep']}) for recipe_id in moved]
+            )
+            model.objects.filter(id__in=duplicate_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_recipe_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,89 @@
+"""
+Full-text search index for recipe title and description.
+
+PostgreSQL gets a GIN expression index on the weighted search vector; SQLite
+gets an FTS5 table kept in sync by triggers. Note that SQLite drops triggers
+when a later migration rebuilds core_recipe, so such a migration must
+recreate them.
+"""
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    # External-content FTS5 table over core_recipe, kept in sync by triggers
+    """
+    CREATE VIRTUAL TABLE core_recipe_fts USING fts5(
+        title, description, content='core_recipe', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER core_recipe_fts_insert AFTER INSERT ON core_recipe BEGIN
+        INSERT INTO core_recipe_fts (rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER core_recipe_fts_delete AFTER DELETE ON core_recipe BEGIN
+        INSERT INTO core_recipe_fts (core_recipe_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER core_recipe_fts_update AFTER UPDATE OF title, description ON core_recipe BEGIN
+        INSERT INTO core_recipe_fts (core_recipe_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO core_recipe_fts (rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    "INSERT INTO core_recipe_fts (core_recipe_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS core_recipe_fts_update",
+    "DROP TRIGGER IF EXISTS core_recipe_fts_delete",
+    "DROP TRIGGER IF EXISTS core_recipe_fts_insert",
+    "DROP TABLE IF EXISTS core_recipe_fts",
+]
+
+POSTGRES_INDEX = 'recipe_search_vector_idx'
+
+
+def postgres_index():
+    # Must compile to the same expression recipe.search filters on, or the
+    # planner cannot use it.
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    vector = SearchVector('title', weight='A', config='english') + SearchVector(
+        'description', weight='B', config='english'
+    )
+    return GinIndex(vector, name=POSTGRES_INDEX)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.add_index(apps.get_model('core', 'Recipe'), postgres_index())
+    elif vendor == 'sqlite':
+        for statement in SQLITE_FORWARD:
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.remove_index(apps.get_model('core', 'Recipe'), postgres_index())
+    elif vendor == 'sqlite':
+        for statement in SQLITE_BACKWARD:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_recipe_updated_at_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    (tag_id, recipe_id) / (ingredient_id, recipe_id) indexes on the M2M
+    through tables. The unique (recipe_id, X_id) index serves EXISTS probes
+    per recipe; these serve the other direction (all recipes for a tag) as
+    index-only scans for tag/ingredient filters and facet counts.
+    """
+
+    dependencies = [
+        ('core', '0010_recipe_search_index'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX core_recipe_tags_tag_recipe_idx ON core_recipe_tags (tag_id, recipe_id)',
+            'DROP INDEX core_recipe_tags_tag_recipe_idx',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX core_recipe_ingredients_ingredient_recipe_idx '
+            'ON core_recipe_ingredients (ingredient_id, recipe_id)',
+            'DROP INDEX core_recipe_ingredients_ingredient_recipe_idx',
+        ),
+    ]
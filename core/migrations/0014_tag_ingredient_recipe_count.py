@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:31
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_recipes(apps, schema_editor):
+    """Backfill recipe_count from the through tables"""
+    Recipe = apps.get_model('core', 'Recipe')
+    for field_name, target in (('tags', 'tag_id'), ('ingredients', 'ingredient_id')):
+        field = Recipe._meta.get_field(field_name)
+        counts = field.remote_field.through.objects.filter(**{target: OuterRef('pk')}).order_by().values(target)
+        field.related_model.objects.update(
+            recipe_count=Coalesce(Subquery(counts.annotate(n=Count('*')).values('n')), 0)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['user', '-recipe_count', 'id'], name='ingredient_user_popular_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', '-recipe_count', 'id'], name='tag_user_popular_idx'),
+        ),
+        migrations.RunPython(count_recipes, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
+from django.db.models.functions import Lower
 
 class UserManager(BaseUserManager):
     def create_user(self, email, name, password=None, **extra_fields):
@@ -20,6 +22,18 @@ class UserManager(BaseUserManager):
 
         return self.create_user(email, name, password, **extra_fields)
 
+    def get_by_natural_key(self, email):
+        """
+        Case-insensitive lookup used by authenticate(), served by the
+        LOWER(email) index. An exact match wins if the case differs only.
+        """
+        users = list(self.alias(email_lower=Lower('email')).filter(email_lower=email.lower())[:2])
+        if len(users) == 1:
+            return users[0]
+        if not users:
+            raise self.model.DoesNotExist
+        return self.get(email=email)
+
 
 class User(AbstractBaseUser, PermissionsMixin):
     email = models.EmailField(unique=True)
@@ -34,10 +48,28 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     objects = UserManager()
 
+    class Meta:
+        indexes = [
+            models.Index(Lower('email'), name='user_email_lower_idx'),
+        ]
+
     def __str__(self):
         return self.email
 
 
+class RecipeQuerySet(models.QuerySet):
+    def with_related(self):
+        """Load tags and ingredients in one extra query each, whatever the row count"""
+        return self.prefetch_related(
+            models.Prefetch('tags', queryset=Tag.objects.order_by('id')),
+            models.Prefetch('ingredients', queryset=Ingredient.objects.order_by('id')),
+        )
+
+    def touch(self):
+        """Mark recipes as modified, e.g. after writing their tag/ingredient links directly"""
+        return self.update(version=models.F('version') + 1, updated_at=timezone.now())
+
+
 class Recipe(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -51,9 +83,40 @@ class Recipe(models.Model):
     link = models.CharField(max_length=255, blank=True)
     tags = models.ManyToManyField('Tag', related_name='recipes', blank=True)
     ingredients = models.ManyToManyField('Ingredient', related_name='recipes', blank=True)
+    # Bumped on every write, including tag/ingredient changes; used for
+    # ETag/Last-Modified validators and If-Match guarded writes.
+    updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)
+
+    objects = RecipeQuerySet.as_manager()
+
+    class Meta:
+        # Composite (sort key, id) indexes back keyset pagination of the
+        # recipe list; "-id" ordering is served by the primary key.
+        indexes = [
+            models.Index(fields=['price', 'id'], name='recipe_price_id_idx'),
+            models.Index(fields=['time_minutes', 'id'], name='recipe_time_id_idx'),
+        ]
 
     def __str__(self):
-        return self.title        
+        return self.title
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'version', 'updated_at'}
+        super().save(*args, **kwargs)
+
+    @property
+    def etag(self):
+        return recipe_etag(self.pk, self.version)
+
+
+def recipe_etag(pk, version, format='json'):
+    # Each renderer's bytes are a different representation
+    return '"recipe-%s-%s-%s"' % (pk, version, format)
 
 class Tag(models.Model):
     name = models.CharField(max_length=255)
@@ -63,6 +126,18 @@ class Tag(models.Model):
         on_delete=models.CASCADE,
         related_name="tags"
     )
+    # Number of recipes linked to this tag, maintained by recipe.services
+    # and recipe.signals; ``manage.py reconcile_recipe_counts`` repairs drift.
+    recipe_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'name'], name='tag_user_name_unique'),
+        ]
+        indexes = [
+            # The user's most used tags first (the "popular" endpoint)
+            models.Index(fields=['user', '-recipe_count', 'id'], name='tag_user_popular_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -75,14 +150,28 @@ class Ingredient(models.Model):
         on_delete=models.CASCADE,
         related_name="ingredients"
     )
+    # Number of recipes linked to this ingredient, maintained by recipe.services
+    # and recipe.signals; ``manage.py reconcile_recipe_counts`` repairs drift.
+    recipe_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'name'], name='ingredient_user_name_unique'),
+        ]
+        indexes = [
+            # The user's most used ingredients first (the "popular" endpoint)
+            models.Index(fields=['user', '-recipe_count', 'id'], name='ingredient_user_popular_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class RevokedToken(models.Model):
+    """A refresh token revoked before its expiry, by its ``jti`` claim"""
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
 
-
-
-
-
-        
+    def __str__(self):
+        return self.jti
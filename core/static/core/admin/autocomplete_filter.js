@@ -0,0 +1,16 @@
+'use strict';
+{
+    const $ = django.jQuery;
+
+    // Reload the changelist filtered by the object picked in an autocomplete filter
+    $(function() {
+        $('.autocomplete-filter select').on('change', function() {
+            const filter = this.closest('.autocomplete-filter');
+            const params = new URLSearchParams(filter.dataset.queryString);
+            if (this.value) {
+                params.set(filter.dataset.lookup, this.value);
+            }
+            window.location.search = params.toString();
+        });
+    });
+}
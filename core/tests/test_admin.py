@@ -0,0 +1,112 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from core.admin import EstimatedCountPaginator
+from core.models import User, Recipe, Tag, Ingredient
+
+RECIPE_CHANGELIST_URL = reverse('admin:core_recipe_changelist')
+
+
+class AdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(email='admin@example.com', name='Admin', password='Testpass123')
+        self.client.force_login(self.admin)
+        self.users = [
+            User.objects.create_user(email='cook%d@example.com' % i, name='Cook %d' % i, password='Testpass123')
+            for i in range(3)
+        ]
+        for i, user in enumerate(self.users):
+            Recipe.objects.create(user=user, title='Recipe %d' % i, time_minutes=5, price='2.00')
+            Tag.objects.create(user=user, name='Tag %d' % i, recipe_count=i)
+            Ingredient.objects.create(user=user, name='Salt', recipe_count=i)
+
+    def test_recipe_changelist_constant_queries(self):
+        """Test users are joined in, not fetched per row or listed in the sidebar"""
+        self.client.get(RECIPE_CHANGELIST_URL)  # warm up the session and permission caches
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(RECIPE_CHANGELIST_URL)
+        for i in range(3, 20):
+            user = User.objects.create_user(email='more%d@example.com' % i, name='More', password='Testpass123')
+            Recipe.objects.create(user=user, title='Recipe %d' % i, time_minutes=5, price='2.00')
+        with CaptureQueriesContext(connection) as many:
+            res = self.client.get(RECIPE_CHANGELIST_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(many), len(few))
+        self.assertContains(res, 'cook0@example.com')  # in the user column
+        self.assertContains(res, 'admin-autocomplete')
+        self.assertNotContains(res, '<option value="%d"' % self.users[0].pk)
+
+    def test_user_filter_shows_selection(self):
+        user = self.users[1]
+        res = self.client.get(RECIPE_CHANGELIST_URL, {'user__id__exact': user.pk})
+        self.assertEqual(res.context['cl'].result_count, 1)
+        self.assertContains(res, '<option value="%d" selected>%s</option>' % (user.pk, user), html=True)
+        self.assertContains(res, 'core/admin/autocomplete_filter.js')
+
+    def test_time_range_filter(self):
+        """Test the fixed ranges filter without listing the table's distinct times"""
+        Recipe.objects.create(user=self.users[0], title='Roast', time_minutes=150, price='9.00')
+        Recipe.objects.create(user=self.users[0], title='Stew', time_minutes=30, price='4.00')
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPE_CHANGELIST_URL)
+        self.assertFalse([query for query in queries if 'DISTINCT' in query['sql']])
+        self.assertContains(res, '?time_range=120-')
+        self.assertContains(res, '15–30')
+
+        for value, titles in (('0-15', ['Recipe 2', 'Recipe 1', 'Recipe 0']), ('30-60', ['Stew']), ('120-', ['Roast'])):
+            res = self.client.get(RECIPE_CHANGELIST_URL, {'time_range': value})
+            self.assertEqual([recipe.title for recipe in res.context['cl'].result_list], titles)
+
+    def test_time_range_filter_rejects_unknown_values(self):
+        """Test malformed or unlisted ranges get the changelist's error redirect, not a 500"""
+        for value in ('abc', '5-x', '7-9'):
+            res = self.client.get(RECIPE_CHANGELIST_URL, {'time_range': value})
+            self.assertRedirects(res, RECIPE_CHANGELIST_URL + '?e=1', fetch_redirect_response=False)
+
+    def test_autocomplete_search(self):
+        res = self.client.get(reverse('admin:autocomplete'), {
+            'app_label': 'core', 'model_name': 'recipe', 'field_name': 'user', 'term': 'cook2',
+        })
+        self.assertEqual([r['id'] for r in res.json()['results']], [str(self.users[2].pk)])
+
+    def test_tag_and_ingredient_admin(self):
+        for name in ('tag', 'ingredient'):
+            res = self.client.get(reverse('admin:core_%s_changelist' % name), {'q': 'a'})
+            self.assertEqual(res.status_code, 200)
+            self.assertContains(res, 'cook1@example.com')
+        tag = Tag.objects.get(name='Tag 2')
+        res = self.client.get(reverse('admin:core_tag_change', args=[tag.pk]))
+        self.assertContains(res, 'admin-autocomplete')
+
+    def test_delete_recipe_releases_counts(self):
+        recipe = Recipe.objects.get(title='Recipe 2')
+        tag = Tag.objects.get(name='Tag 2')
+        Tag.objects.filter(pk=tag.pk).update(recipe_count=0)
+        recipe.tags.add(tag)
+        self.client.post(reverse('admin:core_recipe_delete', args=[recipe.pk]), {'post': 'yes'})
+        tag.refresh_from_db()
+        self.assertEqual(tag.recipe_count, 0)
+        self.assertFalse(Recipe.objects.filter(pk=recipe.pk).exists())
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(email='pages@example.com', name='Pages', password='Testpass123')
+        Tag.objects.bulk_create(Tag(user=user, name='Tag %d' % i) for i in range(5))
+        self.queryset = Tag.objects.order_by('id')
+
+    def test_exact_without_estimate(self):
+        self.assertEqual(EstimatedCountPaginator(self.queryset, 2).count, 5)
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1000)
+    def test_estimate_above_threshold(self):
+        with mock.patch('core.admin.estimated_count', return_value=2500000):
+            paginator = EstimatedCountPaginator(self.queryset, 100)
+            with self.assertNumQueries(0):
+                self.assertEqual(paginator.count, 2500000)
+        with mock.patch('core.admin.estimated_count', return_value=10):
+            self.assertEqual(EstimatedCountPaginator(self.queryset, 100).count, 5)
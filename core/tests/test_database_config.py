@@ -0,0 +1,64 @@
+import importlib.util
+import os
+import sys
+from unittest import mock, skipUnless
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+from config.database import database_from_env
+
+
+class DatabaseFromEnvTests(SimpleTestCase):
+    def test_compose_variables(self):
+        """Test the variables docker-compose passes are used"""
+        env = {'DB_NAME': 'recipes', 'DB_USER': 'app', 'DB_PASSWORD': 'secret', 'DB_HOST': 'db', 'DB_PORT': '6432'}
+        with mock.patch.dict(os.environ, env, clear=True):
+            config = database_from_env()
+        self.assertEqual(
+            {key: config[key] for key in ('NAME', 'USER', 'PASSWORD', 'HOST', 'PORT')},
+            {'NAME': 'recipes', 'USER': 'app', 'PASSWORD': 'secret', 'HOST': 'db', 'PORT': '6432'},
+        )
+
+    def test_persistent_connections_by_default(self):
+        """Test connections are reused and health-checked unless configured otherwise"""
+        with mock.patch.dict(os.environ, {}, clear=True):
+            config = database_from_env()
+        self.assertEqual(config['CONN_MAX_AGE'], 60)
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+        self.assertEqual(config['OPTIONS'], {'connect_timeout': 5})
+
+        env = {'DB_CONN_MAX_AGE': '0', 'DB_CONN_HEALTH_CHECKS': 'false'}
+        with mock.patch.dict(os.environ, env, clear=True):
+            config = database_from_env()
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertFalse(config['CONN_HEALTH_CHECKS'])
+
+    def test_sqlite(self):
+        """Test a SQLite stand-in gets no postgres-only options"""
+        env = {'DB_ENGINE': 'django.db.backends.sqlite3', 'DB_NAME': ':memory:'}
+        with mock.patch.dict(os.environ, env, clear=True):
+            config = database_from_env()
+        self.assertEqual(config['NAME'], ':memory:')
+        self.assertEqual(config['OPTIONS'], {})
+
+    def test_prefix_and_defaults(self):
+        """Test other aliases read their own prefix"""
+        with mock.patch.dict(os.environ, {'DB_REPLICA_HOST': 'replica'}, clear=True):
+            config = database_from_env('DB_REPLICA_', NAME='recipes')
+        self.assertEqual((config['HOST'], config['NAME']), ('replica', 'recipes'))
+
+    @skipUnless(importlib.util.find_spec('psycopg_pool'), 'psycopg_pool is not installed')
+    def test_pool(self):
+        """Test DB_POOL switches to a sized psycopg pool"""
+        env = {'DB_POOL': '1', 'DB_POOL_MAX_SIZE': '8'}
+        with mock.patch.dict(os.environ, env, clear=True):
+            config = database_from_env()
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertEqual(config['OPTIONS']['pool']['max_size'], 8)
+
+    def test_pool_without_psycopg3(self):
+        """Test DB_POOL fails at settings load when only psycopg2 is installed"""
+        with mock.patch.dict(os.environ, {'DB_POOL': '1'}, clear=True):
+            with mock.patch.dict(sys.modules, {'psycopg': None, 'psycopg_pool': None}):
+                with self.assertRaisesMessage(ImproperlyConfigured, 'psycopg[binary,pool]'):
+                    database_from_env()
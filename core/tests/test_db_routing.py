@@ -0,0 +1,158 @@
+from contextlib import ExitStack
+from unittest import skipUnless
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+from config.db_routing import ReplicaRoutingMiddleware, keep_read_alias
+from core.models import User, Recipe
+
+
+def bearer(user_id):
+    token = AccessToken()
+    token['user_id'] = str(user_id)
+    return 'Bearer %s' % token
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class ReplicaRoutingMiddlewareTests(SimpleTestCase):
+    """Routing decisions, without real replica connections"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def call(self, method, user_id=None, status=200):
+        """Run a request through the middleware; return the read alias its view saw"""
+        seen = {}
+
+        def view(request):
+            seen['read'] = router.db_for_read(Recipe)
+            seen['write'] = router.db_for_write(Recipe)
+            return HttpResponse(status=status)
+
+        headers = {'HTTP_AUTHORIZATION': bearer(user_id)} if user_id else {}
+        ReplicaRoutingMiddleware(view)(getattr(self.factory, method)('/api/recipe/', **headers))
+        self.assertEqual(seen['write'], 'default')
+        return seen['read']
+
+    def test_reads_go_to_replicas(self):
+        self.assertIn(self.call('get'), settings.DATABASE_REPLICAS)
+        self.assertIn(self.call('get', user_id=1), settings.DATABASE_REPLICAS)
+
+    def test_writes_use_primary(self):
+        self.assertEqual(self.call('post', user_id=1), 'default')
+
+    def test_reads_stick_to_primary_after_write(self):
+        """Test a writer reads from the primary while other users keep using replicas"""
+        self.call('post', user_id=1)
+        self.assertEqual(self.call('get', user_id=1), 'default')
+        self.assertIn(self.call('get', user_id=2), settings.DATABASE_REPLICAS)
+
+    def test_failed_write_not_sticky(self):
+        self.call('patch', user_id=1, status=400)
+        self.assertIn(self.call('get', user_id=1), settings.DATABASE_REPLICAS)
+
+    @override_settings(READ_YOUR_WRITES_WINDOW=0)
+    def test_window_expires(self):
+        self.call('post', user_id=1)
+        self.assertIn(self.call('get', user_id=1), settings.DATABASE_REPLICAS)
+
+    def test_async_requests(self):
+        """Test async views get the same routing"""
+        seen = []
+
+        async def view(request):
+            seen.append(router.db_for_read(Recipe))
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(view)
+        auth = {'HTTP_AUTHORIZATION': bearer(1)}
+        async_to_sync(middleware)(self.factory.get('/api/async/recipe/', **auth))
+        async_to_sync(middleware)(self.factory.post('/api/async/recipe/', **auth))
+        async_to_sync(middleware)(self.factory.get('/api/async/recipe/', **auth))
+        self.assertIn(seen[0], settings.DATABASE_REPLICAS)
+        self.assertEqual(seen[1:], ['default', 'default'])
+
+    def test_streamed_body_keeps_alias(self):
+        """Test a streaming body read after the middleware returned uses the request's alias"""
+        seen = []
+
+        def rows():
+            for _ in range(3):
+                seen.append(router.db_for_read(Recipe))
+                yield b''
+
+        def view(request):
+            return StreamingHttpResponse(keep_read_alias(rows()))
+
+        auth = {'HTTP_AUTHORIZATION': bearer(1)}
+        middleware = ReplicaRoutingMiddleware(view)
+        b''.join(middleware(self.factory.get('/api/recipe/export/', **auth)))
+        self.assertEqual(len(set(seen)), 1)
+        self.assertIn(seen[0], settings.DATABASE_REPLICAS)
+
+        seen.clear()
+        middleware(self.factory.post('/api/recipe/', **auth))
+        b''.join(middleware(self.factory.get('/api/recipe/export/', **auth)))
+        self.assertEqual(seen, ['default'] * 3)  # read-your-writes after the POST
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        self.assertEqual(self.call('get'), 'default')
+
+
+REPLICA_ALIASES = [alias for alias in settings.DATABASES if alias != 'default']
+
+
+@skipUnless(REPLICA_ALIASES, 'no replica configured (set DB_REPLICAS)')
+@override_settings(DATABASE_REPLICAS=REPLICA_ALIASES)
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    End to end against real replica aliases, e.g. with SQLite:
+
+        DB_ENGINE=django.db.backends.sqlite3 DB_NAME=primary.sqlite3 \\
+        DB_REPLICAS=replica.sqlite3 python manage.py test core.tests.test_db_routing
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='replica@example.com', name='Replica', password='Testpass123')
+        Recipe.objects.create(user=self.user, title='Soup', time_minutes=5, price='2.00')
+        self.headers = {'Authorization': 'Bearer %s' % AccessToken.for_user(self.user)}
+
+    def list_queries(self, name='recipe-list'):
+        """Number of queries one GET request, body included, runs on each alias"""
+        with ExitStack() as stack:
+            contexts = {alias: stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections}
+            res = self.client.get(reverse(name), headers=self.headers)
+            if res.streaming:
+                b''.join(res.streaming_content)
+        self.assertEqual(res.status_code, 200)
+        return {alias: len(context) for alias, context in contexts.items()}
+
+    def test_streamed_export(self):
+        """Test the export body, read after the middleware returned, stays on the replica"""
+        queries = self.list_queries('recipe-export')
+        self.assertEqual(queries['default'], 0)
+        self.assertGreater(sum(queries.values()), 0)
+
+    def test_read_your_writes(self):
+        queries = self.list_queries()
+        self.assertEqual(queries['default'], 0)
+        self.assertGreater(sum(queries.values()), 0)
+
+        res = self.client.post(
+            reverse('recipe-create'),
+            {'title': 'Stew', 'time_minutes': 30, 'price': '4.00'},
+            headers=self.headers,
+        )
+        self.assertEqual(res.status_code, 201)
+        self.assertGreater(self.list_queries()['default'], 0)
@@ -0,0 +1,105 @@
+import re
+
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from config.metrics import Histogram, registry
+from core.models import User, Recipe
+
+RECIPE_LIST_URL = reverse('recipe-list')
+METRICS_URL = reverse('metrics')
+
+
+def sample(text, name, **labels):
+    """Value of one sample in a Prometheus exposition"""
+    wanted = {'%s="%s"' % item for item in labels.items()}
+    for line in text.splitlines():
+        match = re.match(r'(\w+)\{(.*)\} (\S+)$', line)
+        if match and match.group(1) == name and wanted <= set(match.group(2).split(',')):
+            return float(match.group(3))
+    return None
+
+
+class MetricsTests(APITestCase):
+    def setUp(self):
+        registry.clear()
+        self.user = User.objects.create_user(email='metrics@example.com', name='Metrics', password='Testpass123')
+        Recipe.objects.create(user=self.user, title='Soup', time_minutes=5, price='2.00')
+        self.client.force_authenticate(self.user)
+
+    def scrape(self):
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return res.content.decode()
+
+    def test_server_timing(self):
+        res = self.client.get(RECIPE_LIST_URL)
+        match = re.fullmatch(
+            r'app;dur=[\d.]+, db;dur=[\d.]+;desc="(\d+) queries", render;dur=[\d.]+', res['Server-Timing'],
+        )
+        self.assertIsNotNone(match)
+        self.assertGreater(int(match.group(1)), 0)
+
+    @override_settings(METRICS_SERVER_TIMING=False)
+    def test_server_timing_disabled(self):
+        self.assertNotIn('Server-Timing', self.client.get(RECIPE_LIST_URL))
+
+    def test_metrics_per_view(self):
+        """Test requests are aggregated by URL name, method and status"""
+        for _ in range(3):
+            list_response = self.client.get(RECIPE_LIST_URL)
+        self.client.post(reverse('recipe-create'), {'title': ''})
+        self.client.get('/no/such/page/')
+        text = self.scrape()
+
+        view = {'view': 'recipe-list', 'method': 'GET'}
+        self.assertEqual(sample(text, 'http_request_duration_seconds_count', **view), 3)
+        self.assertEqual(sample(text, 'http_request_duration_seconds_bucket', le='+Inf', **view), 3)
+        self.assertEqual(sample(text, 'http_requests_total', status='200', **view), 3)
+        self.assertEqual(sample(text, 'http_response_size_bytes_total', **view), 3 * len(list_response.content))
+        self.assertGreater(sample(text, 'http_request_db_queries_sum', **view), 0)
+        self.assertGreater(sample(text, 'http_request_db_seconds_total', **view), 0)
+        self.assertGreater(sample(text, 'http_request_render_seconds_total', **view), 0)
+        self.assertEqual(
+            sample(text, 'http_requests_total', view='recipe-create', method='POST', status='400'), 1,
+        )
+        self.assertEqual(sample(text, 'http_requests_total', view='unmatched', status='404'), 1)
+
+    def test_async_views(self):
+        token = AccessToken.for_user(self.user)
+        res = async_to_sync(self.async_client.get)(
+            reverse('async-recipe-list'), headers={'Authorization': 'Bearer %s' % token},
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('Server-Timing', res)
+
+        text = self.scrape()
+        view = {'view': 'async-recipe-list', 'method': 'GET'}
+        self.assertEqual(sample(text, 'http_requests_total', status='200', **view), 1)
+        self.assertGreater(sample(text, 'http_request_render_seconds_total', **view), 0)
+
+    def test_unknown_methods_grouped(self):
+        self.client.generic('BREW', RECIPE_LIST_URL)
+        self.assertEqual(sample(self.scrape(), 'http_requests_total', view='recipe-list', method='other'), 1)
+
+    def test_label_values_escaped(self):
+        registry.record('a"b\\c', 'GET', 200, 0.01, type('Stats', (), {'queries': 0, 'db_time': 0, 'render_time': 0}), 0)
+        self.assertIn(r'view="a\"b\\c"', self.scrape())
+
+    @override_settings(METRICS_ALLOWED_NETWORKS=['10.0.0.0/8'])
+    def test_internal_only(self):
+        self.assertEqual(self.client.get(METRICS_URL).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(METRICS_URL, REMOTE_ADDR='10.1.2.3').status_code, status.HTTP_200_OK)
+
+
+class HistogramTests(SimpleTestCase):
+    def test_cumulative_buckets(self):
+        histogram = Histogram((1, 5))
+        for value in (0, 1, 2, 7):
+            histogram.observe(value)
+        self.assertEqual(list(histogram.samples()), [(1, 2), (5, 3), ('+Inf', 4)])
+        self.assertEqual(histogram.sum, 10)
@@ -0,0 +1,44 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class MergeDuplicateNamesMigrationTests(TransactionTestCase):
+    """Test duplicates are merged before the (user, name) constraint is added"""
+
+    migrate_from = [('core', '0006_recipe_pagination_indexes')]
+    migrate_to = [('core', '0008_tag_ingredient_user_name_unique')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        apps = executor.loader.project_state(self.migrate_from).apps
+        User = apps.get_model('core', 'User')
+        Tag = apps.get_model('core', 'Tag')
+        Recipe = apps.get_model('core', 'Recipe')
+
+        user = User.objects.create(email='dupes@example.com', name='Dupes')
+        self.keep = Tag.objects.create(user=user, name='Vegan')
+        copy = Tag.objects.create(user=user, name='Vegan')
+        first = Recipe.objects.create(user=user, title='A', time_minutes=1, price='1.00')
+        second = Recipe.objects.create(user=user, title='B', time_minutes=1, price='1.00')
+        first.tags.add(self.keep, copy)
+        second.tags.add(copy)
+        self.recipe_ids = {first.id, second.id}
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.migrate_to)
+        self.apps = executor.loader.project_state(self.migrate_to).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_duplicates_merged_into_oldest(self):
+        Tag = self.apps.get_model('core', 'Tag')
+        Recipe = self.apps.get_model('core', 'Recipe')
+
+        self.assertEqual(list(Tag.objects.values_list('id', flat=True)), [self.keep.id])
+        linked = Recipe.objects.filter(tags__id=self.keep.id).values_list('id', flat=True)
+        self.assertEqual(set(linked), self.recipe_ids)
@@ -1,5 +1,6 @@
 from django.test import TestCase
-from core.models import User
+from django.db import IntegrityError
+from core.models import User, Tag
 
 class UserModelTests(TestCase):
     
@@ -35,3 +36,20 @@ class UserModelTests(TestCase):
         """Test the __str__ method returns email"""
         user = User.objects.create_user(email='user@example.com', name='User Name', password='Testpass123')
         self.assertEqual(str(user), 'user@example.com')
+
+    def test_get_by_natural_key_ignores_case(self):
+        """Test the login lookup matches emails case-insensitively"""
+        user = User.objects.create_user(email='Mixed.Case@example.com', name='Mixed', password='Testpass123')
+        self.assertEqual(User.objects.get_by_natural_key('mixed.case@EXAMPLE.com'), user)
+        with self.assertRaises(User.DoesNotExist):
+            User.objects.get_by_natural_key('missing@example.com')
+
+    def test_tag_name_unique_per_user(self):
+        """Test a user cannot have two tags with the same name"""
+        user = User.objects.create_user(email='tags@example.com', name='Tags', password='Testpass123')
+        other = User.objects.create_user(email='other@example.com', name='Other', password='Testpass123')
+        Tag.objects.create(user=user, name='Vegan')
+        Tag.objects.create(user=other, name='Vegan')
+
+        with self.assertRaises(IntegrityError):
+            Tag.objects.create(user=user, name='Vegan')
@@ -0,0 +1,98 @@
+import datetime
+import importlib.util
+import uuid
+from decimal import Decimal
+from unittest import mock, skipIf, skipUnless
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from rest_framework.utils.serializer_helpers import ReturnDict
+from rest_framework_simplejwt.tokens import AccessToken
+from config.renderers import FastJSONRenderer, MessagePackRenderer
+from core.models import User, Recipe
+
+HAS_MSGPACK = importlib.util.find_spec('msgpack') is not None
+RECIPE_LIST_URL = reverse('recipe-list')
+
+PAYLOAD = {
+    'price': Decimal('12.50'),
+    'created': datetime.datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+    'naive': datetime.datetime(2024, 5, 1, 12, 30),
+    'day': datetime.date(2024, 5, 1),
+    'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'label': gettext_lazy('Recipe'),
+    'text': 'Crème brûlée\u2028line\u2029"quoted"',
+    'nested': ReturnDict({'tags': [{'id': 1, 'name': 'Vegan'}], 'empty': []}, serializer=None),
+    1: ('tuple', None, True, 1.5),
+}
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_identical_to_json_renderer(self):
+        self.assertEqual(FastJSONRenderer().render(PAYLOAD), JSONRenderer().render(PAYLOAD))
+
+    def test_indent_and_empty(self):
+        media_type = 'application/json; indent=4'
+        self.assertEqual(
+            FastJSONRenderer().render(PAYLOAD, media_type), JSONRenderer().render(PAYLOAD, media_type),
+        )
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_without_orjson(self):
+        """Test the stdlib encoder takes over when orjson is not installed"""
+        with mock.patch('config.renderers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(PAYLOAD), JSONRenderer().render(PAYLOAD))
+
+
+class RendererNegotiationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='render@example.com', name='Render', password='Testpass123')
+        Recipe.objects.create(user=self.user, title='Soup', time_minutes=5, price='2.00')
+        self.client.force_authenticate(self.user)
+
+    def test_json_by_default(self):
+        res = self.client.get(RECIPE_LIST_URL)
+        self.assertEqual(res['Content-Type'], 'application/json')
+        self.assertEqual(res.content, JSONRenderer().render(res.data))
+        self.assertIn('Accept', res['Vary'])
+
+    @skipIf(HAS_MSGPACK, 'msgpack is installed')
+    def test_msgpack_not_offered_without_library(self):
+        res = self.client.get(RECIPE_LIST_URL, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(res.status_code, status.HTTP_406_NOT_ACCEPTABLE)
+
+    @skipUnless(HAS_MSGPACK, 'msgpack is not installed')
+    def test_msgpack(self):
+        import msgpack
+
+        res = self.client.get(RECIPE_LIST_URL, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        data = msgpack.unpackb(res.content)
+        self.assertEqual(data['results'][0]['price'], '2.00')
+
+        auth = {'Authorization': 'Bearer %s' % AccessToken.for_user(self.user)}
+        res = self.client.get(reverse('async-recipe-list'), headers={**auth, 'Accept': 'application/msgpack'})
+        self.assertEqual(msgpack.unpackb(res.content)['results'], data['results'])
+
+    @skipUnless(HAS_MSGPACK, 'msgpack is not installed')
+    def test_msgpack_etag(self):
+        """Test a JSON ETag gets the MessagePack body, not a 304"""
+        recipe = Recipe.objects.get()
+        auth = {'Authorization': 'Bearer %s' % AccessToken.for_user(self.user)}
+        for url in (reverse('recipe-detail', args=[recipe.id]), reverse('async-recipe-detail', args=[recipe.id])):
+            etag = self.client.get(url, headers=auth)['ETag']
+            res = self.client.get(url, headers={**auth, 'Accept': 'application/msgpack', 'If-None-Match': etag})
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res['Content-Type'], 'application/msgpack')
+            self.assertNotEqual(res['ETag'], etag)
+
+    @skipUnless(HAS_MSGPACK, 'msgpack is not installed')
+    def test_msgpack_decimal(self):
+        import msgpack
+
+        content = MessagePackRenderer().render({'price': Decimal('2.50'), 'name': 'Soup'})
+        self.assertEqual(msgpack.unpackb(content), {'price': 2.5, 'name': 'Soup'})
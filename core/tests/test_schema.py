@@ -0,0 +1,82 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from config.schema import generate_schema_json, schema_document
+
+
+class SchemaTests(SimpleTestCase):
+    def setUp(self):
+        schema_document.cache_clear()
+        self.addCleanup(schema_document.cache_clear)
+
+    def test_schema_json(self):
+        res = self.client.get(reverse('schema-json'))
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['Content-Type'], 'application/openapi+json')
+        self.assertIn('/recipe/', json.loads(res.content)['paths'])
+        self.assertTrue(res['ETag'])
+        self.assertIn('no-cache', res['Cache-Control'])
+
+    def test_schema_yaml(self):
+        res = self.client.get(reverse('schema-yaml'))
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['Content-Type'], 'application/yaml')
+        self.assertIn(b'  /recipe/:', res.content)
+
+    def test_not_modified(self):
+        etag = self.client.get(reverse('schema-json'))['ETag']
+        res = self.client.get(reverse('schema-json'), headers={'If-None-Match': etag})
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.content, b'')
+        self.assertEqual(res['ETag'], etag)
+
+    def test_generated_once(self):
+        with patch('config.schema.generate_schema_json', wraps=generate_schema_json) as generate:
+            for _ in range(3):
+                self.client.get(reverse('schema-json'))
+                self.client.get(reverse('schema-yaml'))
+        self.assertEqual(generate.call_count, 1)
+
+    def test_docs_pages(self):
+        """Test the UI pages render and their own schema fetch is served from the cache"""
+        for name in ('schema-swagger-ui', 'schema-redoc'):
+            res = self.client.get(reverse(name))
+            self.assertEqual(res.status_code, 200)
+            self.assertIn(b'My Project API', res.content)
+
+            res = self.client.get(reverse(name), {'format': 'openapi'})
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(res.content, schema_document().get('json'))
+
+    def test_prebuilt_file(self):
+        """Test generate_schema writes a file that is served as is"""
+        path = os.path.join(tempfile.mkdtemp(), 'openapi.json')
+        call_command('generate_schema', output=path, stdout=StringIO())
+        with open(path, 'rb') as f:
+            self.assertIn('/recipe/', json.loads(f.read())['paths'])
+
+        with open(path, 'wb') as f:
+            f.write(b'{"swagger": "2.0", "paths": {}}')
+        with override_settings(OPENAPI_SCHEMA_FILE=path):
+            res = self.client.get(reverse('schema-json'))
+        self.assertEqual(res.content, b'{"swagger": "2.0", "paths": {}}')
+
+    def test_docs_libraries_not_loaded_at_startup(self):
+        code = (
+            "import sys, django; django.setup(); from django.urls import resolve; resolve('/api/recipe/'); "
+            "print(sorted(m for m in ('drf_yasg.views', 'drf_yasg.generators', 'drf_yasg.codecs') if m in sys.modules))"
+        )
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'))
+        output = subprocess.run(
+            [sys.executable, '-c', code], env=env, cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout
+        self.assertEqual(output.strip(), '[]')
@@ -0,0 +1,10 @@
+from django.urls import path
+from . import async_views
+
+# Mounted under api/async/, mirroring the sync routes in recipe/urls.py
+urlpatterns = [
+    path('recipe/', async_views.recipe_list, name='async-recipe-list'),
+    path('recipe/<int:id>/', async_views.recipe_detail, name='async-recipe-detail'),
+    path('tags/', async_views.tag_list, name='async-tag-list'),
+    path('ingredients/', async_views.ingredient_list, name='async-ingredient-list'),
+]
@@ -0,0 +1,155 @@
+"""
+Native async versions of the read endpoints, for deployments under ASGI.
+
+These are plain Django async views rather than APIViews: DRF runs every
+APIView synchronously, so under ASGI each request would hold a worker thread
+for its whole lifetime. Here authentication and every query go through the
+async ORM. Responses are byte-for-byte those of the sync endpoints in
+``recipe.views``, with the same query counts.
+"""
+from functools import wraps
+
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_GET
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotAuthenticated
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+from config.metrics import rendering
+from core.models import Recipe, Tag, Ingredient
+from user.authentication import AsyncJWTAuthentication
+from .cache import acached_user_data, avocabulary_version, etag_matches, response_etag
+from .conditional import precondition_status, validator_headers
+from .filters import filter_recipes
+from .pagination import KeysetCursorPagination, SearchCursorPagination
+from .rendering import arender_recipes, fieldset, recipe_values
+from .search import search_recipes
+
+# The sync views' renderers, minus the browsable API (these views have no HTML page)
+renderers = [cls() for cls in api_settings.DEFAULT_RENDERER_CLASSES if cls.format != 'api']
+negotiation = DefaultContentNegotiation()
+authentication = AsyncJWTAuthentication()
+
+
+def json_response(request, data, status=status.HTTP_200_OK, headers=None):
+    """Render ``data`` with the renderer negotiated for ``request`` (the first one before that)"""
+    renderer = getattr(request, 'accepted_renderer', renderers[0])
+    with rendering():
+        content = renderer.render(data, getattr(request, 'accepted_media_type', None))
+    response = HttpResponse(
+        content,
+        status=status,
+        headers=headers,
+        content_type=renderer.media_type,
+    )
+    if len(renderers) > 1:
+        patch_vary_headers(response, ['Accept'])
+    return response
+
+
+def error_response(request, exc):
+    """Render an APIException the way DRF's exception handler does"""
+    response = exception_handler(exc, {})
+    headers = {k: v for k, v in response.items() if k != 'Content-Type'}
+    if response.status_code == status.HTTP_401_UNAUTHORIZED:
+        headers['WWW-Authenticate'] = authentication.authenticate_header(None)
+    return json_response(request, response.data, response.status_code, headers)
+
+
+def async_api_view(view):
+    """
+    GET-only async view that requires a valid access token.
+
+    Picks the renderer from the Accept header like APIView does, sets
+    ``request.user`` and turns APIExceptions raised by the view into
+    DRF-style error responses.
+    """
+    @require_GET
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            request.accepted_renderer, request.accepted_media_type = negotiation.select_renderer(
+                Request(request), renderers,
+            )
+            result = await authentication.aauthenticate(request)
+            if result is None:
+                raise NotAuthenticated()
+            request.user, request.auth = result
+            return await view(request, *args, **kwargs)
+        except APIException as exc:
+            return error_response(request, exc)
+    return wrapper
+
+
+@async_api_view
+async def recipe_list(request):
+    """
+    Async RecipeListAPIView: the same search, filters and cursor pagination.
+    """
+    # Wrapped for query_params only; DRF authentication is never triggered
+    drf_request = Request(request)
+    query_params = drf_request.query_params
+    fields = fieldset(query_params)
+    recipes = recipe_values(fields=fields)
+
+    query = query_params.get("q", "").strip()
+    if query:
+        recipes = search_recipes(recipes, query)
+    recipes = filter_recipes(recipes, query_params)
+
+    paginator = (SearchCursorPagination if query else KeysetCursorPagination)()
+    page = paginator.page_queryset(recipes, drf_request)
+    rows = paginator.finish_page([row async for row in page])
+    return json_response(request, paginator.get_paginated_data(await arender_recipes(rows, fields)))
+
+
+@async_api_view
+async def recipe_detail(request, id):
+    """
+    Async RecipeDetailAPIView, with If-None-Match / If-Modified-Since.
+    """
+    fields = fieldset(request.GET)
+    try:
+        recipe = await Recipe.objects.values(*fields.columns, 'version', 'updated_at').aget(id=id)
+    except Recipe.DoesNotExist:
+        return json_response(request, {"error": "Recipe not found"}, status.HTTP_404_NOT_FOUND)
+
+    headers = validator_headers(request, recipe['id'], recipe['version'], recipe['updated_at'])
+    result = precondition_status(request, recipe['id'], recipe['version'], recipe['updated_at'])
+    if result == status.HTTP_304_NOT_MODIFIED:
+        return HttpResponse(status=result, headers=headers)
+    if result is not None:
+        return json_response(request, {"error": "Recipe has been modified"}, result, headers)
+
+    data = await arender_recipes([recipe], fields)
+    return json_response(request, data[0], headers=headers)
+
+
+async def vocabulary_response(request, name, queryset):
+    """Cached, ETag'd list of the user's tags or ingredients"""
+    user_id = request.user.pk
+    version = await avocabulary_version(user_id)
+    etag = response_etag(name, user_id, version, request.accepted_renderer.format)
+    if etag_matches(request, etag):
+        return HttpResponse(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+    async def build():
+        return [row async for row in queryset.filter(user_id=user_id).order_by('name').values('id', 'name')]
+
+    data = await acached_user_data(name, user_id, version, build)
+    return json_response(request, data, headers={'ETag': etag})
+
+
+@async_api_view
+async def tag_list(request):
+    """Async TagListAPIView; shares its cache entries"""
+    return await vocabulary_response(request, 'tags', Tag.objects.all())
+
+
+@async_api_view
+async def ingredient_list(request):
+    """Async IngredientListAPIView; shares its cache entries"""
+    return await vocabulary_response(request, 'ingredients', Ingredient.objects.all())
@@ -0,0 +1,97 @@
+"""
+Per-user response cache for the tag and ingredient lists.
+
+Cached bodies are keyed by a per-user version counter. Any write that can
+change a user's vocabulary (tags, ingredients, recipes and their links) bumps
+the counter once the transaction commits, which orphans every cached entry of
+that user at once; no key enumeration is needed.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_KEY = 'recipe:vocabulary-version:%s'
+RESPONSE_KEY = 'recipe:%s:%s:%s'
+
+
+def get_cache():
+    return caches[settings.RECIPE_CACHE_ALIAS]
+
+
+def vocabulary_version(user_id):
+    """Current version of the user's vocabulary"""
+    cache = get_cache()
+    version = cache.get(VERSION_KEY % user_id)
+    if version is None:
+        # Seed from the clock so an evicted counter never restarts at a value
+        # that older cached responses were stored under.
+        cache.add(VERSION_KEY % user_id, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY % user_id)
+    return version
+
+
+def bump_vocabulary_version(user_id):
+    """Invalidate the user's cached responses once the current transaction commits"""
+    def bump():
+        cache = get_cache()
+        try:
+            cache.incr(VERSION_KEY % user_id)
+        except ValueError:
+            cache.set(VERSION_KEY % user_id, time.time_ns(), timeout=None)
+    transaction.on_commit(bump)
+
+
+def response_etag(name, user_id, version, format):
+    return '"%s-%s-%s-%s"' % (name, user_id, version, format)
+
+
+def etag_matches(request, etag):
+    if_none_match = request.headers.get('If-None-Match')
+    return bool(if_none_match) and (if_none_match.strip() == '*' or etag in parse_etags(if_none_match))
+
+
+def cached_user_response(request, name, build):
+    """
+    Serve ``build()`` for the requesting user from cache, with a strong ETag.
+
+    A matching If-None-Match is answered with 304 after a single cache read.
+    """
+    user_id = request.user.pk
+    version = vocabulary_version(user_id)
+    etag = response_etag(name, user_id, version, request.accepted_renderer.format)
+    if etag_matches(request, etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+    cache = get_cache()
+    key = RESPONSE_KEY % (name, user_id, version)
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, settings.RECIPE_CACHE_TIMEOUT)
+    return Response(data, status=status.HTTP_200_OK, headers={'ETag': etag})
+
+
+async def avocabulary_version(user_id):
+    """``vocabulary_version`` using the cache's async API"""
+    cache = get_cache()
+    version = await cache.aget(VERSION_KEY % user_id)
+    if version is None:
+        await cache.aadd(VERSION_KEY % user_id, time.time_ns(), timeout=None)
+        version = await cache.aget(VERSION_KEY % user_id)
+    return version
+
+
+async def acached_user_data(name, user_id, version, build):
+    """The cached body for ``name`` at ``version``, awaiting ``build()`` on a miss"""
+    cache = get_cache()
+    key = RESPONSE_KEY % (name, user_id, version)
+    data = await cache.aget(key)
+    if data is None:
+        data = await build()
+        await cache.aset(key, data, settings.RECIPE_CACHE_TIMEOUT)
+    return data
@@ -0,0 +1,64 @@
+"""
+HTTP validators for recipes.
+
+Recipe.version and Recipe.updated_at change on every write, so they give a
+strong ETag and a Last-Modified date without rendering the body; the ETag
+also names the negotiated renderer, whose output it stands for. Conditional
+GETs are answered with 304, and writes with a stale If-Match or
+If-Unmodified-Since fail with 412 before any validation or write happens.
+A write changes the recipe whatever the format, so If-Match accepts the ETag
+any renderer gave for the current version.
+"""
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags
+from rest_framework import status
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from core.models import recipe_etag
+
+
+def request_etag(request, pk, version):
+    """The ETag the request's conditional headers are checked against"""
+    etag = recipe_etag(pk, version, request.accepted_renderer.format)
+    if request.method in SAFE_METHODS:
+        return etag
+    current = {recipe_etag(pk, version, cls.format) for cls in api_settings.DEFAULT_RENDERER_CLASSES}
+    matched = current.intersection(parse_etags(request.headers.get('If-Match', '')))
+    return matched.pop() if matched else etag
+
+
+def validator_headers(request, pk, version, updated_at):
+    return {
+        'ETag': recipe_etag(pk, version, request.accepted_renderer.format),
+        'Last-Modified': http_date(updated_at.timestamp()),
+    }
+
+
+def precondition_status(request, pk, version, updated_at):
+    """304, 412 or None for the request's conditional headers"""
+    response = get_conditional_response(
+        request,
+        etag=request_etag(request, pk, version),
+        last_modified=int(updated_at.timestamp()),
+    )
+    return None if response is None else response.status_code
+
+
+def evaluate_preconditions(request, pk, version, updated_at):
+    """
+    Check the request's conditional headers against the recipe's validators.
+
+    Returns a 304 or 412 Response when the request should stop here, or None.
+    """
+    result = precondition_status(request, pk, version, updated_at)
+    if result is None:
+        return None
+    headers = validator_headers(request, pk, version, updated_at)
+    if result == status.HTTP_304_NOT_MODIFIED:
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(
+        {"error": "Recipe has been modified"},
+        status=status.HTTP_412_PRECONDITION_FAILED,
+        headers=headers
+    )
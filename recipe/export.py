@@ -0,0 +1,68 @@
+"""
+Streaming export of recipes as NDJSON or CSV.
+
+Rows are read through a server-side cursor (``iterator(chunk_size=...)``) and
+rendered chunk by chunk with the values() rendering path, so tags and
+ingredients cost two queries per chunk and memory use does not depend on
+the number of recipes.
+"""
+import csv
+import json
+from itertools import islice
+
+from recipe.rendering import render_recipes
+
+CSV_COLUMNS = ['id', 'user', 'title', 'description', 'time_minutes', 'price', 'link', 'tags', 'ingredients']
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def rendered_chunks(queryset, chunk_size):
+    """Rendered recipes, one list per chunk, in primary key order"""
+    rows = queryset.order_by('id').iterator(chunk_size=chunk_size)
+    for chunk in chunks(rows, chunk_size):
+        yield render_recipes(chunk)
+
+
+def ndjson_stream(queryset, chunk_size):
+    for recipes in rendered_chunks(queryset, chunk_size):
+        yield ''.join(
+            json.dumps(recipe, ensure_ascii=False, separators=(',', ':')) + '\n'
+            for recipe in recipes
+        )
+
+
+class Echo:
+    """File-like object whose write() returns the line, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def csv_stream(queryset, chunk_size):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for recipes in rendered_chunks(queryset, chunk_size):
+        lines = []
+        for recipe in recipes:
+            recipe['tags'] = '|'.join(tag['name'] for tag in recipe['tags'])
+            recipe['ingredients'] = '|'.join(item['name'] for item in recipe['ingredients'])
+            lines.append(writer.writerow([recipe[column] for column in CSV_COLUMNS]))
+        yield ''.join(lines)
+
+
+STREAMS = {
+    'ndjson': ndjson_stream,
+    'csv': csv_stream,
+}
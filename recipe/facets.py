@@ -0,0 +1,78 @@
+"""
+Facet counts for a filtered set of recipes.
+
+Whatever the number of matching recipes, facets cost three aggregate
+queries: tag counts and ingredient counts grouped over the through tables
+(restricted to the matching recipe ids by a semi-join), and one conditional
+aggregate for the total and both histograms.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, Q
+from core.models import Recipe
+
+
+def link_counts(field_name, recipe_ids, limit):
+    """[{'id', 'name', 'count'}] for one relation, most used first"""
+    field = Recipe._meta.get_field(field_name)
+    source = field.m2m_field_name()
+    target = field.m2m_reverse_field_name()
+    rows = (
+        field.remote_field.through.objects
+        .filter(**{source + '__in': recipe_ids})
+        .values(target + '_id', target + '__name')
+        .annotate(count=Count('*'))
+        .order_by('-count', target + '__name')[:limit]
+    )
+    return [
+        {'id': row[target + '_id'], 'name': row[target + '__name'], 'count': row['count']}
+        for row in rows
+    ]
+
+
+def buckets(bounds):
+    """[(low, high), ...] from ascending bounds; the last bucket is open ended"""
+    return list(zip(bounds, list(bounds[1:]) + [None]))
+
+
+def histogram_aggregates(field_name, bounds):
+    aggregates = {}
+    for index, (low, high) in enumerate(buckets(bounds)):
+        condition = Q(**{field_name + '__gte': low})
+        if high is not None:
+            condition &= Q(**{field_name + '__lt': high})
+        aggregates['%s_%d' % (field_name, index)] = Count('id', filter=condition)
+    return aggregates
+
+
+def histogram(field_name, bounds, totals):
+    return [
+        {
+            'min': str(low),
+            'max': str(high) if high is not None else None,
+            'count': totals['%s_%d' % (field_name, index)],
+        }
+        for index, (low, high) in enumerate(buckets(bounds))
+    ]
+
+
+def compute_facets(queryset):
+    """Facets for the recipes in ``queryset`` (filters already applied)"""
+    price_bounds = [Decimal(str(bound)) for bound in settings.RECIPE_FACET_PRICE_BUCKETS]
+    time_bounds = settings.RECIPE_FACET_TIME_BUCKETS
+    limit = settings.RECIPE_FACET_LIMIT
+
+    totals = queryset.order_by().aggregate(
+        count=Count('id'),
+        **histogram_aggregates('price', price_bounds),
+        **histogram_aggregates('time_minutes', time_bounds),
+    )
+    recipe_ids = queryset.order_by().values('id')
+    return {
+        'count': totals['count'],
+        'tags': link_counts('tags', recipe_ids, limit),
+        'ingredients': link_counts('ingredients', recipe_ids, limit),
+        'price': histogram('price', price_bounds, totals),
+        'time_minutes': histogram('time_minutes', time_bounds, totals),
+    }
@@ -0,0 +1,91 @@
+"""
+Query-string filters for the recipe list.
+
+Tag and ingredient filters are ``id IN (SELECT recipe_id ...)`` semi-joins
+against the M2M through tables, so recipe rows are never multiplied by a join
+and no DISTINCT is needed. The subqueries are served by the (tag_id,
+recipe_id) / (ingredient_id, recipe_id) indexes from core migration 0011.
+``any`` matches recipes linked to at least one of the ids, ``all`` requires
+every id (one semi-join per id).
+"""
+from django.db.models import Q
+from rest_framework import serializers
+from core.models import Recipe
+
+MATCH_CHOICES = ['any', 'all']
+
+
+class IdListField(serializers.CharField):
+    """Comma separated ids, e.g. ``1,2,3``"""
+
+    default_error_messages = {
+        'invalid': 'Must be a comma separated list of integer IDs.',
+    }
+
+    def to_internal_value(self, data):
+        value = super().to_internal_value(data)
+        try:
+            ids = {int(part) for part in value.split(',') if part.strip()}
+        except ValueError:
+            self.fail('invalid')
+        if not ids:
+            self.fail('invalid')
+        return sorted(ids)
+
+
+class RecipeFilterSerializer(serializers.Serializer):
+    tags = IdListField(required=False)
+    tags_match = serializers.ChoiceField(choices=MATCH_CHOICES, default='any')
+    ingredients = IdListField(required=False)
+    ingredients_match = serializers.ChoiceField(choices=MATCH_CHOICES, default='any')
+    min_price = serializers.DecimalField(max_digits=7, decimal_places=2, required=False)
+    max_price = serializers.DecimalField(max_digits=7, decimal_places=2, required=False)
+    min_time = serializers.IntegerField(required=False, min_value=0)
+    max_time = serializers.IntegerField(required=False, min_value=0)
+
+    def validate(self, attrs):
+        for low, high in (('min_price', 'max_price'), ('min_time', 'max_time')):
+            if low in attrs and high in attrs and attrs[low] > attrs[high]:
+                raise serializers.ValidationError({low: 'Must not be greater than %s.' % high})
+        return attrs
+
+
+def linked(field_name, ids, match):
+    """Semi-join condition(s) for recipes linked to ``ids`` through ``field_name``"""
+    field = Recipe._meta.get_field(field_name)
+    through = field.remote_field.through
+    source = field.m2m_field_name()
+    target = field.m2m_reverse_field_name() + '_id'
+    links = through.objects.values(source)
+    if match == 'any':
+        return [Q(pk__in=links.filter(**{target + '__in': ids}))]
+    return [Q(pk__in=links.filter(**{target: pk})) for pk in ids]
+
+
+def filter_recipes(queryset, params):
+    """
+    Apply the filters in ``params`` (the query dict) to ``queryset``.
+
+    Raises ValidationError for malformed values.
+    """
+    serializer = RecipeFilterSerializer(data=params)
+    serializer.is_valid(raise_exception=True)
+    filters = serializer.validated_data
+
+    conditions = []
+    for name in ('tags', 'ingredients'):
+        if name in filters:
+            conditions += linked(name, filters[name], filters[name + '_match'])
+    if conditions:
+        queryset = queryset.filter(*conditions)
+
+    ranges = {
+        'price__gte': filters.get('min_price'),
+        'price__lte': filters.get('max_price'),
+        'time_minutes__gte': filters.get('min_time'),
+        'time_minutes__lte': filters.get('max_time'),
+    }
+    ranges = {lookup: value for lookup, value in ranges.items() if value is not None}
+    if ranges:
+        queryset = queryset.filter(**ranges)
+    return queryset
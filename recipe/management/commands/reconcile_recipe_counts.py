@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from core.models import Tag, Ingredient
+from recipe.services import reconcile_recipe_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute Tag/Ingredient.recipe_count from the recipe links and fix the ones that drifted"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000, help="Rows per UPDATE")
+
+    def handle(self, *args, **options):
+        for model in (Tag, Ingredient):
+            fixed = reconcile_recipe_counts(model, options['batch_size'])
+            self.stdout.write("Fixed %d %s counts" % (fixed, model._meta.verbose_name))
@@ -0,0 +1,196 @@
+import base64
+import json
+from collections import OrderedDict
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+# Allowed ?ordering= values mapped to (sort field, parser for cursor values).
+# Every ordering is tie-broken on ``id`` in the same direction, so each one is
+# served by a single composite (field, id) index scanned forwards or backwards.
+RECIPE_ORDERINGS = OrderedDict([
+    ('-id', ('id', int)),
+    ('id', ('id', int)),
+    ('price', ('price', Decimal)),
+    ('-price', ('price', Decimal)),
+    ('time_minutes', ('time_minutes', int)),
+    ('-time_minutes', ('time_minutes', int)),
+])
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Opaque-cursor keyset pagination.
+
+    The cursor stores the last row's (sort value, id) pair, so every page is a
+    bounded index range scan instead of an OFFSET that grows with page depth.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering_query_param = 'ordering'
+    page_size = settings.RECIPE_PAGE_SIZE
+    max_page_size = settings.RECIPE_MAX_PAGE_SIZE
+    orderings = RECIPE_ORDERINGS
+    default_ordering = '-id'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.finish_page(list(self.page_queryset(queryset, request)))
+
+    def page_queryset(self, queryset, request):
+        """
+        The sliced queryset for the requested page, to be evaluated by the
+        caller (sync or async) and handed to ``finish_page``.
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request)
+        self.field, self.parse_value = self.orderings[self.ordering]
+        self.descending = self.ordering.startswith('-')
+
+        self.cursor = self.decode_cursor(request)
+        self.reverse = False
+        if self.cursor is not None:
+            self.reverse = self.cursor['r']
+            queryset = queryset.filter(self.keyset_filter(self.cursor['v'], self.cursor['i'], self.reverse))
+
+        queryset = queryset.order_by(*self.order_by(self.reverse))
+
+        # Fetch one extra row to find out whether there is a following page.
+        return queryset[:self.page_size + 1]
+
+    def finish_page(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if self.reverse:
+            rows.reverse()
+            self.has_next = self.cursor is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        return OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ])
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        value = request.query_params.get(self.page_size_query_param)
+        if value is None:
+            return self.page_size
+        try:
+            page_size = int(value)
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: 'A valid integer is required.'})
+        if page_size < 1:
+            raise ValidationError({self.page_size_query_param: 'Must be at least 1.'})
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        if ordering not in self.orderings:
+            raise ValidationError({
+                self.ordering_query_param: 'Must be one of: %s.' % ', '.join(self.orderings)
+            })
+        return ordering
+
+    def order_by(self, reverse=False):
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        if self.field == 'id':
+            return [prefix + 'id']
+        return [prefix + self.field, prefix + 'id']
+
+    def keyset_filter(self, value, pk, reverse=False):
+        """
+        Rows strictly after (value, pk) in the scan direction.
+
+        The redundant ``field >= value`` term gives the planner an index range
+        condition on the leading column of the composite index.
+        """
+        after = 'lt' if self.descending != reverse else 'gt'
+        if self.field == 'id':
+            return Q(**{'id__' + after: pk})
+        bound = after[0] + 'te'
+        beyond = Q(**{'%s__%s' % (self.field, after): value}) | Q(**{'id__' + after: pk})
+        return Q(**{'%s__%s' % (self.field, bound): value}) & beyond
+
+    def encode_cursor(self, row, reverse):
+        # Pages hold model instances or values() dicts
+        if isinstance(row, dict):
+            value, pk = row[self.field], row['id']
+        else:
+            value, pk = getattr(row, self.field), row.pk
+        payload = {
+            'o': self.ordering,
+            'v': str(value),
+            'i': pk,
+            'r': reverse,
+        }
+        raw = json.dumps(payload, separators=(',', ':')).encode('ascii')
+        token = base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+        url = replace_query_param(self.base_url, self.cursor_query_param, token)
+        if self.ordering == self.default_ordering:
+            url = remove_query_param(url, self.ordering_query_param)
+        return url
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            payload = json.loads(raw)
+            if payload['o'] != self.ordering:
+                raise ValueError('cursor ordering mismatch')
+            return {
+                'v': self.parse_value(payload['v']),
+                'i': int(payload['i']),
+                'r': bool(payload['r']),
+            }
+        except (TypeError, ValueError, KeyError, InvalidOperation):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+
+class SearchCursorPagination(KeysetCursorPagination):
+    """Keyset pagination of search results, most relevant first by default"""
+    orderings = OrderedDict([('-rank', ('rank', float))] + list(RECIPE_ORDERINGS.items()))
+    default_ordering = '-rank'
@@ -0,0 +1,144 @@
+"""
+Read-optimized rendering of recipes.
+
+Builds the exact RecipeSerializer output straight from ``values()`` rows,
+with tags and ingredients fetched in one query per relation from the
+through tables. No model instances, field objects or nested serializers are
+created per row.
+
+Clients can ask for a subset of the fields with ``?fields=`` (and add nested
+relations with ``?expand=``); only those columns are selected and relations
+that are not asked for are never queried.
+"""
+from rest_framework.exceptions import ValidationError
+from core.models import Recipe
+from recipe.serializers import RecipeSerializer
+
+RELATION_FIELDS = ('tags', 'ingredients')
+# Output field -> column, in RecipeSerializer's field order
+SCALAR_FIELDS = {
+    'id': 'id', 'user': 'user_id', 'title': 'title', 'description': 'description',
+    'time_minutes': 'time_minutes', 'price': 'price', 'link': 'link',
+}
+FIELDS = (*SCALAR_FIELDS, *RELATION_FIELDS)
+# Always selected: id links relations and, with the sort keys, builds cursors
+KEY_COLUMNS = ('id', 'price', 'time_minutes')
+
+# Reuse the serializer's own field so prices are quantized and formatted
+# exactly as the ModelSerializer path does it.
+_price = RecipeSerializer().fields['price']
+
+
+def related_links(field_name, recipe_ids):
+    """(recipe id, related id, name) rows for one M2M relation, ordered by related id"""
+    field = Recipe._meta.get_field(field_name)
+    source = field.m2m_field_name() + '_id'
+    target = field.m2m_reverse_field_name()
+    return (
+        field.remote_field.through.objects
+        .filter(**{source + '__in': recipe_ids})
+        .order_by(target + '_id')
+        .values_list(source, target + '_id', target + '__name')
+    )
+
+
+def group_links(links, recipe_ids):
+    related = {recipe_id: [] for recipe_id in recipe_ids}
+    for recipe_id, related_id, name in links:
+        related[recipe_id].append({'id': related_id, 'name': name})
+    return related
+
+
+def related_names(field_name, recipe_ids):
+    """{recipe id: [{'id': ..., 'name': ...}, ...]} for one M2M relation"""
+    return group_links(related_links(field_name, recipe_ids), recipe_ids)
+
+
+async def arelated_names(field_name, recipe_ids):
+    links = [link async for link in related_links(field_name, recipe_ids)]
+    return group_links(links, recipe_ids)
+
+
+class Fieldset:
+    """The recipe fields to render, in output order"""
+
+    def __init__(self, fields=FIELDS):
+        self.fields = tuple(name for name in FIELDS if name in fields)
+        self.scalars = tuple((name, SCALAR_FIELDS[name]) for name in self.fields if name in SCALAR_FIELDS)
+        self.relations = tuple(name for name in self.fields if name in RELATION_FIELDS)
+        self.columns = (*KEY_COLUMNS, *(column for _, column in self.scalars if column not in KEY_COLUMNS))
+        self.complete = self.fields == FIELDS
+
+
+ALL_FIELDS = Fieldset()
+
+
+def parse_names(params, param, choices):
+    value = params.get(param, '')
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in choices]
+    if unknown:
+        raise ValidationError({param: 'Unknown field(s): %s. Choose from: %s.' % (
+            ', '.join(unknown), ', '.join(choices),
+        )})
+    return names
+
+
+def fieldset(params):
+    """
+    The Fieldset for ``?fields=`` (default: all) plus ``?expand=`` relations.
+
+    E.g. ``?fields=id,title,price`` for a compact list, or
+    ``?fields=id,title&expand=tags`` to add one nested relation.
+    """
+    fields = parse_names(params, 'fields', FIELDS)
+    expand = parse_names(params, 'expand', RELATION_FIELDS)
+    if not fields:
+        return ALL_FIELDS
+    return Fieldset({*fields, *expand})
+
+
+def to_representation(row, relations, fields=ALL_FIELDS):
+    """One ``values()`` row as RecipeSerializer would render it, limited to ``fields``"""
+    recipe_id = row['id']
+    if fields.complete:
+        data = {
+            'id': recipe_id,
+            'user': row['user_id'],
+            'title': row['title'],
+            'description': row['description'],
+            'time_minutes': row['time_minutes'],
+            'price': _price.to_representation(row['price']),
+            'link': row['link'],
+        }
+    else:
+        data = {name: row[column] for name, column in fields.scalars}
+        if 'price' in data:
+            data['price'] = _price.to_representation(data['price'])
+    for name, related in relations.items():
+        data[name] = related[recipe_id]
+    return data
+
+
+def render_recipes(rows, fields=ALL_FIELDS):
+    """Render a list of ``recipe_values()`` rows; only relations in ``fields`` are queried"""
+    recipe_ids = [row['id'] for row in rows]
+    relations = {name: related_names(name, recipe_ids) for name in fields.relations} if rows else {}
+    return [to_representation(row, relations, fields) for row in rows]
+
+
+async def arender_recipes(rows, fields=ALL_FIELDS):
+    """``render_recipes`` using the async ORM"""
+    recipe_ids = [row['id'] for row in rows]
+    relations = {}
+    if rows:
+        for name in fields.relations:
+            relations[name] = await arelated_names(name, recipe_ids)
+    return [to_representation(row, relations, fields) for row in rows]
+
+
+def recipe_values(queryset=None, fields=ALL_FIELDS):
+    """The recipe columns needed by ``render_recipes`` for ``fields``"""
+    if queryset is None:
+        queryset = Recipe.objects.all()
+    return queryset.values(*fields.columns)
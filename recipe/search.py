@@ -0,0 +1,85 @@
+"""
+Full-text search over recipe titles and descriptions.
+
+PostgreSQL matches a weighted ``SearchVector`` (title A, description B)
+backed by the GIN expression index from core migration 0010 and ranks with
+``ts_rank``. SQLite uses the FTS5 table from the same migration, ranked with
+bm25, so search can be developed and tested without Postgres. Other backends
+fall back to unindexed ``icontains`` matching.
+
+Every backend annotates a ``rank`` where higher means more relevant.
+"""
+import re
+
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+
+SEARCH_CONFIG = 'english'
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_vector():
+    from django.contrib.postgres.search import SearchVector
+
+    return SearchVector('title', weight='A', config=SEARCH_CONFIG) + SearchVector(
+        'description', weight='B', config=SEARCH_CONFIG
+    )
+
+
+def search_terms(q):
+    return TERM_RE.findall(q)
+
+
+def search_recipes(queryset, q):
+    """Filter ``queryset`` to recipes matching ``q`` and annotate ``rank``"""
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        return _search_postgres(queryset, q)
+    if vendor == 'sqlite':
+        return _search_sqlite(queryset, q)
+    return _search_fallback(queryset, q)
+
+
+def _search_postgres(queryset, q):
+    from django.contrib.postgres.search import SearchQuery, SearchRank
+
+    query = SearchQuery(q, config=SEARCH_CONFIG, search_type='websearch')
+    vector = search_vector()
+    # ts_rank returns real; cast so the value survives the cursor round trip exactly
+    return queryset.alias(search=vector).annotate(
+        rank=Cast(SearchRank(vector, query), FloatField()),
+    ).filter(search=query)
+
+
+def _search_sqlite(queryset, q):
+    terms = search_terms(q)
+    if not terms:
+        return _no_results(queryset)
+    # Quote every term so user input is never parsed as FTS5 query syntax
+    match = ' '.join('"%s"' % term for term in terms)
+    return queryset.annotate(
+        rank=RawSQL(
+            'SELECT -bm25(core_recipe_fts, 2.0, 1.0) FROM core_recipe_fts '
+            'WHERE core_recipe_fts MATCH %s AND core_recipe_fts.rowid = core_recipe.id',
+            (match,),
+            output_field=FloatField(),
+        )
+    ).filter(
+        id__in=RawSQL('SELECT rowid FROM core_recipe_fts WHERE core_recipe_fts MATCH %s', (match,))
+    )
+
+
+def _no_results(queryset):
+    # Keep the ``rank`` annotation so rank ordering still applies
+    return queryset.annotate(rank=Value(0.0, output_field=FloatField())).none()
+
+
+def _search_fallback(queryset, q):
+    condition = Q()
+    for term in search_terms(q):
+        condition &= Q(title__icontains=term) | Q(description__icontains=term)
+    if not condition:
+        return _no_results(queryset)
+    return queryset.filter(condition).annotate(rank=Value(1.0, output_field=FloatField()))
@@ -1,5 +1,8 @@
+from django.conf import settings
+from django.db import transaction
 from rest_framework import serializers
 from core.models import Recipe, Tag , Ingredient
+from recipe.services import edit_relations, relation_names, set_relations, split_relation_edits
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,15 +20,41 @@ class IngredientSerializer(serializers.ModelSerializer):
         fields = ['id', 'name']
         read_only_fields = ['id']
 
+
+class PopularTagSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Tag
+        fields = ['id', 'name', 'recipe_count']
+
+
+class PopularIngredientSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Ingredient
+        fields = ['id', 'name', 'recipe_count']
+
+
+class PopularQuerySerializer(serializers.Serializer):
+    limit = serializers.IntegerField(
+        min_value=1, max_value=settings.RECIPE_POPULAR_MAX_LIMIT, default=settings.RECIPE_POPULAR_LIMIT,
+    )
+
 # Serializer for Recipe model
 class RecipeSerializer(serializers.ModelSerializer):
     tags = TagListSerializer(many=True, required=False)
     price = serializers.DecimalField(max_digits=7, decimal_places=2)
     ingredients=IngredientSerializer(many=True, required=False)
+    # PATCH only: link or unlink some names without resending the full list
+    add_tags = TagListSerializer(many=True, required=False, write_only=True)
+    remove_tags = TagListSerializer(many=True, required=False, write_only=True)
+    add_ingredients = IngredientSerializer(many=True, required=False, write_only=True)
+    remove_ingredients = IngredientSerializer(many=True, required=False, write_only=True)
 
     class Meta:
         model = Recipe
-        fields = ['id', 'user', 'title', 'description', 'time_minutes', 'price', 'link', 'tags' , 'ingredients']
+        fields = [
+            'id', 'user', 'title', 'description', 'time_minutes', 'price', 'link', 'tags', 'ingredients',
+            'add_tags', 'remove_tags', 'add_ingredients', 'remove_ingredients',
+        ]
         read_only_fields = ['id', 'user']
 
     def create(self, validated_data):
@@ -36,48 +65,94 @@ class RecipeSerializer(serializers.ModelSerializer):
         if not user:
             raise serializers.ValidationError("User is required to create a recipe.")
 
-        # Create the recipe
-        recipe = Recipe.objects.create(user=user, **validated_data)
-
-        # Handle tags
-        for tag_data in tags_data:
-            tag, created = Tag.objects.get_or_create(user=user, name=tag_data['name'])
-            recipe.tags.add(tag)
+        with transaction.atomic():
+            # Create the recipe
+            recipe = Recipe.objects.create(user=user, **validated_data)
 
-        # Handle ingredients
-        for ingredient_data in ingredients_data:
-            ingredient, created = Ingredient.objects.get_or_create(user=user, name=ingredient_data['name'])
-            recipe.ingredients.add(ingredient)  # if you have ManyToManyField in Recipe for ingredients
+            # Resolve all tag/ingredient names in one upsert each and link them
+            # with a single through-table insert per relation
+            set_relations(user, 'tags', {recipe.pk: relation_names(tags_data)})
+            set_relations(user, 'ingredients', {recipe.pk: relation_names(ingredients_data)})
 
         return recipe
 
 
-    def update(self, instance, validated_data):
-    # Extract tags if provided
-     tags_data = validated_data.pop('tags', None)
-
-    # Update normal fields
-     for attr, value in validated_data.items():
-        setattr(instance, attr, value)
-
-     instance.save()
-
-    # If tags provided → reset and update them
-     if tags_data is not None:
-        instance.tags.clear()
-        user = self.context['user']
-
-        for tag_data in tags_data:
-            tag, created = Tag.objects.get_or_create(
-                user=user,
-                name=tag_data['name']
-            )
-            instance.tags.add(tag)
-
-     return instance
-
-
-
+    def validate(self, attrs):
+        """add_/remove_ lists only make sense for PATCH, and not with the full list"""
+        for name in ('tags', 'ingredients'):
+            add, remove = attrs.get('add_' + name), attrs.get('remove_' + name)
+            if add is None and remove is None:
+                continue
+            if not self.partial:
+                raise serializers.ValidationError({'add_' + name: 'Only allowed in partial updates.'})
+            if name in attrs:
+                raise serializers.ValidationError(
+                    {name: 'Send either the full list or add_%s/remove_%s, not both.' % (name, name)}
+                )
+            both = set(relation_names(add or [])) & set(relation_names(remove or []))
+            if both:
+                raise serializers.ValidationError(
+                    {'remove_' + name: 'Names both added and removed: %s.' % ', '.join(sorted(both))}
+                )
+        return attrs
 
+    def update(self, instance, validated_data):
+        fields, edits = split_relation_edits(validated_data)
+        for attr, value in fields.items():
+            setattr(instance, attr, value)
+
+        # One save bumps the version for field and link changes alike; the
+        # view runs this in its transaction, with the recipe locked
+        instance.save()
+        for name, edit in edits.items():
+            edit_relations(self.context['user'], name, {instance.pk: edit})
+
+        return instance
+
+
+class RecipeBulkOperationSerializer(serializers.Serializer):
+    """One create/update/delete entry of a bulk request"""
+    op = serializers.ChoiceField(choices=['create', 'update', 'delete'])
+    id = serializers.IntegerField(required=False)
+    data = serializers.DictField(required=False)
+
+    def validate(self, attrs):
+        op = attrs['op']
+        if op == 'create' and 'id' in attrs:
+            raise serializers.ValidationError({'id': 'Not allowed for create.'})
+        if op in ('update', 'delete') and 'id' not in attrs:
+            raise serializers.ValidationError({'id': 'This field is required for %s.' % op})
+        if op in ('create', 'update') and 'data' not in attrs:
+            raise serializers.ValidationError({'data': 'This field is required for %s.' % op})
+        if op != 'delete':
+            # Validate the payload exactly like the single-recipe endpoints do
+            recipe = RecipeSerializer(data=attrs['data'], partial=op == 'update')
+            if not recipe.is_valid():
+                raise serializers.ValidationError({'data': recipe.errors})
+            attrs['data'] = recipe.validated_data
+        return attrs
+
+
+class RecipeBulkSerializer(serializers.Serializer):
+    operations = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=settings.RECIPE_BULK_MAX_OPERATIONS,
+    )
+
+    def validate_operations(self, operations):
+        """Validate every item and report errors per index, not just the first one"""
+        validated, errors = [], {}
+        for index, item in enumerate(operations):
+            operation = RecipeBulkOperationSerializer(data=item)
+            if operation.is_valid():
+                validated.append(operation.validated_data)
+            else:
+                errors[index] = operation.errors
+        ids = [op['id'] for op in validated if 'id' in op]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError('Each recipe id may appear only once per batch.')
+        if errors:
+            raise serializers.ValidationError(errors)
+        return validated
 
-  
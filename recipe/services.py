@@ -0,0 +1,297 @@
+"""
+Set-based write helpers for recipes.
+
+Tags and ingredients are resolved for a whole batch of names at once and
+attached with a single insert into the M2M through table, so the number of
+round trips does not depend on how many recipes or names are involved.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Max, Min, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from core.models import Recipe
+from recipe.cache import bump_vocabulary_version
+
+RELATION_FIELDS = ('tags', 'ingredients')
+
+
+def resolve_names(model, user, names):
+    """
+    Return a {name: id} map of the user's Tag/Ingredient rows for ``names``.
+
+    A single upsert on the (user, name) unique constraint inserts the missing
+    rows and returns the ids of existing ones, so concurrent requests using the
+    same new name cannot create duplicates.
+    """
+    names = set(names)
+    if not names:
+        return {}
+    rows = model.objects.bulk_create(
+        [model(user=user, name=name) for name in names],
+        update_conflicts=True,
+        unique_fields=['user', 'name'],
+        update_fields=['name'],
+    )
+    return {row.name: row.pk for row in rows}
+
+
+def set_relations(user, field_name, names_by_recipe):
+    """
+    Attach tags or ingredients (by name) to many new recipes at once.
+
+    ``names_by_recipe`` maps recipe ids to lists of names. Recipes that may
+    already have links go through ``edit_relations`` instead.
+    """
+    field = Recipe._meta.get_field(field_name)
+    through = field.remote_field.through
+    source, target = field.m2m_field_name() + '_id', field.m2m_reverse_field_name() + '_id'
+
+    name_ids = resolve_names(
+        field.related_model, user,
+        (name for names in names_by_recipe.values() for name in names),
+    )
+    rows = []
+    for recipe_id, names in names_by_recipe.items():
+        for target_id in {name_ids[name] for name in names}:
+            rows.append(through(**{source: recipe_id, target: target_id}))
+    if rows:
+        through.objects.bulk_create(rows)
+        adjust_recipe_counts(field.related_model, Counter(getattr(row, target) for row in rows))
+    # bulk_create sends no signals; invalidate cached vocabulary explicitly
+    bump_vocabulary_version(user.pk)
+
+
+def edit_relations(user, field_name, edits, created=()):
+    """
+    Change the tags or ingredients of existing recipes by the minimal diff.
+
+    ``edits`` maps recipe ids to ``(names, add, remove)``: a full list of
+    names replacing the current links (or None to keep them), then names to
+    link and names to unlink. Links that stay are not rewritten; what changes
+    costs one insert and one delete for all recipes together. Through-table
+    writes send no signals, so callers must ``touch()`` the recipes (or save
+    them). Recipes in ``created`` are known to have no links yet and are not
+    looked up. Returns the ids of recipes whose links changed.
+    """
+    field = Recipe._meta.get_field(field_name)
+    through = field.remote_field.through
+    source, target = field.m2m_field_name() + '_id', field.m2m_reverse_field_name() + '_id'
+
+    name_ids = resolve_names(
+        field.related_model, user,
+        (name for names, add, _ in edits.values() for name in [*(names or ()), *add]),
+    )
+    # {recipe id: {tag/ingredient id: (through pk, name)}}
+    current = {recipe_id: {} for recipe_id in edits}
+    existing = [recipe_id for recipe_id in edits if recipe_id not in created]
+    if existing:
+        for pk, recipe_id, target_id, name in through.objects.filter(**{source + '__in': existing}).values_list(
+            'pk', source, target, field.m2m_reverse_field_name() + '__name',
+        ):
+            current[recipe_id][target_id] = (pk, name)
+
+    rows, delete_pks, changes, changed = [], [], Counter(), set()
+    for recipe_id, (names, add, remove) in edits.items():
+        linked = current[recipe_id]
+        wanted = set(linked) if names is None else {name_ids[name] for name in names}
+        wanted |= {name_ids[name] for name in add}
+        remove = set(remove)
+        wanted -= {target_id for target_id, (_, name) in linked.items() if name in remove}
+        for target_id in wanted - linked.keys():
+            rows.append(through(**{source: recipe_id, target: target_id}))
+            changes[target_id] += 1
+        for target_id in linked.keys() - wanted:
+            delete_pks.append(linked[target_id][0])
+            changes[target_id] -= 1
+        if wanted != linked.keys():
+            changed.add(recipe_id)
+
+    if delete_pks:
+        through.objects.filter(pk__in=delete_pks).delete()
+    if rows:
+        through.objects.bulk_create(rows)
+    adjust_recipe_counts(field.related_model, changes)
+    if changed or name_ids:
+        # New names may have been created even if no link changed
+        bump_vocabulary_version(user.pk)
+    return changed
+
+
+def recipe_count_plus(change):
+    # Clamped at zero, in case the counters drifted (see reconcile_recipe_counts)
+    return Greatest(F('recipe_count') + change, 0)
+
+
+def adjust_recipe_counts(model, changes):
+    """Add ``changes`` ({Tag/Ingredient id: delta}) to recipe_count in one UPDATE"""
+    ids_by_change = {}
+    for pk, change in changes.items():
+        if change:
+            ids_by_change.setdefault(change, []).append(pk)
+    if not ids_by_change:
+        return
+    change = Case(*(When(pk__in=ids, then=Value(change)) for change, ids in ids_by_change.items()))
+    model.objects.filter(pk__in=[pk for ids in ids_by_change.values() for pk in ids]).update(
+        recipe_count=recipe_count_plus(change)
+    )
+
+
+def linked_counts(field_name, **filters):
+    """Through-table links matching ``filters``, and a subquery counting them per tag/ingredient"""
+    field = Recipe._meta.get_field(field_name)
+    target = field.m2m_reverse_field_name() + '_id'
+    links = field.remote_field.through.objects.filter(**filters)
+    counts = links.filter(**{target: OuterRef('pk')}).order_by().values(target).annotate(n=Count('*')).values('n')
+    return field, links.values(target), counts
+
+
+def release_recipe_counts(field_name, recipe_ids=None, target_ids=None):
+    """
+    Decrement recipe_count for links about to be deleted, in one UPDATE.
+
+    The links are those of ``recipe_ids`` and/or to ``target_ids``; call
+    this before deleting them.
+    """
+    field = Recipe._meta.get_field(field_name)
+    filters = {}
+    if recipe_ids is not None:
+        filters[field.m2m_field_name() + '_id__in'] = recipe_ids
+    if target_ids is not None:
+        filters[field.m2m_reverse_field_name() + '_id__in'] = target_ids
+    field, linked, counts = linked_counts(field_name, **filters)
+    field.related_model.objects.filter(pk__in=linked).update(
+        recipe_count=recipe_count_plus(-Subquery(counts))
+    )
+
+
+def release_recipes(recipe_ids):
+    """Release the counts of every tag and ingredient link of recipes about to be deleted"""
+    for name in RELATION_FIELDS:
+        release_recipe_counts(name, recipe_ids)
+
+
+def reconcile_recipe_counts(model, batch_size=10000):
+    """
+    Recompute recipe_count of every Tag/Ingredient from the through table.
+
+    Runs one UPDATE per ``batch_size`` id range, touching only rows whose
+    count is wrong; returns how many were fixed.
+    """
+    field_name = {field.related_model: field.name for field in Recipe._meta.many_to_many}[model]
+    _, _, counts = linked_counts(field_name)
+    actual = Coalesce(Subquery(counts), 0)
+    fixed = 0
+    bounds = model.objects.aggregate(first=Min('pk'), last=Max('pk'))
+    if bounds['first'] is None:
+        return fixed
+    for start in range(bounds['first'], bounds['last'] + 1, batch_size):
+        batch = model.objects.filter(pk__gte=start, pk__lt=start + batch_size)
+        fixed += batch.annotate(actual=actual).exclude(recipe_count=F('actual')).update(recipe_count=actual)
+    return fixed
+
+
+def relation_names(items):
+    """Names from nested tag/ingredient payloads, e.g. [{'name': 'Vegan'}]"""
+    return [item['name'] for item in items]
+
+
+def split_relation_edits(data):
+    """
+    Split validated RecipeSerializer data into plain fields and relation edits.
+
+    The edits are {'tags'/'ingredients': (names, add, remove)} as taken by
+    ``edit_relations``, from the full lists and the ``add_<field>`` /
+    ``remove_<field>`` lists of a PATCH.
+    """
+    fields = dict(data)
+    edits = {}
+    for name in RELATION_FIELDS:
+        items = fields.pop(name, None)
+        add, remove = fields.pop('add_' + name, ()), fields.pop('remove_' + name, ())
+        if items is not None or add or remove:
+            names = None if items is None else relation_names(items)
+            edits[name] = (names, relation_names(add), relation_names(remove))
+    return fields, edits
+
+
+class RecipesNotFound(Exception):
+    """Bulk operations referencing recipes the user does not own (or that are gone)"""
+
+    def __init__(self, ids):
+        super().__init__(ids)
+        self.ids = sorted(ids)
+
+
+@transaction.atomic
+def apply_bulk_operations(user, operations):
+    """
+    Apply validated create/update/delete operations on the user's recipes.
+
+    Each operation is a dict with ``op``, and ``id`` and/or ``data`` (the
+    validated RecipeSerializer data). Returns one result dict per operation,
+    in input order. Recipes referenced by update/delete are locked first;
+    if any of them is not (or no longer) one of ``user``'s recipes, nothing
+    is written and RecipesNotFound is raised.
+    """
+    ids = [operation['id'] for operation in operations if 'id' in operation]
+    instances = Recipe.objects.filter(user=user).select_for_update().in_bulk(ids) if ids else {}
+    missing = set(ids) - instances.keys()
+    if missing:
+        raise RecipesNotFound(missing)
+
+    results = [None] * len(operations)
+    creates, updates, delete_ids = [], [], []
+    for index, operation in enumerate(operations):
+        if operation['op'] == 'create':
+            creates.append((index, operation['data']))
+        elif operation['op'] == 'update':
+            updates.append((index, operation['id'], operation['data']))
+        else:
+            delete_ids.append(operation['id'])
+            results[index] = {'op': 'delete', 'id': operation['id'], 'status': 'deleted'}
+
+    if delete_ids:
+        Recipe.objects.filter(user=user, id__in=delete_ids).delete()
+
+    # field -> {recipe id: (names, add, remove)} for created and updated recipes alike
+    edits = {name: {} for name in RELATION_FIELDS}
+
+    created = set()
+    if creates:
+        recipes = []
+        for index, data in creates:
+            fields = {k: v for k, v in data.items() if k not in RELATION_FIELDS}
+            recipes.append(Recipe(user=user, **fields))
+        Recipe.objects.bulk_create(recipes)
+        for (index, data), recipe in zip(creates, recipes):
+            results[index] = {'op': 'create', 'id': recipe.pk, 'status': 'created'}
+            created.add(recipe.pk)
+            for name in RELATION_FIELDS:
+                if data.get(name):
+                    edits[name][recipe.pk] = (relation_names(data[name]), (), ())
+
+    if updates:
+        # Every updated recipe gets a new version, even when only links change
+        changed = {'version', 'updated_at'}
+        now = timezone.now()
+        for index, recipe_id, data in updates:
+            recipe = instances[recipe_id]
+            recipe.version += 1
+            recipe.updated_at = now
+            fields, relation_edits = split_relation_edits(data)
+            for attr, value in fields.items():
+                setattr(recipe, attr, value)
+                changed.add(attr)
+            for name, edit in relation_edits.items():
+                edits[name][recipe_id] = edit
+            results[index] = {'op': 'update', 'id': recipe_id, 'status': 'updated'}
+        Recipe.objects.bulk_update([instances[recipe_id] for _, recipe_id, _ in updates], sorted(changed))
+
+    for name, recipe_edits in edits.items():
+        if recipe_edits:
+            edit_relations(user, name, recipe_edits, created)
+
+    bump_vocabulary_version(user.pk)
+    return results
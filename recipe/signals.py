@@ -0,0 +1,107 @@
+from weakref import WeakSet
+
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from core.models import Recipe, Tag, Ingredient
+from recipe.cache import bump_vocabulary_version
+from recipe.services import adjust_recipe_counts, release_recipe_counts, release_recipes
+
+RELATION_BY_THROUGH = {Recipe.tags.through: 'tags', Recipe.ingredients.through: 'ingredients'}
+
+# Recipe querysets whose running delete() already released their counts
+released_querysets = WeakSet()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def vocabulary_changed(sender, instance, **kwargs):
+    bump_vocabulary_version(instance.user_id)
+
+
+@receiver(post_init, sender=Tag)
+@receiver(post_init, sender=Ingredient)
+def remember_name(sender, instance, **kwargs):
+    # From __dict__, so a deferred name is not fetched
+    instance._loaded_name = instance.__dict__.get('name')
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def vocabulary_renamed(sender, instance, created, **kwargs):
+    # Linked recipes render the name, so their validators must change with it
+    name = instance.__dict__.get('name')
+    if not created and name is not None and name != instance._loaded_name:
+        instance.recipes.all().touch()
+    instance._loaded_name = name
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def vocabulary_deleted(sender, instance, **kwargs):
+    # Before the cascade removes the links that find the recipes
+    instance.recipes.all().touch()
+
+
+@receiver(pre_delete, sender=Recipe)
+def recipe_deleted(sender, instance, origin=None, **kwargs):
+    # The cascade deletes the links without m2m_changed; release their counts
+    # first, once for a whole queryset.delete() rather than per recipe
+    if isinstance(origin, QuerySet) and origin.model is Recipe:
+        if origin not in released_querysets:
+            released_querysets.add(origin)
+            release_recipes(origin.values('pk'))
+    else:
+        release_recipes([instance.pk])
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_delete_finished(sender, origin=None, **kwargs):
+    # Every pre_delete of one delete() runs before its first post_delete
+    if isinstance(origin, QuerySet):
+        released_querysets.discard(origin)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_links_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # ``instance`` is the recipe, or the tag/ingredient for reverse changes;
+    # either way its owner's vocabulary changed.
+    if action.startswith('post_'):
+        bump_vocabulary_version(instance.user_id)
+    update_recipe_counts(RELATION_BY_THROUGH[sender], instance, action, reverse, pk_set)
+
+    # Keep Recipe.version/updated_at current for link changes too
+    if reverse:
+        if action == 'pre_clear':
+            instance.recipes.all().touch()
+        elif action in ('post_add', 'post_remove') and pk_set:
+            Recipe.objects.filter(pk__in=pk_set).touch()
+    elif action == 'post_clear' or (action in ('post_add', 'post_remove') and pk_set):
+        Recipe.objects.filter(pk=instance.pk).touch()
+        instance.version += 1
+        instance.updated_at = timezone.now()
+
+
+def update_recipe_counts(field_name, instance, action, reverse, pk_set):
+    """Keep Tag/Ingredient.recipe_count in step with add(), remove() and clear() on either side"""
+    if action == 'post_add' and pk_set:
+        # pk_set only holds the links that were actually created
+        model = Recipe._meta.get_field(field_name).related_model
+        adjust_recipe_counts(model, {instance.pk: len(pk_set)} if reverse else dict.fromkeys(pk_set, 1))
+    elif action == 'pre_remove' and pk_set:
+        # Before the delete, so that only existing links are counted
+        if reverse:
+            release_recipe_counts(field_name, recipe_ids=pk_set, target_ids=[instance.pk])
+        else:
+            release_recipe_counts(field_name, recipe_ids=[instance.pk], target_ids=pk_set)
+    elif action == 'pre_clear':
+        if reverse:
+            release_recipe_counts(field_name, target_ids=[instance.pk])
+        else:
+            release_recipe_counts(field_name, recipe_ids=[instance.pk])
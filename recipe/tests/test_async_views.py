@@ -0,0 +1,103 @@
+import json
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from core.models import User
+from recipe.tests.test_query_budget import seed_recipes
+
+ASYNC_RECIPE_LIST_URL = reverse('async-recipe-list')
+ASYNC_TAGS_LIST_URL = reverse('async-tag-list')
+ASYNC_INGREDIENT_LIST_URL = reverse('async-ingredient-list')
+
+
+class AsyncRecipeViewTests(APITestCase):
+    """The async endpoints answer exactly like their sync counterparts"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='async@example.com', name='Async', password='Testpass123')
+        self.recipes = seed_recipes(self.user)
+        self.auth = {'Authorization': 'Bearer %s' % AccessToken.for_user(self.user)}
+        self.client.force_authenticate(self.user)
+
+    async def sync_get(self, url, params=None):
+        return await sync_to_async(self.client.get)(url, params)
+
+    async def test_recipe_list_matches_sync(self):
+        """Test the async list returns the sync list's pages and links"""
+        params = {'page_size': 4, 'ordering': 'price', 'min_time': 7}
+        res = await self.async_client.get(ASYNC_RECIPE_LIST_URL, params, headers=self.auth)
+        expected = await self.sync_get(reverse('recipe-list'), params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        data = json.loads(res.content)
+        self.assertEqual(data['results'], json.loads(expected.content)['results'])
+        self.assertIn('/api/async/recipe/', data['next'])
+
+    def test_recipe_list_query_budget(self):
+        """Test the async list costs the user lookup plus the sync list's queries"""
+        # Counted from a sync test: the async ORM runs on this thread's connection
+        with self.assertNumQueries(4):
+            res = async_to_sync(self.async_client.get)(ASYNC_RECIPE_LIST_URL, headers=self.auth)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    async def test_invalid_params_rejected(self):
+        """Test validation errors are reported like the sync view"""
+        res = await self.async_client.get(ASYNC_RECIPE_LIST_URL, {'ordering': 'title'}, headers=self.auth)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ordering', json.loads(res.content))
+
+    async def test_requires_token(self):
+        """Test missing or invalid tokens are refused"""
+        res = await self.async_client.get(ASYNC_RECIPE_LIST_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res['WWW-Authenticate'], 'Bearer realm="api"')
+
+        res = await self.async_client.get(ASYNC_RECIPE_LIST_URL, headers={'Authorization': 'Bearer nope'})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_get_only(self):
+        """Test the async endpoints are read-only"""
+        res = await self.async_client.post(ASYNC_RECIPE_LIST_URL, {}, headers=self.auth)
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    async def test_recipe_detail_conditional(self):
+        """Test the async detail shares the sync ETag and answers 304"""
+        recipe = self.recipes[0]
+        url = reverse('async-recipe-detail', args=[recipe.id])
+        res = await self.async_client.get(url, headers=self.auth)
+        expected = await self.sync_get(reverse('recipe-detail', args=[recipe.id]))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(res.content), json.loads(expected.content))
+        self.assertEqual(res['ETag'], expected['ETag'])
+
+        res = await self.async_client.get(url, headers={**self.auth, 'If-None-Match': res['ETag']})
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_recipe_detail_not_found(self):
+        """Test an unknown recipe is a 404"""
+        res = await self.async_client.get(reverse('async-recipe-detail', args=[0]), headers=self.auth)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_vocabulary_lists_share_cache(self):
+        """Test tag and ingredient lists match the sync views and share their ETags"""
+        async_get = async_to_sync(self.async_client.get)
+        # The first request also loads the user, later ones find it cached
+        for queries, async_url, sync_url in ((2, ASYNC_TAGS_LIST_URL, reverse('Tags-list')),
+                                             (1, ASYNC_INGREDIENT_LIST_URL, reverse('ingredient-list'))):
+            # The sync view then answers from the shared response cache
+            with self.assertNumQueries(queries):
+                res = async_get(async_url, headers=self.auth)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            with self.assertNumQueries(0):
+                expected = self.client.get(sync_url)
+            self.assertEqual(json.loads(res.content), json.loads(expected.content))
+            self.assertEqual(res['ETag'], expected['ETag'])
+
+            res = async_get(async_url, headers={**self.auth, 'If-None-Match': res['ETag']})
+            self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
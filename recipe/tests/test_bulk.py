@@ -0,0 +1,108 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import User, Recipe, Tag, Ingredient
+from recipe.services import RecipesNotFound, apply_bulk_operations
+
+RECIPE_BULK_URL = reverse('recipe-bulk')
+
+
+def recipe_payload(i, **extra):
+    payload = {'title': 'Bulk %d' % i, 'time_minutes': 10 + i % 50, 'price': '%d.25' % (i % 90)}
+    payload.update(extra)
+    return payload
+
+
+class RecipeBulkApiTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='bulk@example.com', name='Bulk', password='Testpass123')
+        self.client.force_authenticate(self.user)
+
+    def test_mixed_batch(self):
+        """Test creates, updates and deletes are applied with per-item results"""
+        keep = Recipe.objects.create(user=self.user, title='Keep', time_minutes=5, price='1.00')
+        keep.tags.add(Tag.objects.create(user=self.user, name='Old'))
+        gone = Recipe.objects.create(user=self.user, title='Gone', time_minutes=5, price='1.00')
+
+        res = self.client.post(RECIPE_BULK_URL, {'operations': [
+            {'op': 'create', 'data': recipe_payload(1, tags=[{'name': 'Old'}, {'name': 'New'}])},
+            {'op': 'update', 'id': keep.id, 'data': {'title': 'Kept', 'tags': [{'name': 'New'}]}},
+            {'op': 'delete', 'id': gone.id},
+        ]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        results = res.data['results']
+        self.assertEqual([r['status'] for r in results], ['created', 'updated', 'deleted'])
+        created = Recipe.objects.get(id=results[0]['id'])
+        self.assertEqual(sorted(created.tags.values_list('name', flat=True)), ['New', 'Old'])
+        keep.refresh_from_db()
+        self.assertEqual(keep.title, 'Kept')
+        self.assertEqual(list(keep.tags.values_list('name', flat=True)), ['New'])
+        self.assertFalse(Recipe.objects.filter(id=gone.id).exists())
+        # Existing tags are reused, not duplicated
+        self.assertEqual(Tag.objects.filter(user=self.user, name='Old').count(), 1)
+
+    def test_invalid_item_rolls_back_batch(self):
+        """Test one invalid item rejects the whole batch with its index"""
+        res = self.client.post(RECIPE_BULK_URL, {'operations': [
+            {'op': 'create', 'data': recipe_payload(1)},
+            {'op': 'create', 'data': {'title': 'No time'}},
+        ]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('1', {str(k) for k in res.data['operations']})
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_other_users_recipe_not_found(self):
+        """Test operations on another user's recipe are refused"""
+        other = User.objects.create_user(email='other@example.com', name='Other', password='Testpass123')
+        theirs = Recipe.objects.create(user=other, title='Theirs', time_minutes=5, price='1.00')
+
+        res = self.client.post(RECIPE_BULK_URL, {'operations': [
+            {'op': 'create', 'data': recipe_payload(1)},
+            {'op': 'delete', 'id': theirs.id},
+        ]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(res.data['ids'], [theirs.id])
+        self.assertTrue(Recipe.objects.filter(id=theirs.id).exists())
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+
+    def test_recipe_deleted_before_lock(self):
+        """Test a recipe gone by the time the batch locks it is a not-found, not an error"""
+        recipe = Recipe.objects.create(user=self.user, title='Gone', time_minutes=5, price='1.00')
+        recipe_id = recipe.id
+        recipe.delete()
+
+        with self.assertRaises(RecipesNotFound) as raised:
+            apply_bulk_operations(self.user, [
+                {'op': 'create', 'data': {'title': 'New', 'time_minutes': 5, 'price': '1.00'}},
+                {'op': 'update', 'id': recipe_id, 'data': {'title': 'Renamed'}},
+            ])
+        self.assertEqual(raised.exception.ids, [recipe_id])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_large_batch_round_trips(self):
+        """Test a 1,000 recipe batch takes a handful of queries"""
+        operations = [
+            {'op': 'create', 'data': recipe_payload(
+                i,
+                tags=[{'name': 'Tag %d' % (i % 7)}, {'name': 'Tag %d' % (i % 11)}],
+                ingredients=[{'name': 'Ingredient %d' % (i % 13)}],
+            )}
+            for i in range(1000)
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(RECIPE_BULK_URL, {'operations': operations}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 1000)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 11)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 13)
+        # Backends with a low bind-parameter limit (SQLite) split one bulk
+        # INSERT into several batches; count each statement once.
+        statements = {query['sql'].split(' VALUES ')[0] for query in queries.captured_queries}
+        self.assertLessEqual(len(statements), 10)
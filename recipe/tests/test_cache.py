@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import User, Recipe, Tag, Ingredient
+
+TAGS_LIST_URL = reverse('Tags-list')
+INGREDIENT_LIST_URL = reverse('ingredient-list')
+
+
+class VocabularyCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='cache@example.com', name='Cache', password='Testpass123')
+        Tag.objects.create(user=self.user, name='Vegan')
+        Ingredient.objects.create(user=self.user, name='Salt')
+        self.client.force_authenticate(self.user)
+
+    def test_second_request_served_from_cache(self):
+        """Test the list is only queried once"""
+        for url in (TAGS_LIST_URL, INGREDIENT_LIST_URL):
+            first = self.client.get(url)
+            with self.assertNumQueries(0):
+                second = self.client.get(url)
+            self.assertEqual(second.status_code, status.HTTP_200_OK)
+            self.assertEqual(second.content, first.content)
+            self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_if_none_match_returns_304(self):
+        """Test a matching ETag gets an empty 304"""
+        res = self.client.get(TAGS_LIST_URL)
+        with self.assertNumQueries(0):
+            res = self.client.get(TAGS_LIST_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b'')
+
+    def test_cache_is_per_user(self):
+        """Test users never see each other's cached lists"""
+        self.client.get(TAGS_LIST_URL)
+        other = User.objects.create_user(email='other@example.com', name='Other', password='Testpass123')
+        self.client.force_authenticate(other)
+        res = self.client.get(TAGS_LIST_URL)
+        self.assertEqual(res.data, [])
+
+    def test_writes_invalidate(self):
+        """Test tag, ingredient and recipe writes bump the version"""
+        etag = self.client.get(TAGS_LIST_URL)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(user=self.user, name='Quick')
+        res = self.client.get(TAGS_LIST_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([t['name'] for t in res.data], ['Quick', 'Vegan'])
+
+        etag = res['ETag']
+        recipe = Recipe.objects.create(user=self.user, title='Soup', time_minutes=5, price='1.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.ingredients.add(Ingredient.objects.get(name='Salt'))
+        res = self.client.get(TAGS_LIST_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_recipe_create_invalidates(self):
+        """Test tags created through the recipe API show up"""
+        self.client.get(TAGS_LIST_URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('recipe-create'), {
+                'title': 'Pie', 'time_minutes': 40, 'price': '3.00', 'tags': [{'name': 'Dessert'}],
+            }, format='json')
+        res = self.client.get(TAGS_LIST_URL)
+        self.assertEqual([t['name'] for t in res.data], ['Dessert', 'Vegan'])
@@ -0,0 +1,120 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import User, Recipe, Tag
+
+
+def detail_url(recipe_id):
+    return reverse('recipe-detail', args=[recipe_id])
+
+
+def update_url(recipe_id):
+    return reverse('recipe-update-delete', args=[recipe_id])
+
+
+class RecipeConditionalRequestTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='etag@example.com', name='ETag', password='Testpass123')
+        self.recipe = Recipe.objects.create(user=self.user, title='Soup', time_minutes=5, price='2.00')
+        self.client.force_authenticate(self.user)
+
+    def test_if_none_match_skips_body(self):
+        """Test a current ETag gets a 304 from a single query"""
+        etag = self.client.get(detail_url(self.recipe.id))['ETag']
+        with self.assertNumQueries(1):
+            res = self.client.get(detail_url(self.recipe.id), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b'')
+
+    def test_etag_per_renderer(self):
+        """Test the JSON ETag does not validate another renderer's body"""
+        etag = self.client.get(detail_url(self.recipe.id))['ETag']
+        res = self.client.get(detail_url(self.recipe.id), HTTP_ACCEPT='text/html', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        res = self.client.get(detail_url(self.recipe.id), HTTP_ACCEPT='text/html', HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_if_match_accepts_any_format(self):
+        """Test a write may send the ETag another renderer gave for the same version"""
+        etag = self.client.get(detail_url(self.recipe.id), HTTP_ACCEPT='text/html')['ETag']
+        res = self.client.patch(update_url(self.recipe.id), {'title': 'Stew'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+        res = self.client.patch(update_url(self.recipe.id), {'title': 'Broth'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+    def test_if_modified_since(self):
+        """Test Last-Modified round-trips into a 304"""
+        last_modified = self.client.get(detail_url(self.recipe.id))['Last-Modified']
+        res = self.client.get(detail_url(self.recipe.id), HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_writes_change_etag(self):
+        """Test field and tag changes both produce a new ETag"""
+        etag = self.client.get(detail_url(self.recipe.id))['ETag']
+
+        self.recipe.title = 'Stew'
+        self.recipe.save()
+        res = self.client.get(detail_url(self.recipe.id), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        etag = res['ETag']
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name='Warm'))
+        res = self.client.get(detail_url(self.recipe.id), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_tag_rename_and_delete_change_etag(self):
+        """Test renaming or deleting a linked tag invalidates the recipe's validators"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.recipe.tags.add(tag)
+        etag = self.client.get(detail_url(self.recipe.id))['ETag']
+
+        tag = Tag.objects.get(pk=tag.pk)
+        tag.save()  # unchanged name: no new version
+        res = self.client.get(detail_url(self.recipe.id), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        tag.name = 'Plant'
+        tag.save()
+        res = self.client.get(detail_url(self.recipe.id), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['tags'][0]['name'], 'Plant')
+
+        etag = res['ETag']
+        tag.delete()
+        res = self.client.get(detail_url(self.recipe.id), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['tags'], [])
+
+    def test_if_match_guards_updates(self):
+        """Test a stale If-Match fails with 412 and leaves the recipe alone"""
+        etag = self.client.get(detail_url(self.recipe.id))['ETag']
+
+        res = self.client.patch(update_url(self.recipe.id), {'title': 'First'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+        res = self.client.patch(update_url(self.recipe.id), {'title': 'Second'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.title, 'First')
+
+    def test_if_match_guards_delete(self):
+        """Test a stale If-Match prevents deletion"""
+        res = self.client.delete(update_url(self.recipe.id), HTTP_IF_MATCH='"recipe-%d-0-json"' % self.recipe.id)
+        self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertTrue(Recipe.objects.filter(id=self.recipe.id).exists())
+
+        res = self.client.delete(update_url(self.recipe.id), HTTP_IF_MATCH=self.recipe.etag)
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_update_response_etag_matches_detail(self):
+        """Test the ETag returned by PUT is the one a later GET reports"""
+        res = self.client.put(update_url(self.recipe.id), {
+            'title': 'Stew', 'time_minutes': 10, 'price': '3.00', 'tags': [{'name': 'Warm'}],
+        }, format='json')
+        detail = self.client.get(detail_url(self.recipe.id))
+        self.assertEqual(res['ETag'], detail['ETag'])
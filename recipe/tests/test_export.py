@@ -0,0 +1,67 @@
+import csv
+import io
+import json
+
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import User, Recipe, Tag
+from recipe.rendering import recipe_values, render_recipes
+
+RECIPE_EXPORT_URL = reverse('recipe-export')
+
+
+class RecipeExportTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='export@example.com', name='Export', password='Testpass123')
+        self.client.force_authenticate(self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        for i in range(7):
+            recipe = Recipe.objects.create(
+                user=self.user, title='Recipe, "%d"' % i, description='Line\nbreak',
+                time_minutes=i, price='%d.10' % i,
+            )
+            if i % 2:
+                recipe.tags.add(tag)
+
+    def export(self, **params):
+        with self.settings(RECIPE_EXPORT_CHUNK_SIZE=3):
+            res = self.client.get(RECIPE_EXPORT_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertTrue(res.streaming)
+            # 1 cursor query + tags and ingredients for each of the 3 chunks
+            with self.assertNumQueries(7):
+                return b''.join(res.streaming_content).decode('utf-8')
+
+    def test_ndjson(self):
+        """Test NDJSON lines match the list representation"""
+        body = self.export()
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(rows, render_recipes(list(recipe_values().order_by('id'))))
+
+    def test_csv(self):
+        """Test CSV rows are quoted and flatten tags to names"""
+        body = self.export(output='csv')
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(rows[1]['title'], 'Recipe, "1"')
+        self.assertEqual(rows[1]['description'], 'Line\nbreak')
+        self.assertEqual(rows[1]['tags'], 'Vegan')
+        self.assertEqual(rows[0]['tags'], '')
+
+    def test_filters_apply(self):
+        """Test list filters narrow the export"""
+        res = self.client.get(RECIPE_EXPORT_URL, {'min_time': 5})
+        lines = b''.join(res.streaming_content).splitlines()
+        self.assertEqual(len(lines), 2)
+
+    def test_any_accept_header(self):
+        """Test clients asking for text/csv are not refused by content negotiation"""
+        res = self.client.get(RECIPE_EXPORT_URL, {'output': 'csv'}, HTTP_ACCEPT='text/csv')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'text/csv; charset=utf-8')
+
+    def test_unknown_output(self):
+        """Test an unsupported format is rejected"""
+        res = self.client.get(RECIPE_EXPORT_URL, {'output': 'xml'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,61 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import User, Recipe, Tag, Ingredient
+
+RECIPE_FACETS_URL = reverse('recipe-facets')
+
+
+class RecipeFacetsTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='facets@example.com', name='Facets', password='Testpass123')
+        self.client.force_authenticate(self.user)
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.dessert = Tag.objects.create(user=self.user, name='Dessert')
+        sugar = Ingredient.objects.create(user=self.user, name='Sugar')
+
+        for i, (price, minutes, tags) in enumerate([
+            ('2.00', 10, [self.vegan, self.dessert]),
+            ('7.50', 20, [self.vegan]),
+            ('12.00', 45, [self.dessert]),
+            ('60.00', 200, []),
+        ]):
+            recipe = Recipe.objects.create(
+                user=self.user, title='Cake %d' % i, time_minutes=minutes, price=price
+            )
+            recipe.tags.add(*tags)
+            if tags:
+                recipe.ingredients.add(sugar)
+
+    def test_facets(self):
+        """Test counts and histograms in a fixed number of queries"""
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPE_FACETS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['count'], 4)
+        self.assertEqual(
+            [(t['name'], t['count']) for t in res.data['tags']],
+            [('Dessert', 2), ('Vegan', 2)]
+        )
+        self.assertEqual(res.data['ingredients'][0]['count'], 3)
+        self.assertEqual([b['count'] for b in res.data['price']], [1, 1, 1, 0, 1])
+        self.assertEqual(res.data['price'][-1], {'min': '50', 'max': None, 'count': 1})
+        self.assertEqual([b['count'] for b in res.data['time_minutes']], [1, 1, 1, 0, 1])
+
+    def test_facets_follow_filters(self):
+        """Test facets are computed over the filtered recipes only"""
+        res = self.client.get(RECIPE_FACETS_URL, {'tags': self.vegan.id, 'max_price': '5'})
+        self.assertEqual(res.data['count'], 1)
+        self.assertEqual(
+            {t['name']: t['count'] for t in res.data['tags']},
+            {'Vegan': 1, 'Dessert': 1}
+        )
+
+    def test_facets_follow_search(self):
+        """Test ?q= narrows the facets like the list"""
+        res = self.client.get(RECIPE_FACETS_URL, {'q': 'Cake'})
+        self.assertEqual(res.data['count'], 4)
+        res = self.client.get(RECIPE_FACETS_URL, {'q': 'pie'})
+        self.assertEqual(res.data['count'], 0)
+        self.assertEqual(res.data['tags'], [])
@@ -0,0 +1,84 @@
+import json
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from core.models import User
+from recipe.tests.test_query_budget import seed_recipes
+
+RECIPE_LIST_URL = reverse('recipe-list')
+
+
+def detail_url(recipe_id):
+    return reverse('recipe-detail', args=[recipe_id])
+
+
+class RecipeFieldsetTests(APITestCase):
+    """?fields= / ?expand= trim the output and the queries behind it"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='fields@example.com', name='Fields', password='Testpass123')
+        self.recipes = seed_recipes(self.user)
+        self.client.force_authenticate(self.user)
+
+    def test_list_scalar_fields_only(self):
+        """Test a compact list skips description and every relation query"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPE_LIST_URL, {'fields': 'id,title,price'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(res.data['results'][0]), ['id', 'title', 'price'])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('description', queries[0]['sql'])
+
+    def test_expand_adds_relations(self):
+        with self.assertNumQueries(2):
+            res = self.client.get(RECIPE_LIST_URL, {'fields': 'title', 'expand': 'tags'})
+        self.assertEqual(list(res.data['results'][0]), ['title', 'tags'])
+        self.assertEqual(len(res.data['results'][0]['tags']), 4)
+
+    def test_fields_in_serializer_order(self):
+        res = self.client.get(detail_url(self.recipes[0].id), {'fields': 'ingredients,price,id'})
+        self.assertEqual(list(res.data), ['id', 'price', 'ingredients'])
+        self.assertEqual(res.data['price'], '0.50')
+
+    def test_default_is_complete(self):
+        full = self.client.get(detail_url(self.recipes[0].id))
+        listed = self.client.get(detail_url(self.recipes[0].id), {'expand': 'tags'})
+        self.assertEqual(listed.data, full.data)
+        self.assertIn('ingredients', full.data)
+
+    def test_cursor_without_sort_field(self):
+        """Test paging by price works when price is not returned"""
+        params = {'fields': 'title', 'ordering': 'price', 'page_size': 5}
+        first = self.client.get(RECIPE_LIST_URL, params)
+        second = self.client.get(first.data['next'])
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        full = self.client.get(RECIPE_LIST_URL, {'ordering': 'price', 'page_size': 10})
+        self.assertEqual(
+            [r['title'] for r in first.data['results'] + second.data['results']],
+            [r['title'] for r in full.data['results']],
+        )
+
+    def test_unknown_field(self):
+        for params, param in (({'fields': 'id,secret'}, 'fields'), ({'fields': 'id', 'expand': 'title'}, 'expand')):
+            res = self.client.get(RECIPE_LIST_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(param, res.data)
+
+    async def test_async_views_match(self):
+        auth = {'Authorization': 'Bearer %s' % AccessToken.for_user(self.user)}
+        params = {'fields': 'id,title', 'expand': 'ingredients'}
+        res = await self.async_client.get(reverse('async-recipe-list'), params, headers=auth)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(json.loads(res.content)['results'][0]), ['id', 'title', 'ingredients'])
+
+        url = reverse('async-recipe-detail', args=[self.recipes[0].id])
+        res = await self.async_client.get(url, {'fields': 'nope'}, headers=auth)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
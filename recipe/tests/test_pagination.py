@@ -0,0 +1,77 @@
+from decimal import Decimal
+
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import User, Recipe
+
+RECIPE_LIST_URL = reverse('recipe-list')
+
+
+class RecipePaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='pager@example.com', name='Pager', password='Testpass123')
+        self.client.force_authenticate(self.user)
+        # Duplicate prices and times so tie-breaking on id is exercised
+        for i in range(7):
+            Recipe.objects.create(
+                user=self.user,
+                title='Recipe %d' % i,
+                time_minutes=10 * (i % 3),
+                price=Decimal('5.00') + (i % 2),
+            )
+
+    def walk(self, url, key='next'):
+        """Follow cursor links and return every id seen, page by page"""
+        pages = []
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append([r['id'] for r in res.data['results']])
+            url = res.data[key]
+        return pages
+
+    def test_default_ordering_newest_first(self):
+        """Test recipes are paged by descending id"""
+        pages = self.walk(RECIPE_LIST_URL + '?page_size=3')
+        expected = list(Recipe.objects.order_by('-id').values_list('id', flat=True))
+        self.assertEqual([len(p) for p in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_sort_options_are_stable(self):
+        """Test each ordering visits every recipe exactly once in order"""
+        for ordering in ('price', '-price', 'time_minutes', '-time_minutes', 'id'):
+            field = ordering.lstrip('-')
+            prefix = '-' if ordering.startswith('-') else ''
+            expected = list(
+                Recipe.objects.order_by(prefix + field, prefix + 'id').values_list('id', flat=True)
+            )
+            pages = self.walk(RECIPE_LIST_URL + '?page_size=2&ordering=' + ordering)
+            self.assertEqual(sum(pages, []), expected, ordering)
+
+    def test_previous_link_returns_same_pages(self):
+        """Test walking backwards yields the pages seen going forwards"""
+        forward = self.walk(RECIPE_LIST_URL + '?page_size=2&ordering=price')
+        res = self.client.get(RECIPE_LIST_URL + '?page_size=2&ordering=price')
+        url = res.data['next']
+        while url:
+            res = self.client.get(url)
+            url = res.data['next']
+        last_previous = res.data['previous']
+        backward = self.walk(last_previous, key='previous')
+        self.assertEqual(list(reversed(backward)), forward[:-1])
+
+    def test_invalid_cursor(self):
+        """Test a tampered cursor is rejected"""
+        res = self.client.get(RECIPE_LIST_URL + '?cursor=not-a-cursor')
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_ordering(self):
+        """Test an unsupported ordering is rejected"""
+        res = self.client.get(RECIPE_LIST_URL + '?ordering=title')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_page_size(self):
+        """Test a non-positive page_size is rejected"""
+        res = self.client.get(RECIPE_LIST_URL + '?page_size=0')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
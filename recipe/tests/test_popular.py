@@ -0,0 +1,181 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Count
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import User, Recipe, Tag, Ingredient
+from recipe.services import reconcile_recipe_counts
+from recipe.tests.test_bulk import recipe_payload
+
+TAG_POPULAR_URL = reverse('tag-popular')
+INGREDIENT_POPULAR_URL = reverse('ingredient-popular')
+
+
+class RecipeCountTests(APITestCase):
+    """Tag/Ingredient.recipe_count follows every way recipes gain or lose links"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='counts@example.com', name='Counts', password='Testpass123')
+        self.client.force_authenticate(self.user)
+
+    def assertCountsCorrect(self):
+        for model in (Tag, Ingredient):
+            actual = dict(model.objects.annotate(n=Count('recipes')).values_list('pk', 'n'))
+            stored = dict(model.objects.values_list('pk', 'recipe_count'))
+            self.assertEqual(stored, actual, model.__name__)
+
+    def counts(self, model=Tag):
+        return dict(model.objects.filter(user=self.user).values_list('name', 'recipe_count'))
+
+    def create(self, i, tags=(), ingredients=()):
+        res = self.client.post(reverse('recipe-create'), recipe_payload(
+            i, tags=[{'name': name} for name in tags], ingredients=[{'name': name} for name in ingredients],
+        ), format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res.data['id']
+
+    def test_create_update_delete(self):
+        first = self.create(1, tags=['Quick', 'Vegan'], ingredients=['Salt'])
+        self.create(2, tags=['Quick'], ingredients=['Salt', 'Onion'])
+        self.assertEqual(self.counts(), {'Quick': 2, 'Vegan': 1})
+        self.assertEqual(self.counts(Ingredient), {'Salt': 2, 'Onion': 1})
+
+        url = reverse('recipe-update-delete', args=[first])
+        res = self.client.put(url, recipe_payload(1, tags=[{'name': 'Vegan'}, {'name': 'Dinner'}]), format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.counts(), {'Quick': 1, 'Vegan': 1, 'Dinner': 1})
+
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.counts(), {'Quick': 1, 'Vegan': 0, 'Dinner': 0})
+        self.assertEqual(self.counts(Ingredient), {'Salt': 1, 'Onion': 1})
+        self.assertCountsCorrect()
+
+    def test_bulk(self):
+        keep = self.create(1, tags=['Old'])
+        gone = self.create(2, tags=['Old', 'New'], ingredients=['Salt'])
+        res = self.client.post(reverse('recipe-bulk'), {'operations': [
+            {'op': 'create', 'data': recipe_payload(3, tags=[{'name': 'New'}], ingredients=[{'name': 'Salt'}])},
+            {'op': 'update', 'id': keep, 'data': {'tags': [{'name': 'New'}]}},
+            {'op': 'delete', 'id': gone},
+        ]}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.counts(), {'Old': 0, 'New': 2})
+        self.assertEqual(self.counts(Ingredient), {'Salt': 1})
+        self.assertCountsCorrect()
+
+    def test_related_managers(self):
+        """Test add(), remove() and clear() from either side"""
+        recipe = Recipe.objects.create(user=self.user, title='Soup', time_minutes=5, price='2.00')
+        other = Recipe.objects.create(user=self.user, title='Stew', time_minutes=5, price='2.00')
+        quick, vegan = Tag.objects.create(user=self.user, name='Quick'), Tag.objects.create(user=self.user, name='Vegan')
+
+        recipe.tags.add(quick, vegan)
+        recipe.tags.add(quick)  # already linked
+        quick.recipes.add(other)
+        self.assertEqual(self.counts(), {'Quick': 2, 'Vegan': 1})
+
+        recipe.tags.remove(vegan, vegan)
+        other.tags.remove(vegan)  # not linked
+        self.assertEqual(self.counts(), {'Quick': 2, 'Vegan': 0})
+
+        quick.recipes.remove(other)
+        self.assertEqual(self.counts(), {'Quick': 1, 'Vegan': 0})
+
+        recipe.tags.add(vegan)
+        other.tags.add(quick)
+        recipe.tags.clear()
+        self.assertEqual(self.counts(), {'Quick': 1, 'Vegan': 0})
+        quick.recipes.clear()
+        self.assertEqual(self.counts(), {'Quick': 0, 'Vegan': 0})
+        self.assertCountsCorrect()
+
+    def test_direct_deletes(self):
+        """Test deleting through the ORM, a queryset at a time and by cascade"""
+        for i in range(4):
+            self.create(i, tags=['Quick', 'Vegan'] if i % 2 else ['Quick'], ingredients=['Salt'])
+        Recipe.objects.get(title='Bulk 0').delete()
+        self.assertEqual(self.counts(), {'Quick': 3, 'Vegan': 2})
+
+        recipes = Recipe.objects.filter(tags__name='Vegan')
+        with self.assertNumQueries(6):  # one SELECT, one UPDATE per relation, three DELETEs
+            recipes.delete()
+        self.assertEqual(self.counts(), {'Quick': 1, 'Vegan': 0})
+        self.create(4, tags=['Vegan'])
+        recipes.delete()  # the same queryset again releases again
+        self.assertEqual(self.counts(), {'Quick': 1, 'Vegan': 0})
+        self.assertCountsCorrect()
+
+        other = User.objects.create_user(email='other@example.com', name='Other', password='Testpass123')
+        Recipe.objects.create(user=other, title='Soup', time_minutes=5, price='2.00').tags.add(*Tag.objects.all())
+        self.assertEqual(self.counts(), {'Quick': 2, 'Vegan': 1})
+        other.delete()
+        self.assertEqual(self.counts(), {'Quick': 1, 'Vegan': 0})
+
+    def test_reconcile(self):
+        self.create(1, tags=['Quick', 'Vegan'], ingredients=['Salt'])
+        self.create(2, tags=['Quick'])
+        Tag.objects.filter(name='Quick').update(recipe_count=7)
+        Ingredient.objects.update(recipe_count=0)
+        self.assertEqual(reconcile_recipe_counts(Tag, batch_size=1), 1)
+
+        out = StringIO()
+        call_command('reconcile_recipe_counts', stdout=out)
+        self.assertIn('Fixed 0 tag counts', out.getvalue())
+        self.assertIn('Fixed 1 ingredient counts', out.getvalue())
+        self.assertCountsCorrect()
+
+    def test_drifted_counts_not_negative(self):
+        recipe_id = self.create(1, tags=['Quick'])
+        Tag.objects.update(recipe_count=0)
+        self.client.delete(reverse('recipe-update-delete', args=[recipe_id]))
+        self.assertEqual(self.counts(), {'Quick': 0})
+
+
+class PopularApiTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='popular@example.com', name='Popular', password='Testpass123')
+        other = User.objects.create_user(email='other@example.com', name='Other', password='Testpass123')
+        for user, counts in ((self.user, [('Quick', 5), ('Vegan', 2), ('Dinner', 5), ('Unused', 0)]),
+                             (other, [('Theirs', 9)])):
+            Tag.objects.bulk_create(Tag(user=user, name=name, recipe_count=n) for name, n in counts)
+        Ingredient.objects.create(user=self.user, name='Salt', recipe_count=3)
+        self.client.force_authenticate(self.user)
+
+    def test_popular_tags(self):
+        """Test the user's used tags come most used first, ties by age"""
+        with self.assertNumQueries(1):
+            res = self.client.get(TAG_POPULAR_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(tag['name'], tag['recipe_count']) for tag in res.data],
+            [('Quick', 5), ('Dinner', 5), ('Vegan', 2)],
+        )
+
+        res = self.client.get(TAG_POPULAR_URL, {'limit': 1})
+        self.assertEqual([tag['name'] for tag in res.data], ['Quick'])
+
+    def test_popular_ingredients(self):
+        res = self.client.get(INGREDIENT_POPULAR_URL)
+        self.assertEqual(res.data, [{'id': Ingredient.objects.get().id, 'name': 'Salt', 'recipe_count': 3}])
+
+    def test_cached_until_links_change(self):
+        self.client.get(TAG_POPULAR_URL)
+        with self.assertNumQueries(0):
+            self.client.get(TAG_POPULAR_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = Recipe.objects.create(user=self.user, title='Soup', time_minutes=5, price='2.00')
+            recipe.tags.add(Tag.objects.get(user=self.user, name='Vegan'))
+        res = self.client.get(TAG_POPULAR_URL)
+        self.assertEqual(res.data[-1]['recipe_count'], 3)
+
+    def test_invalid_limit(self):
+        for limit in (0, 101, 'many'):
+            res = self.client.get(TAG_POPULAR_URL, {'limit': limit})
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('limit', res.data)
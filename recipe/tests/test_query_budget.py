@@ -0,0 +1,170 @@
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import User, Recipe, Tag, Ingredient
+
+RECIPE_LIST_URL = reverse('recipe-list')
+RECIPE_CREATE_URL = reverse('recipe-create')
+TAGS_LIST_URL = reverse('Tags-list')
+INGREDIENT_LIST_URL = reverse('ingredient-list')
+RECIPE_BULK_URL = reverse('recipe-bulk')
+RECIPE_FACETS_URL = reverse('recipe-facets')
+
+# Write budgets for the payloads used in the tests below. Writes run in a
+# transaction, which the test case counts as a SAVEPOINT/RELEASE pair.
+# Adding or removing links also costs one recipe_count UPDATE per relation.
+CREATE_BUDGET = 11
+PUT_BUDGET = 10
+PATCH_BUDGET = 6
+PATCH_LINKS_BUDGET = 15
+DELETE_BUDGET = 8
+BULK_BUDGET = 19
+
+
+def seed_recipes(user, count=15, tags_per_recipe=4, ingredients_per_recipe=6):
+    """Create recipes with a realistic spread of shared tags and ingredients"""
+    tags = [Tag.objects.create(user=user, name='Tag %d' % i) for i in range(8)]
+    ingredients = [Ingredient.objects.create(user=user, name='Ingredient %d' % i) for i in range(12)]
+    recipes = []
+    for i in range(count):
+        recipe = Recipe.objects.create(
+            user=user,
+            title='Recipe %d' % i,
+            description='Step by step instructions for recipe %d' % i,
+            time_minutes=5 + i,
+            price='%d.50' % (i % 20),
+        )
+        recipe.tags.add(*[tags[(i + j) % len(tags)] for j in range(tags_per_recipe)])
+        recipe.ingredients.add(
+            *[ingredients[(i + j) % len(ingredients)] for j in range(ingredients_per_recipe)]
+        )
+        recipes.append(recipe)
+    return recipes
+
+
+class RecipeQueryBudgetTests(APITestCase):
+    """
+    Every endpoint in recipe/urls.py has a fixed query budget which must not
+    grow with the number of recipes, tags or ingredients involved.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='budget@example.com', name='Budget', password='Testpass123')
+        other = User.objects.create_user(email='other@example.com', name='Other', password='Testpass123')
+        self.recipes = seed_recipes(self.user)
+        seed_recipes(other, count=5)
+        self.client.force_authenticate(self.user)
+
+    def test_recipe_list(self):
+        """Test a page of recipes costs one query plus one per relation"""
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPE_LIST_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 20)
+        self.assertEqual(len(res.data['results'][0]['tags']), 4)
+
+    def test_recipe_list_filtered_by_tags(self):
+        """Test tag filtering does not add per-row queries"""
+        tag_ids = list(Tag.objects.filter(user=self.user).values_list('id', flat=True)[:2])
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPE_LIST_URL, {'tags': ','.join(str(t) for t in tag_ids)})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_recipe_detail(self):
+        """Test a single recipe costs one query plus one per relation"""
+        url = reverse('recipe-detail', args=[self.recipes[0].id])
+        with self.assertNumQueries(3):
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['ingredients']), 6)
+
+    def test_tag_list(self):
+        """Test listing tags is a single query, then served from cache"""
+        with self.assertNumQueries(1):
+            res = self.client.get(TAGS_LIST_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            self.client.get(TAGS_LIST_URL)
+
+    def test_ingredient_list(self):
+        """Test listing ingredients is a single query, then served from cache"""
+        with self.assertNumQueries(1):
+            res = self.client.get(INGREDIENT_LIST_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            self.client.get(INGREDIENT_LIST_URL)
+
+    def test_recipe_create(self):
+        """Test creating a recipe with tags and ingredients stays in budget"""
+        payload = {
+            'title': 'Budget Stew',
+            'time_minutes': 30,
+            'price': '4.20',
+            'tags': [{'name': 'Tag 1'}, {'name': 'New Tag'}],
+            'ingredients': [{'name': 'Ingredient 1'}, {'name': 'Water'}],
+        }
+        with self.assertNumQueries(CREATE_BUDGET):
+            res = self.client.post(RECIPE_CREATE_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_recipe_put(self):
+        """Test replacing a recipe stays in budget"""
+        url = reverse('recipe-update-delete', args=[self.recipes[0].id])
+        payload = {
+            'title': 'Updated',
+            'time_minutes': 12,
+            'price': '3.00',
+            'tags': [{'name': 'Tag 1'}, {'name': 'Tag 2'}],
+        }
+        with self.assertNumQueries(PUT_BUDGET):
+            res = self.client.put(url, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_recipe_patch(self):
+        """Test patching a scalar field stays in budget"""
+        url = reverse('recipe-update-delete', args=[self.recipes[0].id])
+        with self.assertNumQueries(PATCH_BUDGET):
+            res = self.client.patch(url, {'title': 'Patched'}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_recipe_patch_links(self):
+        """Test adding and removing single links stays in budget"""
+        url = reverse('recipe-update-delete', args=[self.recipes[0].id])
+        payload = {
+            'add_tags': [{'name': 'Tag 7'}], 'remove_tags': [{'name': 'Tag 0'}],
+            'add_ingredients': [{'name': 'Water'}],
+        }
+        with self.assertNumQueries(PATCH_LINKS_BUDGET):
+            res = self.client.patch(url, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_recipe_delete(self):
+        """Test deleting a recipe stays in budget"""
+        url = reverse('recipe-update-delete', args=[self.recipes[0].id])
+        with self.assertNumQueries(DELETE_BUDGET):
+            res = self.client.delete(url)
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_recipe_facets(self):
+        """Test facets cost three aggregate queries"""
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPE_FACETS_URL, {'min_time': 10})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_recipe_bulk(self):
+        """Test a mixed bulk batch stays in budget"""
+        operations = [
+            {'op': 'create', 'data': {'title': 'New %d' % i, 'time_minutes': 5, 'price': '1.00',
+                                      'tags': [{'name': 'Tag 1'}], 'ingredients': [{'name': 'Salt'}]}}
+            for i in range(10)
+        ] + [
+            {'op': 'update', 'id': recipe.id, 'data': {'title': 'Renamed', 'tags': [{'name': 'Tag 2'}]}}
+            for recipe in self.recipes[:5]
+        ] + [
+            {'op': 'delete', 'id': recipe.id} for recipe in self.recipes[5:10]
+        ]
+        with self.assertNumQueries(BULK_BUDGET):
+            res = self.client.post(RECIPE_BULK_URL, {'operations': operations}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -0,0 +1,105 @@
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import User, Recipe, Tag, Ingredient
+from recipe.services import edit_relations
+
+
+def detail_url(recipe_id):
+    return reverse('recipe-update-delete', args=[recipe_id])
+
+
+def names(items):
+    return [{'name': name} for name in items]
+
+
+class RecipeRelationUpdateTests(APITestCase):
+    """PUT/PATCH change tag and ingredient links by the minimal diff"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='links@example.com', name='Links', password='Testpass123')
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(user=self.user, title='Soup', time_minutes=5, price='2.00')
+        self.recipe.tags.add(*[Tag.objects.create(user=self.user, name='Tag %d' % i) for i in range(20)])
+        self.recipe.ingredients.add(Ingredient.objects.create(user=self.user, name='Salt'))
+
+    def links(self, field='tags'):
+        through = getattr(Recipe, field).through
+        return set(through.objects.filter(recipe=self.recipe).values_list('pk', flat=True))
+
+    def tag_names(self):
+        return set(self.recipe.tags.values_list('name', flat=True))
+
+    def test_put_keeps_unchanged_links(self):
+        """Test replacing one of 20 tags deletes one link and inserts one"""
+        before = self.links()
+        wanted = ['Tag %d' % i for i in range(1, 20)] + ['New']
+        payload = {'title': 'Soup', 'time_minutes': 5, 'price': '2.00', 'tags': names(wanted)}
+        res = self.client.put(detail_url(self.recipe.id), payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.tag_names(), set(wanted))
+        after = self.links()
+        self.assertEqual(len(before - after), 1)
+        self.assertEqual(len(after - before), 1)
+
+    def test_put_updates_ingredients(self):
+        payload = {'title': 'Soup', 'time_minutes': 5, 'price': '2.00', 'ingredients': names(['Pepper', 'Water'])}
+        res = self.client.put(detail_url(self.recipe.id), payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(i['name'] for i in res.data['ingredients']), ['Pepper', 'Water'])
+        self.assertEqual(Ingredient.objects.get(name='Salt').recipe_count, 0)
+
+    def test_patch_add_and_remove(self):
+        version = Recipe.objects.get(pk=self.recipe.pk).version
+        res = self.client.patch(detail_url(self.recipe.id), {
+            'add_tags': names(['Tag 0', 'Vegan']), 'remove_tags': names(['Tag 1', 'Unknown']),
+            'remove_ingredients': names(['Salt']),
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.tag_names(), {'Tag %d' % i for i in range(20) if i != 1} | {'Vegan'})
+        self.assertEqual(res.data['ingredients'], [])
+        self.assertNotIn('add_tags', res.data)
+        self.assertFalse(Tag.objects.filter(name='Unknown').exists())
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.version, version + 1)
+
+    def test_patch_without_links_keeps_them(self):
+        before = self.links()
+        res = self.client.patch(detail_url(self.recipe.id), {'title': 'Stew'}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.links(), before)
+
+    def test_invalid_operations(self):
+        url = detail_url(self.recipe.id)
+        for method, payload, field in (
+            ('put', {'title': 'Soup', 'time_minutes': 5, 'price': '2.00', 'add_tags': names(['A'])}, 'add_tags'),
+            ('patch', {'tags': names(['A']), 'add_tags': names(['B'])}, 'tags'),
+            ('patch', {'add_tags': names(['A']), 'remove_tags': names(['A'])}, 'remove_tags'),
+        ):
+            res = getattr(self.client, method)(url, payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(field, res.data)
+        self.assertEqual(len(self.tag_names()), 20)
+
+    def test_bulk_update_add_remove(self):
+        res = self.client.post(reverse('recipe-bulk'), {'operations': [
+            {'op': 'update', 'id': self.recipe.id, 'data': {'add_tags': names(['Vegan']),
+                                                            'remove_tags': names(['Tag 0'])}},
+        ]}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('Vegan', self.tag_names())
+        self.assertNotIn('Tag 0', self.tag_names())
+
+    def test_edit_relations_reports_changed_recipes(self):
+        other = Recipe.objects.create(user=self.user, title='Stew', time_minutes=5, price='2.00')
+        changed = edit_relations(self.user, 'tags', {
+            self.recipe.id: (None, ['Tag 0'], []),  # already linked
+            other.id: (None, ['Tag 0'], []),
+        })
+        self.assertEqual(changed, {other.id})
+        self.assertEqual(Tag.objects.get(name='Tag 0').recipe_count, 2)
@@ -0,0 +1,35 @@
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from core.models import User, Recipe, Tag, Ingredient
+from recipe.rendering import recipe_values, render_recipes
+from recipe.serializers import RecipeSerializer
+
+
+class RecipeRenderingTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(email='render@example.com', name='Render', password='Testpass123')
+        tags = [Tag.objects.create(user=user, name=name) for name in ('Vegan', 'Quick', 'Dessert')]
+        salt = Ingredient.objects.create(user=user, name='Salt')
+        for i, price in enumerate(('0.50', '12.00', '999.99', '7.1')):
+            recipe = Recipe.objects.create(
+                user=user, title='Recipe "%d" é' % i, description='Line one\nLine two',
+                time_minutes=i, price=price, link='https://example.com/%d' % i,
+            )
+            recipe.tags.add(*tags[i % 3:])
+            if i % 2:
+                recipe.ingredients.add(salt)
+
+    def test_output_is_byte_identical(self):
+        """Test the values() path renders exactly what RecipeSerializer renders"""
+        renderer = JSONRenderer()
+        expected = renderer.render(RecipeSerializer(Recipe.objects.with_related().order_by('-id'), many=True).data)
+
+        with self.assertNumQueries(3):
+            fast = renderer.render(render_recipes(list(recipe_values().order_by('-id'))))
+
+        self.assertEqual(fast, expected)
+
+    def test_empty_page(self):
+        """Test an empty page needs no relation queries"""
+        with self.assertNumQueries(0):
+            self.assertEqual(render_recipes([]), [])
@@ -0,0 +1,64 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import User, Recipe
+
+RECIPE_LIST_URL = reverse('recipe-list')
+
+
+class RecipeSearchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='search@example.com', name='Search', password='Testpass123')
+        self.client.force_authenticate(self.user)
+
+        def create(title, description=''):
+            return Recipe.objects.create(
+                user=self.user, title=title, description=description, time_minutes=10, price='5.00'
+            )
+
+        self.title_match = create('Chocolate cake', 'Rich and moist')
+        self.description_match = create('Birthday special', 'A layered cake with cream')
+        self.other = create('Tomato soup', 'Warm and simple')
+
+    def search(self, q, **params):
+        res = self.client.get(RECIPE_LIST_URL, {'q': q, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res
+
+    def test_search_title_and_description(self):
+        """Test matches come from both columns, ranked title first"""
+        res = self.search('cake')
+        ids = [r['id'] for r in res.data['results']]
+        self.assertEqual(ids, [self.title_match.id, self.description_match.id])
+
+    def test_all_terms_must_match(self):
+        """Test multiple terms narrow the result"""
+        res = self.search('layered cake')
+        self.assertEqual([r['id'] for r in res.data['results']], [self.description_match.id])
+
+    def test_index_follows_updates_and_deletes(self):
+        """Test edits and deletes are reflected in search results"""
+        self.other.title = 'Tomato cake'
+        self.other.save()
+        self.title_match.delete()
+        ids = {r['id'] for r in self.search('cake').data['results']}
+        self.assertEqual(ids, {self.other.id, self.description_match.id})
+
+    def test_query_syntax_is_not_interpreted(self):
+        """Test punctuation and operators in user input are harmless"""
+        res = self.search('"cake" OR NEAR( -soup*')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.search('!!!').data['results'], [])
+
+    def test_paginates_by_rank(self):
+        """Test relevance-ordered results page with cursors"""
+        first = self.search('cake', page_size=1)
+        self.assertEqual(first.data['results'][0]['id'], self.title_match.id)
+        second = self.client.get(first.data['next'])
+        self.assertEqual([r['id'] for r in second.data['results']], [self.description_match.id])
+        self.assertIsNone(second.data['next'])
+
+    def test_search_with_explicit_ordering(self):
+        """Test search results can be sorted by another field"""
+        res = self.search('cake', ordering='-id')
+        self.assertEqual([r['id'] for r in res.data['results']], [self.description_match.id, self.title_match.id])
@@ -2,14 +2,20 @@ from asyncio import TaskGroup
 from os import name
 from django.urls import path
 from recipe.views import RecipeListAPIView , RecipeCreateAPIView ,RecipeDetailAPIView, TagListAPIView 
-from .views import TagListAPIView , RecipeUpdateDeleteAPIView , IngredientListAPIView
+from .views import TagListAPIView , RecipeUpdateDeleteAPIView , IngredientListAPIView, RecipeBulkAPIView, RecipeFacetsAPIView, RecipeExportAPIView
+from .views import PopularTagAPIView, PopularIngredientAPIView
 
 urlpatterns = [
     path('recipe/', RecipeListAPIView.as_view(), name='recipe-list'),
     path('recipe/create/',RecipeCreateAPIView.as_view() ,name='recipe-create'),
+    path('recipe/bulk/', RecipeBulkAPIView.as_view(), name='recipe-bulk'),
+    path('recipe/facets/', RecipeFacetsAPIView.as_view(), name='recipe-facets'),
+    path('recipe/export/', RecipeExportAPIView.as_view(), name='recipe-export'),
     path('recipe/<id>/',RecipeDetailAPIView.as_view(),name='recipe-detail'),
     path('tags/' , TagListAPIView.as_view() , name='Tags-list'),
+    path('tags/popular/', PopularTagAPIView.as_view(), name='tag-popular'),
     path('recipes/<int:id>/', RecipeUpdateDeleteAPIView.as_view(), name='recipe-update-delete'),
-    path('ingredients/' , IngredientListAPIView.as_view(),name='ingredient-list')
+    path('ingredients/' , IngredientListAPIView.as_view(),name='ingredient-list'),
+    path('ingredients/popular/', PopularIngredientAPIView.as_view(), name='ingredient-popular'),
     
 ]
@@ -1,49 +1,190 @@
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions , generics
 from core.models import Recipe , Tag , Ingredient
 from recipe.serializers import RecipeSerializer
 from drf_yasg.utils import swagger_auto_schema
-from .serializers import TagListSerializer , IngredientSerializer
+from config.db_routing import keep_read_alias
+from .serializers import TagListSerializer , IngredientSerializer, RecipeBulkSerializer
+from .serializers import PopularIngredientSerializer, PopularQuerySerializer, PopularTagSerializer
+from .services import RecipesNotFound, apply_bulk_operations
+from .cache import cached_user_response
+from .pagination import KeysetCursorPagination, SearchCursorPagination
+from .search import search_recipes
+from .filters import RecipeFilterSerializer, filter_recipes
+from .facets import compute_facets
+from . import export
+from .rendering import FIELDS, RELATION_FIELDS, fieldset, recipe_values, render_recipes
+from .conditional import evaluate_preconditions, validator_headers
 from drf_yasg import openapi
 
-from drf_spectacular.utils import extend_schema, OpenApiParameter
+
+FIELDSET_PARAMETERS = [
+    openapi.Parameter(
+        'fields',
+        openapi.IN_QUERY,
+        description="Comma separated fields to return, e.g. id,title,price (default: all of %s). "
+                    "Only these columns are read." % ', '.join(FIELDS),
+        type=openapi.TYPE_STRING
+    ),
+    openapi.Parameter(
+        'expand',
+        openapi.IN_QUERY,
+        description="Nested relations (%s) to add to ?fields=; relations left out are not queried"
+                    % ', '.join(RELATION_FIELDS),
+        type=openapi.TYPE_STRING
+    ),
+]
 
 
 class RecipeListAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetCursorPagination
 
     @swagger_auto_schema(
         tags=['Get The List Of All Recipes'],
-        operation_description="List all recipes. Use ?tags=1,2 to filter by tag IDs.",
+        operation_description=(
+            "List all recipes, one page at a time. Use ?q= to search titles and descriptions "
+            "(results are ranked by relevance), ?tags=1,2 / ?ingredients=3,4 to filter by "
+            "tag or ingredient IDs (tags_match/ingredients_match=any|all), min_price/max_price "
+            "and min_time/max_time for ranges, ?ordering= to sort and follow the "
+            "`next`/`previous` links to page through."
+        ),
+        query_serializer=RecipeFilterSerializer,
         manual_parameters=[
             openapi.Parameter(
-                'tags',
+                'q',
                 openapi.IN_QUERY,
-                description="Comma separated tag IDs for filtering (e.g: 1,2,3)",
+                description="Full-text search over title and description",
                 type=openapi.TYPE_STRING
-            )
+            ),
+            openapi.Parameter(
+                'ordering',
+                openapi.IN_QUERY,
+                description="Sort order, ties are broken by ID. With ?q= the default is -rank (most relevant first)",
+                type=openapi.TYPE_STRING,
+                enum=list(SearchCursorPagination.orderings),
+                default='-id'
+            ),
+            openapi.Parameter(
+                'page_size',
+                openapi.IN_QUERY,
+                description="Number of recipes per page (max %d)" % KeysetCursorPagination.max_page_size,
+                type=openapi.TYPE_INTEGER
+            ),
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description="Opaque cursor taken from the `next` or `previous` link",
+                type=openapi.TYPE_STRING
+            ),
+            *FIELDSET_PARAMETERS,
         ],
         responses={200: RecipeSerializer(many=True)}
     )
-    
     def get(self, request):
         """
-        List all recipes (all users) + filtering by tags.
+        List all recipes (all users) + search + filtering, paginated by cursor.
         """
-        recipes = Recipe.objects.all().order_by('-id')
+        fields = fieldset(request.query_params)
+        recipes = recipe_values(fields=fields)
+
+        # --- full-text search ---
+        query = request.query_params.get("q", "").strip()
+        if query:
+            recipes = search_recipes(recipes, query)
 
         # --- filtering ---
-        tag_ids = request.query_params.get("tags")
-        if tag_ids:
-            tag_ids = [int(tag) for tag in tag_ids.split(",")]
-            recipes = recipes.filter(tags__id__in=tag_ids).distinct()
+        recipes = filter_recipes(recipes, request.query_params)
 
-        serializer = RecipeSerializer(recipes, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        paginator = (SearchCursorPagination if query else self.pagination_class)()
+        page = paginator.paginate_queryset(recipes, request, view=self)
+        return paginator.get_paginated_response(render_recipes(page, fields))
 
 
 
+class RecipeFacetsAPIView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        tags=['Get The List Of All Recipes'],
+        operation_description=(
+            "Counts for the recipe list sidebar: total, per-tag and per-ingredient counts and "
+            "price/time histograms. Accepts the same ?q= and filter parameters as the list."
+        ),
+        query_serializer=RecipeFilterSerializer,
+        manual_parameters=[
+            openapi.Parameter(
+                'q',
+                openapi.IN_QUERY,
+                description="Full-text search over title and description",
+                type=openapi.TYPE_STRING
+            ),
+        ],
+        responses={200: "Facet counts"}
+    )
+    def get(self, request):
+        """
+        Facets for the recipes the list view would return for the same query.
+        """
+        recipes = Recipe.objects.all()
+
+        query = request.query_params.get("q", "").strip()
+        if query:
+            recipes = search_recipes(recipes, query)
+        recipes = filter_recipes(recipes, request.query_params)
+
+        return Response(compute_facets(recipes), status=status.HTTP_200_OK)
+
+
+class RecipeExportAPIView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def perform_content_negotiation(self, request, force=False):
+        # The body is streamed directly, not rendered; accept any Accept header
+        return super().perform_content_negotiation(request, force=True)
+
+    @swagger_auto_schema(
+        tags=['Export Recipes'],
+        operation_description=(
+            "Stream every recipe as NDJSON (default) or CSV with ?output=csv. "
+            "Accepts the same filter parameters as the list."
+        ),
+        query_serializer=RecipeFilterSerializer,
+        manual_parameters=[
+            openapi.Parameter(
+                'output',
+                openapi.IN_QUERY,
+                description="Export format",
+                type=openapi.TYPE_STRING,
+                enum=list(export.STREAMS),
+                default='ndjson'
+            ),
+        ],
+        responses={200: "NDJSON or CSV stream"}
+    )
+    def get(self, request):
+        """
+        Stream recipes in id order with constant memory.
+        """
+        output = request.query_params.get("output", "ndjson")
+        if output not in export.STREAMS:
+            return Response(
+                {"output": "Must be one of: %s." % ", ".join(export.STREAMS)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        recipes = filter_recipes(recipe_values(), request.query_params)
+        # Consumed after the routing middleware returns; keep its database
+        stream = keep_read_alias(export.STREAMS[output](recipes, settings.RECIPE_EXPORT_CHUNK_SIZE))
+        response = StreamingHttpResponse(stream, content_type=export.CONTENT_TYPES[output])
+        response['Content-Disposition'] = 'attachment; filename="recipes.%s"' % output
+        return response
+
+
 class RecipeCreateAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -64,28 +205,68 @@ class RecipeCreateAPIView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class RecipeBulkAPIView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        tags=['Bulk Recipe Operations'],
+        operation_description=(
+            "Apply a batch of create, update and delete operations on your recipes in one "
+            "transaction. Either every operation is applied or none is."
+        ),
+        request_body=RecipeBulkSerializer,
+        responses={200: "Per-operation results, in request order"}
+    )
+    def post(self, request):
+        """
+        Validate the whole batch first, then apply it with set-based writes.
+        """
+        serializer = RecipeBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        operations = serializer.validated_data['operations']
+
+        try:
+            results = apply_bulk_operations(request.user, operations)
+        except RecipesNotFound as exc:
+            return Response(
+                {"error": "Recipe not found", "ids": exc.ids},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
 class RecipeDetailAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     @swagger_auto_schema(
         tags=['View Recipe Details'],
-        operation_description="Get a single recipe by ID",
-        responses={200: RecipeSerializer}
+        operation_description="Get a single recipe by ID. Supports If-None-Match and If-Modified-Since.",
+        manual_parameters=FIELDSET_PARAMETERS,
+        responses={200: RecipeSerializer, 304: "Not modified"}
     )
     def get(self, request, id):
         """
         Retrieve a single recipe by its ID.
         """
+        fields = fieldset(request.query_params)
         try:
-            recipe = Recipe.objects.get(id=id)
+            recipe = Recipe.objects.values(*fields.columns, 'version', 'updated_at').get(id=id)
         except Recipe.DoesNotExist:
             return Response(
                 {"error": "Recipe not found"},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        serializer = RecipeSerializer(recipe)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # Answer If-None-Match / If-Modified-Since before loading relations
+        not_modified = evaluate_preconditions(request, recipe['id'], recipe['version'], recipe['updated_at'])
+        if not_modified is not None:
+            return not_modified
+
+        return Response(
+            render_recipes([recipe], fields)[0],
+            status=status.HTTP_200_OK,
+            headers=validator_headers(request, recipe['id'], recipe['version'], recipe['updated_at'])
+        )
 
 class TagListAPIView(generics.ListAPIView):
     serializer_class = TagListSerializer
@@ -99,72 +280,86 @@ class TagListAPIView(generics.ListAPIView):
     def get_queryset(self):
         return Tag.objects.filter(user=self.request.user).order_by('name')
 
+    def list(self, request, *args, **kwargs):
+        return cached_user_response(
+            request, 'tags',
+            lambda: list(self.get_serializer(self.get_queryset(), many=True).data)
+        )
+
         
 
 class RecipeUpdateDeleteAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    def update(self, request, id, partial):
+        """
+        Lock the recipe, honour If-Match / If-Unmodified-Since, then update it.
+        """
+        with transaction.atomic():
+            try:
+                recipe = Recipe.objects.select_for_update().get(id=id, user=request.user)
+            except Recipe.DoesNotExist:
+                return Response({"error": "Recipe not found"}, status=404)
+
+            precondition = evaluate_preconditions(request, recipe.pk, recipe.version, recipe.updated_at)
+            if precondition is not None:
+                return precondition
+
+            serializer = RecipeSerializer(
+                recipe,
+                data=request.data,
+                partial=partial,
+                context={'user': request.user}
+            )
+
+            if serializer.is_valid():
+                serializer.save()
+                return Response(
+                    serializer.data,
+                    headers=validator_headers(request, recipe.pk, recipe.version, recipe.updated_at)
+                )
+
+            return Response(serializer.errors, status=400)
+
     @swagger_auto_schema(
         tags=['Update Recipe'],
-        operation_description="Update recipe using PUT",
+        operation_description="Update recipe using PUT. Send If-Match with the recipe's ETag to avoid overwriting newer changes.",
         request_body=RecipeSerializer,
-        responses={200: RecipeSerializer}
+        responses={200: RecipeSerializer, 412: "Recipe was modified since the given ETag"}
     )
     def put(self, request, id):
-        try:
-            recipe = Recipe.objects.get(id=id, user=request.user)
-        except Recipe.DoesNotExist:
-            return Response({"error": "Recipe not found"}, status=404)
-
-        serializer = RecipeSerializer(
-            recipe,
-            data=request.data,
-            context={'user': request.user}
-        )
-
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data)
-
-        return Response(serializer.errors, status=400)
+        return self.update(request, id, partial=False)
 
     @swagger_auto_schema(
         tags=['Update Recipe'],
-        operation_description="Update partial recipe using PATCH",
+        operation_description=(
+            "Update partial recipe using PATCH. Use add_tags/remove_tags and add_ingredients/remove_ingredients "
+            "to change some links without resending the full lists. Send If-Match with the recipe's ETag to "
+            "avoid overwriting newer changes."
+        ),
         request_body=RecipeSerializer,
-        responses={200: RecipeSerializer}
+        responses={200: RecipeSerializer, 412: "Recipe was modified since the given ETag"}
     )
     def patch(self, request, id):
-        try:
-            recipe = Recipe.objects.get(id=id, user=request.user)
-        except Recipe.DoesNotExist:
-            return Response({"error": "Recipe not found"}, status=404)
-
-        serializer = RecipeSerializer(
-            recipe,
-            data=request.data,
-            partial=True,
-            context={'user': request.user}
-        )
-
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data)
-
-        return Response(serializer.errors, status=400)
+        return self.update(request, id, partial=True)
 
     @swagger_auto_schema(
         tags=['Delete Recipe'],
         operation_description="Delete a recipe",
-        responses={204: "No content"}
+        responses={204: "No content", 412: "Recipe was modified since the given ETag"}
     )
     def delete(self, request, id):
-        try:
-            recipe = Recipe.objects.get(id=id, user=request.user)
-        except Recipe.DoesNotExist:
-            return Response({"error": "Recipe not found"}, status=404)
+        with transaction.atomic():
+            try:
+                recipe = Recipe.objects.select_for_update().get(id=id, user=request.user)
+            except Recipe.DoesNotExist:
+                return Response({"error": "Recipe not found"}, status=404)
+
+            precondition = evaluate_preconditions(request, recipe.pk, recipe.version, recipe.updated_at)
+            if precondition is not None:
+                return precondition
 
-        recipe.delete()
+            recipe.delete()
         return Response(status=204)
 
 class IngredientListAPIView(APIView):
@@ -179,12 +374,54 @@ class IngredientListAPIView(APIView):
         """
         List all ingredients for the logged-in user.
         """
-        ingredients = Ingredient.objects.filter(user=request.user).order_by('name')
-        serializer = IngredientSerializer(ingredients, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        def build():
+            ingredients = Ingredient.objects.filter(user=request.user).order_by('name')
+            return list(IngredientSerializer(ingredients, many=True).data)
+
+        return cached_user_response(request, 'ingredients', build)
+
+
+class PopularAPIView(APIView):
+    """The user's tags or ingredients used by most recipes, read from the recipe_count index"""
+    permission_classes = [permissions.IsAuthenticated]
+    model = None
+    cache_name = None
+
+    def popular(self, request):
+        query = PopularQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        limit = query.validated_data['limit']
+
+        def build():
+            rows = self.model.objects.filter(user=request.user, recipe_count__gt=0).order_by('-recipe_count', 'id')
+            return list(rows.values('id', 'name', 'recipe_count')[:limit])
 
+        return cached_user_response(request, '%s:%d' % (self.cache_name, limit), build)
 
 
+class PopularTagAPIView(PopularAPIView):
+    model = Tag
+    cache_name = 'popular-tags'
+
+    @swagger_auto_schema(
+        tags=['Tags'],
+        operation_description="The logged-in user's tags used by most recipes, most used first",
+        query_serializer=PopularQuerySerializer,
+        responses={200: PopularTagSerializer(many=True)}
+    )
+    def get(self, request):
+        return self.popular(request)
 
 
+class PopularIngredientAPIView(PopularAPIView):
+    model = Ingredient
+    cache_name = 'popular-ingredients'
 
+    @swagger_auto_schema(
+        tags=['Get Ingredients List'],
+        operation_description="The logged-in user's ingredients used by most recipes, most used first",
+        query_serializer=PopularQuerySerializer,
+        responses={200: PopularIngredientSerializer(many=True)}
+    )
+    def get(self, request):
+        return self.popular(request)
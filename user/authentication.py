@@ -0,0 +1,73 @@
+"""
+JWT authentication backed by the user cache in ``user.cache``.
+
+Token parsing and signature checks are CPU-only and shared with simplejwt's
+JWTAuthentication. The user lookup is served from the cache, so most requests
+authenticate without a query; the async variant falls back to the async ORM.
+"""
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from .cache import acache_user, aget_cached_user, cache_user, get_cached_user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+
+    def token_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+    def check_user(self, user, validated_token):
+        """The checks simplejwt runs once the user is loaded"""
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+    def get_user(self, validated_token):
+        user_id = self.token_user_id(validated_token)
+        user = get_cached_user(user_id)
+        if user is None:
+            try:
+                user = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist as e:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+            cache_user(user)
+        return self.check_user(user, validated_token)
+
+
+class AsyncJWTAuthentication(CachedJWTAuthentication):
+    """For async views: the same checks, with the user loaded via the async ORM"""
+
+    async def aauthenticate(self, request):
+        """Async ``authenticate``: (user, token), or None without a Bearer header"""
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        user_id = self.token_user_id(validated_token)
+        user = await aget_cached_user(user_id)
+        if user is None:
+            try:
+                user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist as e:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+            await acache_user(user)
+        return self.check_user(user, validated_token)
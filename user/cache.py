@@ -0,0 +1,131 @@
+"""
+Cache of authenticated users, so JWT requests need no user query.
+
+Users are kept in a small per-process LRU for AUTH_USER_CACHE_TTL seconds,
+and optionally in the shared cache named by AUTH_USER_CACHE_ALIAS so new
+processes start warm. Saving or deleting a user evicts it from this
+process's LRU and from the shared cache. Other processes may keep serving
+their local copy until its TTL runs out, so the TTL bounds how long a
+change such as ``is_active = False`` can take to be seen everywhere.
+
+``QuerySet.update()`` sends no signals; call ``invalidate_user`` after it.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+SHARED_KEY = 'user:auth:%s'
+
+
+class LocalUserCache:
+    """
+    Thread-safe LRU of user instances with a per-entry expiry.
+
+    Keys are user ids as strings, the way simplejwt stores them in tokens.
+    """
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        user_id = str(user_id)
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires <= time.monotonic():
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+            return user
+
+    def set(self, user_id, user):
+        ttl = settings.AUTH_USER_CACHE_TTL
+        if ttl <= 0:
+            return
+        user_id = str(user_id)
+        with self.lock:
+            self.entries[user_id] = (user, time.monotonic() + ttl)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > settings.AUTH_USER_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+    def delete(self, user_id):
+        with self.lock:
+            self.entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local_users = LocalUserCache()
+
+
+def get_shared_cache():
+    alias = settings.AUTH_USER_CACHE_ALIAS
+    return caches[alias] if alias else None
+
+
+def get_cached_user(user_id):
+    """A private copy of the cached user, or None"""
+    user = local_users.get(user_id)
+    if user is None:
+        shared = get_shared_cache()
+        if shared is None:
+            return None
+        user = shared.get(SHARED_KEY % user_id)
+        if user is None:
+            return None
+        local_users.set(user_id, user)
+    # Views may modify request.user; never hand out the cached instance
+    return copy.copy(user)
+
+
+def cache_user(user):
+    local_users.set(user.pk, copy.copy(user))
+    shared = get_shared_cache()
+    if shared is not None:
+        shared.set(SHARED_KEY % user.pk, user, settings.AUTH_USER_SHARED_CACHE_TIMEOUT)
+
+
+async def aget_cached_user(user_id):
+    """``get_cached_user`` using the shared cache's async API"""
+    user = local_users.get(user_id)
+    if user is None:
+        shared = get_shared_cache()
+        if shared is None:
+            return None
+        user = await shared.aget(SHARED_KEY % user_id)
+        if user is None:
+            return None
+        local_users.set(user_id, user)
+    return copy.copy(user)
+
+
+async def acache_user(user):
+    local_users.set(user.pk, copy.copy(user))
+    shared = get_shared_cache()
+    if shared is not None:
+        await shared.aset(SHARED_KEY % user.pk, user, settings.AUTH_USER_SHARED_CACHE_TIMEOUT)
+
+
+def invalidate_user(user_id):
+    """
+    Evict the user now and again once the current transaction commits, so a
+    concurrent request cannot re-cache the row as it was before the commit.
+    """
+    def evict():
+        local_users.delete(user_id)
+        shared = get_shared_cache()
+        if shared is not None:
+            shared.delete(SHARED_KEY % user_id)
+    evict()
+    transaction.on_commit(evict)
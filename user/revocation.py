@@ -0,0 +1,123 @@
+"""
+Refresh-token revocation.
+
+Revoked token ids (``jti``) are stored in the RevokedToken table and mirrored
+in a per-process Bloom filter. A refresh whose jti is not in the filter is
+certainly not revoked and needs no query; only filter hits (revoked tokens
+and the rare false positive) are confirmed against the table.
+
+Each process picks up rows added by other workers with one indexed query
+every TOKEN_REVOCATION_RELOAD_INTERVAL seconds, and rebuilds the filter from
+the unexpired rows every TOKEN_REVOCATION_REBUILD_INTERVAL seconds, or sooner
+once it holds more entries than it was sized for.
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+from core.models import RevokedToken
+
+MIN_CAPACITY = 1024
+
+
+class BloomFilter:
+    """Bit array with ``hashes`` positions per item (double hashing of one blake2b digest)"""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(capacity, MIN_CAPACITY)
+        self.size = math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(item))
+
+
+class RevocationList:
+    """The process's view of RevokedToken, reloaded on demand"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.bloom = None
+        self.last_id = 0
+        self.loaded_at = self.built_at = float('-inf')
+
+    def reload_if_due(self):
+        now = time.monotonic()
+        bloom = self.bloom
+        rebuild = bloom is None or bloom.count > bloom.capacity
+        rebuild = rebuild or now - self.built_at >= settings.TOKEN_REVOCATION_REBUILD_INTERVAL
+        if not rebuild and now - self.loaded_at < settings.TOKEN_REVOCATION_RELOAD_INTERVAL:
+            return
+        # One thread reloads; the others keep using the current filter
+        if not self.lock.acquire(blocking=self.bloom is None):
+            return
+        try:
+            if rebuild:
+                self.rebuild(now)
+            else:
+                self.load_new(now)
+        finally:
+            self.lock.release()
+
+    def rebuild(self, now):
+        rows = list(RevokedToken.objects.filter(expires_at__gt=timezone.now()).values_list('id', 'jti'))
+        bloom = BloomFilter(2 * len(rows), settings.TOKEN_REVOCATION_FALSE_POSITIVE_RATE)
+        for _, jti in rows:
+            bloom.add(jti)
+        self.bloom = bloom
+        self.last_id = max((pk for pk, _ in rows), default=self.last_id)
+        self.loaded_at = self.built_at = now
+
+    def load_new(self, now):
+        for pk, jti in RevokedToken.objects.filter(id__gt=self.last_id).order_by('id').values_list('id', 'jti'):
+            self.bloom.add(jti)
+            self.last_id = pk
+        self.loaded_at = now
+
+    def add(self, jti):
+        if self.bloom is not None:
+            self.bloom.add(jti)
+
+    def __contains__(self, jti):
+        self.reload_if_due()
+        if jti not in self.bloom:
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+
+revoked_tokens = RevocationList()
+
+
+def is_revoked(token):
+    return token[api_settings.JTI_CLAIM] in revoked_tokens
+
+
+def revoke(token):
+    """Revoke a validated refresh token; revoking it twice is harmless"""
+    jti = token[api_settings.JTI_CLAIM]
+    RevokedToken.objects.bulk_create(
+        [RevokedToken(jti=jti, expires_at=datetime_from_epoch(token['exp']))],
+        ignore_conflicts=True,
+    )
+    revoked_tokens.add(jti)
@@ -2,6 +2,7 @@ from rest_framework import serializers
 from core.models import User
 from django.contrib.auth import authenticate
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
 
 class UserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=8)
@@ -59,3 +60,13 @@ class LoginSerializer(serializers.Serializer):
                 'is_staff': instance.is_staff,
             }
         }
+
+
+class LogoutSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
+
+    def validate_refresh(self, value):
+        try:
+            return RefreshToken(value)
+        except TokenError:
+            raise serializers.ValidationError('Invalid refresh token.')
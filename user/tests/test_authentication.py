@@ -0,0 +1,77 @@
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from core.models import User
+from user.cache import local_users
+
+USER_UPDATE_URL = reverse('user-update')
+TAGS_LIST_URL = reverse('Tags-list')
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        local_users.clear()
+        self.user = User.objects.create_user(email='cached@example.com', name='Cached', password='Testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer %s' % AccessToken.for_user(self.user))
+
+    def test_repeat_requests_skip_user_query(self):
+        """Test the user is loaded once, then served from the cache"""
+        with self.assertNumQueries(2):
+            res = self.client.get(TAGS_LIST_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # Tags are cached too, so the request needs no queries at all
+        with self.assertNumQueries(0):
+            res = self.client.get(TAGS_LIST_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_user_update_invalidates(self):
+        """Test changes made through the update endpoint are seen at once"""
+        self.client.get(TAGS_LIST_URL)
+        res = self.client.patch(USER_UPDATE_URL, {'name': 'Renamed'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.patch(USER_UPDATE_URL, {'email': 'renamed@example.com'})
+        self.assertEqual(res.data['name'], 'Renamed')
+
+    def test_deactivated_user_rejected(self):
+        """Test flipping is_active locks the user out immediately"""
+        self.assertEqual(self.client.get(TAGS_LIST_URL).status_code, status.HTTP_200_OK)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(TAGS_LIST_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cached_user_is_a_copy(self):
+        """Test changes to request.user do not leak into the cache"""
+        self.client.get(TAGS_LIST_URL)
+        user = local_users.get(self.user.pk)
+        res = self.client.patch(USER_UPDATE_URL, {'name': 'Changed'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(user.name, 'Cached')
+
+    @override_settings(AUTH_USER_CACHE_TTL=0)
+    def test_disabled_local_cache(self):
+        """Test a zero TTL queries the user on every request"""
+        self.client.get(TAGS_LIST_URL)
+        with self.assertNumQueries(1):
+            self.client.get(TAGS_LIST_URL)
+
+    @override_settings(AUTH_USER_CACHE_ALIAS='default')
+    def test_shared_cache(self):
+        """Test another process (empty local cache) finds the user in the shared cache"""
+        self.client.get(TAGS_LIST_URL)
+        local_users.clear()
+        with self.assertNumQueries(0):
+            res = self.client.get(TAGS_LIST_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        # Saving the user evicts the shared entry as well
+        self.user.save()
+        local_users.clear()
+        with self.assertNumQueries(1):
+            self.client.get(TAGS_LIST_URL)
@@ -0,0 +1,57 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import User
+from user.revocation import revoked_tokens
+
+USER_CREATE_URL = reverse('user-create')
+USER_LOGIN_URL = reverse('user-login')
+USER_UPDATE_URL = reverse('user-update')
+USER_LOGOUT_URL = reverse('user-logout')
+
+
+class UserQueryBudgetTests(APITestCase):
+    """Every endpoint in user/urls.py has a fixed query budget"""
+
+    def setUp(self):
+        User.objects.bulk_create(
+            User(email='member%d@example.com' % i, name='Member %d' % i) for i in range(50)
+        )
+        self.user = User.objects.create_user(email='budget@example.com', name='Budget', password='Testpass123')
+        revoked_tokens.clear()
+
+    def test_user_create(self):
+        """Test signing up costs a uniqueness check and an insert"""
+        payload = {'email': 'new@example.com', 'name': 'New', 'password': 'Testpass123'}
+        with self.assertNumQueries(2):
+            res = self.client.post(USER_CREATE_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_login(self):
+        """Test logging in costs a single user lookup"""
+        payload = {'email': 'budget@example.com', 'password': 'Testpass123'}
+        with self.assertNumQueries(1):
+            res = self.client.post(USER_LOGIN_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_refresh(self):
+        """Test refreshing an access token needs no queries once revocations are loaded"""
+        res = self.client.post(USER_LOGIN_URL, {'email': 'budget@example.com', 'password': 'Testpass123'})
+        revoked_tokens.reload_if_due()
+        with self.assertNumQueries(0):
+            res = self.client.post(USER_LOGIN_URL, {'refresh': res.data['refresh']})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_logout(self):
+        """Test revoking a refresh token costs a single insert"""
+        res = self.client.post(USER_LOGIN_URL, {'email': 'budget@example.com', 'password': 'Testpass123'})
+        with self.assertNumQueries(1):
+            res = self.client.post(USER_LOGOUT_URL, {'refresh': res.data['refresh']})
+        self.assertEqual(res.status_code, status.HTTP_205_RESET_CONTENT)
+
+    def test_user_update(self):
+        """Test renaming the logged-in user costs a single update"""
+        self.client.force_authenticate(self.user)
+        with self.assertNumQueries(1):
+            res = self.client.patch(USER_UPDATE_URL, {'name': 'Renamed'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -0,0 +1,92 @@
+import uuid
+from io import StringIO
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.models import User, RevokedToken
+from user.revocation import BloomFilter, revoked_tokens
+
+USER_LOGIN_URL = reverse('user-login')
+USER_LOGOUT_URL = reverse('user-logout')
+
+
+class BloomFilterTests(SimpleTestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(2000, 0.01)
+        items = [uuid.uuid4().hex for _ in range(2000)]
+        for item in items:
+            bloom.add(item)
+        self.assertTrue(all(item in bloom for item in items))
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(2000, 0.01)
+        for _ in range(2000):
+            bloom.add(uuid.uuid4().hex)
+        false_positives = sum(uuid.uuid4().hex in bloom for _ in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class RefreshRevocationTests(APITestCase):
+    def setUp(self):
+        revoked_tokens.clear()
+        self.user = User.objects.create_user(email='revoke@example.com', name='Revoke', password='Testpass123')
+        self.refresh = str(RefreshToken.for_user(self.user))
+
+    def refresh_access(self, token=None):
+        return self.client.post(USER_LOGIN_URL, {'refresh': token or self.refresh})
+
+    def test_logout_revokes_refresh_token(self):
+        """Test a logged out refresh token can no longer be used"""
+        self.assertEqual(self.refresh_access().status_code, status.HTTP_200_OK)
+
+        res = self.client.post(USER_LOGOUT_URL, {'refresh': self.refresh})
+        self.assertEqual(res.status_code, status.HTTP_205_RESET_CONTENT)
+
+        self.assertEqual(self.refresh_access().status_code, status.HTTP_400_BAD_REQUEST)
+        # The user's other sessions keep working
+        other = str(RefreshToken.for_user(self.user))
+        self.assertEqual(self.refresh_access(other).status_code, status.HTTP_200_OK)
+
+    def test_logout_twice(self):
+        """Test revoking an already revoked token is harmless"""
+        self.client.post(USER_LOGOUT_URL, {'refresh': self.refresh})
+        res = self.client.post(USER_LOGOUT_URL, {'refresh': self.refresh})
+        self.assertEqual(res.status_code, status.HTTP_205_RESET_CONTENT)
+        self.assertEqual(RevokedToken.objects.count(), 1)
+
+    def test_logout_invalid_token(self):
+        res = self.client.post(USER_LOGOUT_URL, {'refresh': 'not-a-token'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def revoke_elsewhere(self, token):
+        """Revoke a token the way another worker would: the row only"""
+        RevokedToken.objects.create(jti=token['jti'], expires_at=timezone.now() + timedelta(days=1))
+
+    def test_other_workers_revocations_picked_up(self):
+        """Test revocations by other processes apply after the reload interval"""
+        revoked_tokens.reload_if_due()
+        self.revoke_elsewhere(RefreshToken(self.refresh))
+
+        with override_settings(TOKEN_REVOCATION_RELOAD_INTERVAL=60):
+            # Not reloaded yet: answered from the filter, without a query
+            with self.assertNumQueries(0):
+                self.assertEqual(self.refresh_access().status_code, status.HTTP_200_OK)
+
+        with override_settings(TOKEN_REVOCATION_RELOAD_INTERVAL=0):
+            self.assertEqual(self.refresh_access().status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rebuild_skips_expired(self):
+        """Test a rebuild loads only unexpired revocations, and purge deletes the rest"""
+        RevokedToken.objects.create(jti='expired', expires_at=timezone.now() - timedelta(seconds=1))
+        self.revoke_elsewhere(RefreshToken(self.refresh))
+        revoked_tokens.reload_if_due()
+        self.assertEqual(revoked_tokens.bloom.count, 1)
+
+        call_command('purge_revoked_tokens', stdout=StringIO())
+        self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)), [RefreshToken(self.refresh)['jti']])
@@ -0,0 +1,97 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import User
+from user.throttling import get_backend, parse_rate, take
+
+USER_LOGIN_URL = reverse('user-login')
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('6/min'), (6, 0.1))
+        self.assertEqual(parse_rate('2/s'), (2, 2))
+
+    def test_burst_then_refill(self):
+        """Test a bucket allows its capacity at once, then refills over time"""
+        state = None
+        for _ in range(3):
+            state, wait = take(state, 100.0, 3, 0.5)
+            self.assertEqual(wait, 0)
+        state, wait = take(state, 100.0, 3, 0.5)
+        self.assertEqual(wait, 2.0)
+        # Two seconds later one token is back
+        state, wait = take(state, 102.0, 3, 0.5)
+        self.assertEqual(wait, 0)
+
+
+# The IP bucket refills hourly, so slow hashing cannot refill it mid-test
+@override_settings(LOGIN_THROTTLE_RATES={'ip': '10/h', 'email': '3/min'})
+class LoginThrottleTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        get_backend().clear()
+        self.user = User.objects.create_user(email='victim@example.com', name='Victim', password='Testpass123')
+
+    def login(self, email, password='wrong-password', **extra):
+        return self.client.post(USER_LOGIN_URL, {'email': email, 'password': password}, **extra)
+
+    def test_email_limit_rejects_before_hashing(self):
+        """Test over-limit attempts for one email get 429 without a lookup or hash"""
+        for _ in range(3):
+            self.assertEqual(self.login('victim@example.com').status_code, status.HTTP_400_BAD_REQUEST)
+
+        with mock.patch('django.contrib.auth.hashers.check_password') as check_password:
+            with self.assertNumQueries(0):
+                res = self.login('VICTIM@example.com', 'Testpass123')
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+        check_password.assert_not_called()
+
+        # Other accounts are unaffected
+        self.assertEqual(self.login('other@example.com').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ip_limit(self):
+        """Test one client cycling through emails is limited by IP"""
+        for i in range(10):
+            self.login('user%d@example.com' % i, REMOTE_ADDR='203.0.113.9')
+        self.assertEqual(
+            self.login('user99@example.com', REMOTE_ADDR='203.0.113.9').status_code,
+            status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+        self.assertEqual(
+            self.login('user99@example.com', REMOTE_ADDR='198.51.100.1').status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+    def test_ip_limit_ignores_forwarded_for(self):
+        """Test rotating X-Forwarded-For values from one peer share its IP bucket"""
+        for i in range(10):
+            self.login('user%d@example.com' % i, REMOTE_ADDR='203.0.113.9', HTTP_X_FORWARDED_FOR='10.0.0.%d' % i)
+        res = self.login('user99@example.com', REMOTE_ADDR='203.0.113.9', HTTP_X_FORWARDED_FOR='10.0.1.1')
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_refresh_not_throttled(self):
+        """Test refreshing tokens does not spend login attempts"""
+        refresh = self.login('victim@example.com', 'Testpass123').data['refresh']
+        for _ in range(5):
+            res = self.client.post(USER_LOGIN_URL, {'refresh': refresh})
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.login('victim@example.com', 'Testpass123').status_code, status.HTTP_200_OK)
+
+    @override_settings(LOGIN_THROTTLE_BACKEND='user.throttling.CacheBucketBackend')
+    def test_shared_backend(self):
+        """Test the cache backend enforces the same limits"""
+        for _ in range(3):
+            self.login('victim@example.com')
+        self.assertEqual(self.login('victim@example.com').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_email_case_insensitive_login(self):
+        """Test users can log in whatever the case of their email"""
+        res = self.login('Victim@Example.COM', 'Testpass123')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['user']['id'], self.user.id)
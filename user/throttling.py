@@ -0,0 +1,126 @@
+"""
+Token-bucket throttling of login attempts.
+
+Each client IP and each email address gets a bucket of N attempts, refilled
+evenly over the rate's period (LOGIN_THROTTLE_RATES, e.g. ``'5/min'``). DRF
+checks throttles before the view runs, so rejected attempts never reach the
+password hasher.
+
+Buckets live in LOGIN_THROTTLE_BACKEND: ``LocalBucketBackend`` keeps them in
+process memory, ``CacheBucketBackend`` in a shared Django cache so the limits
+hold across workers.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'5/min' -> (capacity 5, refill of 5/60 tokens per second)"""
+    count, period = rate.split('/')
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+def take(state, now, capacity, refill):
+    """
+    Take one token from a bucket.
+
+    ``state`` is (tokens, timestamp) or None for a full bucket. Returns the new
+    state and the seconds to wait before a token is available (0 = allowed).
+    """
+    tokens, updated = state if state is not None else (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * refill)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) / refill
+
+
+class LocalBucketBackend:
+    """Buckets in process memory, least recently used evicted past ``max_keys``"""
+    max_keys = 100000
+
+    def __init__(self):
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def consume(self, key, capacity, refill):
+        with self.lock:
+            state, wait = take(self.buckets.get(key), time.time(), capacity, refill)
+            self.buckets[key] = state
+            self.buckets.move_to_end(key)
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class CacheBucketBackend:
+    """
+    Buckets in the LOGIN_THROTTLE_CACHE_ALIAS cache, shared by all workers.
+
+    The read-modify-write is not atomic; concurrent attempts on one key can
+    each take the last token, which bounds the error by the worker count.
+    """
+    key_prefix = 'login-throttle:'
+
+    def consume(self, key, capacity, refill):
+        cache = caches[settings.LOGIN_THROTTLE_CACHE_ALIAS]
+        state, wait = take(cache.get(self.key_prefix + key), time.time(), capacity, refill)
+        # Once the bucket would be full again the entry can simply expire
+        cache.set(self.key_prefix + key, state, int(capacity / refill) + 1)
+        return wait
+
+    def clear(self):
+        caches[settings.LOGIN_THROTTLE_CACHE_ALIAS].clear()
+
+
+@lru_cache(maxsize=None)
+def load_backend(path):
+    return import_string(path)()
+
+
+def get_backend():
+    return load_backend(settings.LOGIN_THROTTLE_BACKEND)
+
+
+class LoginThrottle(BaseThrottle):
+    """
+    Throttle password logins by client IP and by email.
+
+    Refresh-token requests do no hashing and are not throttled.
+    """
+
+    def allow_request(self, request, view):
+        self.wait_time = 0
+        if request.data.get('refresh'):
+            return True
+
+        # The peer address: get_ident() would take X-Forwarded-For, which the
+        # client sets freely unless NUM_PROXIES is configured
+        keys = [('ip', request.META.get('REMOTE_ADDR', ''))]
+        email = request.data.get('email')
+        if isinstance(email, str) and email:
+            keys.append(('email', email.strip().lower()))
+
+        backend = get_backend()
+        for scope, ident in keys:
+            capacity, refill = parse_rate(settings.LOGIN_THROTTLE_RATES[scope])
+            self.wait_time = backend.consume('%s:%s' % (scope, ident), capacity, refill)
+            if self.wait_time:
+                return False
+        return True
+
+    def wait(self):
+        return self.wait_time
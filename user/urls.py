@@ -1,10 +1,11 @@
 from django.urls import path
 from .views import UserCreateAPIView
-from .views import LoginAPIView , UserUpdateAPIView
+from .views import LoginAPIView , LogoutAPIView, UserUpdateAPIView
 
 urlpatterns = [
     path('create/', UserCreateAPIView.as_view(), name='user-create'),
     path('login/',  LoginAPIView.as_view(), name='user-login'),
+    path('logout/', LogoutAPIView.as_view(), name='user-logout'),
     path('update/', UserUpdateAPIView.as_view(), name='user-update'),
 ]
  
\ No newline at end of file
@@ -5,7 +5,9 @@ from drf_yasg.utils import swagger_auto_schema
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
 from core.models import User
-from .serializers import UserSerializer, LoginSerializer
+from .serializers import UserSerializer, LoginSerializer, LogoutSerializer
+from .throttling import LoginThrottle
+from .revocation import is_revoked, revoke
 from rest_framework import permissions
 
 
@@ -21,6 +23,7 @@ class UserCreateAPIView(generics.CreateAPIView):
 class LoginAPIView(APIView):
     serializer_class = LoginSerializer
     permission_classes = []  # ← explicitly allow anyone to access login
+    throttle_classes = [LoginThrottle]  # runs before authenticate() hashes anything
 
     @swagger_auto_schema(request_body=LoginSerializer, 
     tags=['Login The User'],
@@ -33,6 +36,9 @@ class LoginAPIView(APIView):
         if refresh_token:
             try:
                 refresh = RefreshToken(refresh_token)
+                # Answered from the in-memory revocation filter, no query
+                if is_revoked(refresh):
+                    return Response({"error": "Invalid refresh token"}, status=status.HTTP_400_BAD_REQUEST)
                 return Response({
                     "access": str(refresh.access_token)
                 }, status=status.HTTP_200_OK)
@@ -54,6 +60,22 @@ class LoginAPIView(APIView):
         )
 
 
+class LogoutAPIView(APIView):
+    permission_classes = []  # the refresh token itself proves the session
+
+    @swagger_auto_schema(
+        request_body=LogoutSerializer,
+        tags=['Login The User'],
+        operation_description="Revoke a refresh token. It is refused by every worker within seconds.",
+        responses={205: "Refresh token revoked"}
+    )
+    def post(self, request):
+        serializer = LogoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        revoke(serializer.validated_data['refresh'])
+        return Response(status=status.HTTP_205_RESET_CONTENT)
+
+
 class UserUpdateAPIView(generics.UpdateAPIView):
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]